@@ -3,7 +3,7 @@ import os
 from PyQt6.QtWidgets import (QApplication, QWidget, QTabWidget, QStatusBar,
                              QVBoxLayout, QHBoxLayout)
 from PyQt6.QtGui import (QIcon, QFont)
-from pdf_widget import SplitPDFWidget, MergePDFWidget, EncryptPDFWidget, DecryptPDFWidget
+from pdf_widget import SplitPDFWidget, MergePDFWidget, EncryptPDFWidget, DecryptPDFWidget, CompressPDFWidget
 
 
 class AppWindow(QWidget):
@@ -37,6 +37,7 @@ class AppWindow(QWidget):
         self.tab.addTab(SplitPDFWidget(self), 'Split PDF')
         self.tab.addTab(EncryptPDFWidget(self), 'Encrypt PDF')
         self.tab.addTab(DecryptPDFWidget(self), 'Decrypt PDF')
+        self.tab.addTab(CompressPDFWidget(self), 'Compress PDF')
 
         self.status_bar = QStatusBar()
         self.layout['main'].addWidget(self.status_bar)
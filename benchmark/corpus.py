@@ -0,0 +1,139 @@
+import os
+import random
+import zlib
+from PyPDF2 import PdfWriter
+from PyPDF2.generic import (ArrayObject, DecodedStreamObject, DictionaryObject, EncodedStreamObject, FloatObject,
+                            NameObject, NumberObject)
+
+KINDS = ('text', 'image', 'font')
+PASSWORD = 'benchmark'
+WORDS = ('lorem', 'ipsum', 'dolor', 'sit', 'amet', 'consectetur', 'adipiscing', 'elit', 'sed', 'do',
+         'eiusmod', 'tempor', 'incididunt', 'ut', 'labore', 'et', 'dolore', 'magna', 'aliqua')
+
+
+def _name(value: str):
+    return NameObject(value)
+
+
+def _flate_stream(data: bytes, entries: dict = None):
+    stream = EncodedStreamObject()
+    stream._data = zlib.compress(data)
+    stream[_name('/Filter')] = _name('/FlateDecode')
+    for key, value in (entries or {}).items():
+        stream[_name(key)] = value
+    return stream
+
+
+def _helvetica(pdf_writer: PdfWriter):
+    return pdf_writer._add_object(DictionaryObject({
+        _name('/Type'): _name('/Font'),
+        _name('/Subtype'): _name('/Type1'),
+        _name('/BaseFont'): _name('/Helvetica'),
+    }))
+
+
+def _embedded_font(pdf_writer: PdfWriter, index: int, rng: random.Random):
+    # the font program is filler bytes, it only has to look like an embedded font to the copy paths
+    font_file = pdf_writer._add_object(_flate_stream(rng.randbytes(48 * 1024), {'/Length1': NumberObject(48 * 1024)}))
+    descriptor = pdf_writer._add_object(DictionaryObject({
+        _name('/Type'): _name('/FontDescriptor'),
+        _name('/FontName'): _name(f'/BenchFont{index}'),
+        _name('/Flags'): NumberObject(32),
+        _name('/FontBBox'): ArrayObject([NumberObject(0), NumberObject(-200), NumberObject(1000), NumberObject(900)]),
+        _name('/ItalicAngle'): NumberObject(0),
+        _name('/Ascent'): NumberObject(900),
+        _name('/Descent'): NumberObject(-200),
+        _name('/CapHeight'): NumberObject(700),
+        _name('/StemV'): NumberObject(80),
+        _name('/FontFile2'): font_file,
+    }))
+    return pdf_writer._add_object(DictionaryObject({
+        _name('/Type'): _name('/Font'),
+        _name('/Subtype'): _name('/TrueType'),
+        _name('/BaseFont'): _name(f'/BenchFont{index}'),
+        _name('/FontDescriptor'): descriptor,
+    }))
+
+
+def _text_lines(rng: random.Random, count: int):
+    return [' '.join(rng.choice(WORDS) for _ in range(12)) for _ in range(count)]
+
+
+def _page_content(kind: str, page: int, rng: random.Random, fonts: list):
+    lines = [f'BT /F0 14 Tf 72 750 Td (Benchmark {kind} page {page + 1}) Tj ET']
+    if kind == 'text':
+        lines.append('BT /F0 9 Tf 11 TL 72 720 Td')
+        lines.extend(f'({line}) \'' for line in _text_lines(rng, 60))
+        lines.append('ET')
+    elif kind == 'image':
+        lines.append('q 468 0 0 468 72 180 cm /Im0 Do Q')
+    elif kind == 'font':
+        for index in range(1, len(fonts)):
+            lines.append(f'BT /F{index} 11 Tf 72 {720 - index * 20} Td ({" ".join(_text_lines(rng, 1))}) Tj ET')
+    return '\n'.join(lines).encode()
+
+
+def _image(rng: random.Random, size: int = 128):
+    # a gradient with noise, so it neither compresses to nothing nor is pure entropy
+    pixels = bytearray()
+    for y in range(size):
+        for x in range(size):
+            noise = rng.randrange(32)
+            pixels += bytes(((x * 2 + noise) % 256, (y * 2 + noise) % 256, (x + y + noise) % 256))
+    return _flate_stream(bytes(pixels), {
+        '/Type': _name('/XObject'),
+        '/Subtype': _name('/Image'),
+        '/Width': NumberObject(size),
+        '/Height': NumberObject(size),
+        '/ColorSpace': _name('/DeviceRGB'),
+        '/BitsPerComponent': NumberObject(8),
+    })
+
+
+def generate_pdf(output_file: str, kind: str, pages: int, encrypted: bool = False, seed: int = 0):
+    if kind not in KINDS:
+        raise ValueError(f'Unknown corpus kind: {kind}')
+
+    rng = random.Random(f'{kind}-{pages}-{seed}')
+    pdf_writer = PdfWriter()
+    fonts = [_helvetica(pdf_writer)]
+    if kind == 'font':
+        fonts += [_embedded_font(pdf_writer, index, rng) for index in range(1, 9)]
+
+    for page in range(pages):
+        pdf_writer.add_blank_page(FloatObject(612), FloatObject(792))
+        page_object = pdf_writer.pages[-1].get_object()
+        resources = DictionaryObject({
+            _name('/Font'): DictionaryObject({_name(f'/F{index}'): font for index, font in enumerate(fonts)}),
+        })
+        if kind == 'image':
+            resources[_name('/XObject')] = DictionaryObject({_name('/Im0'): pdf_writer._add_object(_image(rng))})
+        content = DecodedStreamObject()
+        content.set_data(_page_content(kind, page, rng, fonts))
+        page_object[_name('/Resources')] = resources
+        page_object[_name('/Contents')] = pdf_writer._add_object(content.flate_encode())
+
+    if encrypted:
+        pdf_writer.encrypt(PASSWORD)
+    with open(output_file, 'wb') as output:
+        pdf_writer.write(output)
+    return output_file
+
+
+def corpus_file(corpus_dir: str, kind: str, pages: int, encrypted: bool = False):
+    suffix = '_encrypted' if encrypted else ''
+    return os.path.join(corpus_dir, f'{kind}_{pages}{suffix}.pdf')
+
+
+def ensure_corpus(corpus_dir: str, kinds=KINDS, page_counts=(1, 10, 100, 1000)):
+    # generated files are reused between runs, delete the directory to rebuild them
+    os.makedirs(corpus_dir, exist_ok=True)
+    files = []
+    for kind in kinds:
+        for pages in page_counts:
+            for encrypted in (False, True):
+                output_file = corpus_file(corpus_dir, kind, pages, encrypted)
+                if not os.path.exists(output_file):
+                    generate_pdf(output_file, kind, pages, encrypted)
+                files.append(output_file)
+    return files
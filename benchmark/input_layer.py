@@ -0,0 +1,129 @@
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_utility import PDFUtility, mapped_input
+from benchmark.corpus import PASSWORD, corpus_file, ensure_corpus
+
+LAYERS = ('buffered', 'mapped')
+CASES = ('split_sparse', 'split_ranges', 'merge', 'encrypt')
+
+
+class CountingFileIO(io.FileIO):
+    # sits under the BufferedReader the way open(pdf_file, 'rb') builds it, so every call that reaches it
+    # is a system call: readinto is read(2), seek and tell are lseek(2)
+    counts = {'read_calls': 0, 'seek_calls': 0, 'bytes_read': 0}
+
+    def readinto(self, buffer):
+        read = super().readinto(buffer)
+        self.counts['read_calls'] += 1
+        self.counts['bytes_read'] += read or 0
+        return read
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        self.counts['seek_calls'] += 1
+        return super().seek(offset, whence)
+
+    def tell(self):
+        self.counts['seek_calls'] += 1
+        return super().tell()
+
+
+def buffered_pdf(pdf_file: str):
+    return io.BufferedReader(CountingFileIO(pdf_file))
+
+
+def _page_faults():
+    try:
+        import resource
+    except ImportError:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_minflt + usage.ru_majflt
+
+
+def _evict(pdf_file: str):
+    # drop the file's pages from the page cache so both layers start cold; needs no privileges
+    if hasattr(os, 'posix_fadvise'):
+        with open(pdf_file, 'rb') as file:
+            os.posix_fadvise(file.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+
+
+def run_case(layer: str, case: str, source_file: str, pages: int, work_dir: str, cold: bool):
+    if layer == 'buffered':
+        # every operation and the merger open their inputs through map_pdf
+        mapped_input.map_pdf = buffered_pdf
+    if cold:
+        _evict(source_file)
+
+    pdf_utility = PDFUtility()
+    faults = _page_faults()
+    start = time.perf_counter()
+    if case == 'split_sparse':
+        # five single pages spread over the document, the xref is read once and only those pages are touched
+        custom_pages = ','.join(str(page) for page in sorted({1, pages // 4, pages // 2, pages * 3 // 4, pages}))
+        pdf_utility.split_pdf(source_file, work_dir, 'Custom', custom_pages)
+    elif case == 'split_ranges':
+        pdf_utility.split_pdf(source_file, work_dir, 'Custom', f'1-{max(pages // 10, 1)},{pages // 2}-{pages}')
+    elif case == 'merge':
+        pdf_utility.merge_pdfs([source_file, source_file], os.path.join(work_dir, 'merged.pdf'))
+    else:
+        pdf_utility.encrypt_pdf(source_file, PASSWORD, os.path.join(work_dir, 'encrypted.pdf'))
+    wall_time = time.perf_counter() - start
+
+    result = {'wall_time': round(wall_time, 6), 'read_calls': 0, 'seek_calls': 0, 'bytes_read': 0}
+    if layer == 'buffered':
+        result.update(CountingFileIO.counts)
+    result['page_faults'] = _page_faults() - faults if faults is not None else None
+    return result
+
+
+def measure(layer: str, case: str, source_file: str, pages: int, cold: bool):
+    # every case runs in a fresh process so neither layer inherits the other's reader caches
+    with tempfile.TemporaryDirectory() as work_dir:
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            return executor.submit(run_case, layer, case, source_file, pages, work_dir, cold).result()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Compare buffered file reads with memory-mapped PDF inputs')
+    parser.add_argument('--corpus-dir', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus'))
+    parser.add_argument('--kind', default='image', help='Corpus kind, image documents are the largest')
+    parser.add_argument('--pages', type=int, default=2000)
+    parser.add_argument('--cases', default=','.join(CASES))
+    parser.add_argument('--cold', action='store_true', help='Evict the input from the page cache before each case')
+    parser.add_argument('--output', help='Write the results JSON to this file')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    ensure_corpus(args.corpus_dir, [args.kind], [args.pages])
+    source_file = corpus_file(args.corpus_dir, args.kind, args.pages)
+    print(f'{source_file}: {os.path.getsize(source_file) / 1e6:.1f} MB, {args.pages} pages')
+
+    results = {}
+    for case in args.cases.split(','):
+        for layer in LAYERS:
+            metrics = results[f'{case}/{layer}'] = measure(layer, case, source_file, args.pages, args.cold)
+            print(f"{case + '/' + layer:<24} {metrics['wall_time']:>9.3f}s {metrics['read_calls']:>9} reads "
+                  f"{metrics['seek_calls']:>9} seeks {metrics['bytes_read'] / 1e6:>9.1f} MB read "
+                  f"{metrics['page_faults'] or 0:>9} faults")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
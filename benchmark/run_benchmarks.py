@@ -0,0 +1,160 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyPDF2 import PdfReader
+from pdf_utility import PDFUtility
+from benchmark.corpus import KINDS, PASSWORD, corpus_file, ensure_corpus
+
+OPERATIONS = ('merge', 'merge_streaming', 'split', 'encrypt', 'decrypt', 'compress')
+DEFAULT_CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus')
+# results of the default run, committed so later runs have something to be compared against
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+# cases faster than this in the baseline are dominated by start-up and timer noise, their speed is not compared
+MIN_COMPARED_WALL_TIME = 0.25
+
+
+def _peak_rss():
+    # ru_maxrss is KiB on Linux and bytes on macOS; the resource module is not available on Windows
+    try:
+        import resource
+    except ImportError:
+        return None
+    scale = 1 if sys.platform == 'darwin' else 1024
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    if os.path.exists('/proc/self/status'):
+        # Linux carries ru_maxrss over from the spawning parent, VmHWM is reset by exec
+        with open('/proc/self/status', 'r') as status:
+            peak = next(int(line.split()[1]) * 1024 for line in status if line.startswith('VmHWM:'))
+    return max(peak, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale)
+
+
+def _output_size(path: str):
+    if os.path.isdir(path):
+        return sum(entry.stat().st_size for entry in os.scandir(path))
+    return os.path.getsize(path)
+
+
+def run_case(operation: str, source_file: str, encrypted_file: str, pages: int, work_dir: str):
+    pdf_utility = PDFUtility()
+    if operation in ('merge', 'merge_streaming'):
+        output = os.path.join(work_dir, 'merged.pdf')
+        pages_processed = pages * 2
+        start = time.perf_counter()
+        pdf_utility.merge_pdfs([source_file, source_file], output, streaming=operation == 'merge_streaming')
+    elif operation == 'split':
+        output = os.path.join(work_dir, 'split')
+        os.makedirs(output)
+        pages_processed = pages
+        start = time.perf_counter()
+        pdf_utility.split_pdf(source_file, output)
+    elif operation == 'encrypt':
+        output = os.path.join(work_dir, 'encrypted.pdf')
+        pages_processed = pages
+        start = time.perf_counter()
+        pdf_utility.encrypt_pdf(source_file, PASSWORD, output)
+    elif operation == 'compress':
+        output = os.path.join(work_dir, 'compressed.pdf')
+        pages_processed = pages
+        start = time.perf_counter()
+        pdf_utility.compress_pdf(source_file, output)
+    else:
+        # decrypt rewrites its input, so work on a copy of the encrypted corpus file
+        output = os.path.join(work_dir, 'decrypted.pdf')
+        shutil.copyfile(encrypted_file, output)
+        pages_processed = pages
+        start = time.perf_counter()
+        pdf_utility.decrypt_pdf(output, PASSWORD)
+    wall_time = time.perf_counter() - start
+
+    return {
+        'wall_time': round(wall_time, 6),
+        'pages_per_sec': round(pages_processed / wall_time, 2) if wall_time else None,
+        'peak_rss': _peak_rss(),
+        'output_size': _output_size(output),
+    }
+
+
+def measure(operation: str, source_file: str, encrypted_file: str, pages: int):
+    # every case runs in a fresh process so peak RSS belongs to that case alone
+    with tempfile.TemporaryDirectory() as work_dir:
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            return executor.submit(run_case, operation, source_file, encrypted_file, pages, work_dir).result()
+
+
+def compare(results: dict, baseline: dict, tolerance: float):
+    regressions = []
+    for case, metrics in results.items():
+        expected = baseline.get(case)
+        if not expected:
+            continue
+        timed = expected.get('pages_per_sec') and expected['wall_time'] >= MIN_COMPARED_WALL_TIME
+        if timed and metrics['pages_per_sec'] < expected['pages_per_sec'] * (1 - tolerance):
+            regressions.append(f"{case}: pages/sec {metrics['pages_per_sec']} < baseline {expected['pages_per_sec']}")
+        if expected.get('peak_rss') and metrics['peak_rss'] and metrics['peak_rss'] > expected['peak_rss'] * (1 + tolerance):
+            regressions.append(f"{case}: peak RSS {metrics['peak_rss']} > baseline {expected['peak_rss']}")
+        if metrics['output_size'] > expected['output_size'] * (1 + tolerance):
+            regressions.append(f"{case}: output size {metrics['output_size']} > baseline {expected['output_size']}")
+    return regressions
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Benchmark PDFUtility operations on a synthetic corpus')
+    parser.add_argument('--corpus-dir', default=DEFAULT_CORPUS_DIR)
+    parser.add_argument('--sizes', default='1,10,100,1000,10000', help='Comma separated page counts')
+    parser.add_argument('--kinds', default=','.join(KINDS))
+    parser.add_argument('--operations', default=','.join(OPERATIONS))
+    parser.add_argument('--output', help='Write the results JSON to this file')
+    parser.add_argument('--baseline', nargs='?', const=DEFAULT_BASELINE,
+                        help='Baseline results JSON to compare against, benchmark/baseline.json without a value')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed relative regression, default 0.2')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    sizes = [int(size) for size in args.sizes.split(',')]
+    kinds = args.kinds.split(',')
+    operations = args.operations.split(',')
+
+    ensure_corpus(args.corpus_dir, kinds, sizes)
+
+    results = {}
+    for kind in kinds:
+        for pages in sizes:
+            source_file = corpus_file(args.corpus_dir, kind, pages)
+            encrypted_file = corpus_file(args.corpus_dir, kind, pages, encrypted=True)
+            if len(PdfReader(source_file).pages) != pages:
+                print(f'{source_file} does not have {pages} pages, delete it to generate it again', file=sys.stderr)
+                return 2
+            for operation in operations:
+                case = f'{operation}/{kind}/{pages}'
+                results[case] = measure(operation, source_file, encrypted_file, pages)
+                metrics = results[case]
+                print(f"{case:<32} {metrics['wall_time']:>10.3f}s {metrics['pages_per_sec']:>12} pages/s "
+                      f"{metrics['peak_rss'] or 0:>12} rss {metrics['output_size']:>12} bytes")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,2 +1,5 @@
 
-from .pdf_utility import PDFUtility
\ No newline at end of file
+from .errors import InvalidPasswordError, OperationCancelled
+from .instrumentation import JsonLinesTraceSink, describe_event
+from .page_ranges import parse_page_ranges, parse_rotation_plan
+from .pdf_utility import PDFUtility, init_pdf_job_worker, pool_context, process_pool, run_pdf_job
\ No newline at end of file
@@ -0,0 +1,108 @@
+from io import BytesIO
+from typing import List, Tuple
+from PyPDF2 import PdfReader
+from PyPDF2.generic import ArrayObject, DictionaryObject, IndirectObject, NameObject, NumberObject, StreamObject
+from .stream_writer import PAGE_EXCLUDED_KEYS
+
+# what StreamingPdfWriter adds around every object besides its number: ' 0 obj\n', '\nendobj\n' and its xref line
+OBJECT_OVERHEAD = 35
+# header, page tree root, catalog, xref header and trailer of an output without pages
+DOCUMENT_OVERHEAD = 300
+# a page's entry in /Kids and the /Parent reference it is given
+PAGE_OVERHEAD = 24
+
+
+def serialized_size(pdf_object):
+    buffer = BytesIO()
+    if isinstance(pdf_object, StreamObject):
+        # the data is written as it is, only the dictionary has to be serialized to be measured; the
+        # reader drops /Length, the writer puts it back
+        dictionary = DictionaryObject(pdf_object)
+        dictionary[NameObject('/Length')] = NumberObject(len(pdf_object._data))
+        dictionary.write_to_stream(buffer, None)
+        return buffer.tell() + len(pdf_object._data) + len(b'\nstream\n\nendstream')
+    pdf_object.write_to_stream(buffer, None)
+    return buffer.tell()
+
+
+class ChunkSizeEstimator:
+    # estimates the size a run of pages will have once written by StreamingPdfWriter: the objects a page
+    # reaches are measured once per chunk, so fonts and images shared by its pages are counted once
+    def __init__(self, pdf_reader: PdfReader):
+        self.pdf_reader = pdf_reader
+        self.page_ids = {(page.indirect_reference.idnum, page.indirect_reference.generation)
+                         for page in pdf_reader.pages}
+        self.object_sizes = {}
+        # objects are renumbered, an output number is at most this wide in headers and references
+        self.digits = len(str(int(pdf_reader.trailer['/Size']) + 3))
+        self.reset()
+
+    def reset(self):
+        self.objects = set()
+        self.size = DOCUMENT_OVERHEAD
+        self.pages = 0
+
+    def page_size(self, page: int):
+        # bytes the page would add to the current chunk, with the objects it would bring in; the chunk's
+        # objects are closed under references, so the walk stops at any object already in it
+        page_object = self.pdf_reader.pages[page]
+        page_dict = DictionaryObject({key: value for key, value in page_object.items() if key not in PAGE_EXCLUDED_KEYS})
+        size = serialized_size(page_dict) + OBJECT_OVERHEAD + self.digits + PAGE_OVERHEAD
+        new_objects = set()
+        stack = list(page_dict.values())
+        while stack:
+            value = stack.pop()
+            if isinstance(value, IndirectObject):
+                size += max(self.digits - len(str(value.idnum)), 0)
+                key = (value.idnum, value.generation)
+                # links to other pages are never copied through, the writer drops or renumbers them
+                if key in self.objects or key in new_objects or key in self.page_ids:
+                    continue
+                new_objects.add(key)
+                value = value.get_object()
+                if key not in self.object_sizes:
+                    self.object_sizes[key] = serialized_size(value) + OBJECT_OVERHEAD + self.digits
+                size += self.object_sizes[key]
+            if isinstance(value, DictionaryObject):
+                stack.extend(value.values())
+            elif isinstance(value, ArrayObject):
+                stack.extend(value)
+        return size, new_objects
+
+    def add(self, size: int, new_objects: set):
+        self.objects.update(new_objects)
+        self.size += size
+        self.pages += 1
+
+
+def plan_chunks(pdf_reader: PdfReader, max_bytes: int = None, max_pages: int = None) -> List[Tuple[int, int]]:
+    # consecutive 1-based (start, end) ranges in one pass over the pages; a chunk is closed when the next
+    # page would take it over a budget, a single page over max_bytes still gets a chunk of its own
+    if not max_bytes and not max_pages:
+        raise ValueError('Chunks need a size or a page budget')
+    if (max_bytes is not None and max_bytes < 0) or (max_pages is not None and max_pages < 0):
+        raise ValueError('Chunk budgets must be positive')
+
+    page_count = len(pdf_reader.pages)
+    estimator = ChunkSizeEstimator(pdf_reader) if max_bytes else None
+    plan = []
+    start = 0
+    chunk_pages = 0
+    for page in range(page_count):
+        if estimator is None:
+            if chunk_pages and chunk_pages >= max_pages:
+                plan.append((start + 1, page))
+                start, chunk_pages = page, 0
+            chunk_pages += 1
+            continue
+
+        size, new_objects = estimator.page_size(page)
+        if estimator.pages and ((max_pages and estimator.pages >= max_pages) or estimator.size + size > max_bytes):
+            plan.append((start + 1, page))
+            start = page
+            estimator.reset()
+            size, new_objects = estimator.page_size(page)
+        estimator.add(size, new_objects)
+    if page_count:
+        plan.append((start + 1, page_count))
+    return plan
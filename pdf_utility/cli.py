@@ -0,0 +1,277 @@
+import sys
+import json
+import time
+import signal
+import argparse
+from concurrent.futures import as_completed
+from typing import List
+from .pdf_utility import init_pdf_job_worker, process_pool, run_pdf_job
+from .watch import HotFolder, load_rules
+
+OPERATIONS = {
+    'merge': 'merge_pdfs',
+    'split': 'split_pdf',
+    'encrypt': 'encrypt_pdf',
+    'decrypt': 'decrypt_pdf',
+    'compress': 'compress_pdf',
+    'images': 'extract_images',
+    'text': 'extract_text',
+    'rotate': 'rotate_pdf',
+    'watermark': 'watermark_pdf',
+}
+
+
+def parse_size(value: str):
+    # '10M' -> 10485760; plain numbers are bytes
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+    value = value.strip().upper().rstrip('B')
+    try:
+        if value and value[-1] in units:
+            return int(float(value[:-1]) * units[value[-1]])
+        return int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'Invalid size: {value}')
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m pdf_utility', description='Headless PDF utility operations')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    merge = subparsers.add_parser('merge', help='Merge PDFs into one file')
+    merge.add_argument('output_file', nargs='?')
+    merge.add_argument('pdf_files', nargs='*')
+    merge.add_argument('--streaming', action='store_true', help='Copy inputs one at a time to bound memory')
+    merge.add_argument('--deduplicate', action='store_true',
+                       help='Write identical fonts, images and other streams once (implies --streaming)')
+    merge.add_argument('--append', action='store_true',
+                       help='Only append inputs added since the output was last built, as an incremental update')
+    merge.add_argument('--pages', dest='page_ranges', action='append',
+                       help='Pages to take, e.g. 1-2,5; given once it applies to every input, otherwise once per '
+                            'input in order, "all" takes the whole file')
+
+    split = subparsers.add_parser('split', help='Split a PDF into pages or ranges')
+    split.add_argument('pdf_file', nargs='?')
+    split.add_argument('output_dir', nargs='?')
+    split.add_argument('--type', dest='split_type', default='All', choices=['All', 'Odd', 'Even', 'Custom', 'Chunks'])
+    split.add_argument('--pages', dest='custom_pages', help='Custom page ranges, e.g. 2-5,9,12-16')
+    split.add_argument('--max-size', dest='max_bytes', type=parse_size,
+                       help='Chunks: largest output size, in bytes or with a K/M/G suffix, e.g. 10M')
+    split.add_argument('--max-pages', type=int, help='Chunks: most pages per output')
+    split.add_argument('--workers', type=int, default=1, help='Processes used to write pages of one file')
+
+    encrypt = subparsers.add_parser('encrypt', help='Encrypt PDFs with a password')
+    encrypt.add_argument('pdf_files', nargs='*')
+    encrypt.add_argument('--password')
+    encrypt.add_argument('--output', dest='output_file', help='Output path, only valid with a single input')
+
+    decrypt = subparsers.add_parser('decrypt', help='Decrypt PDFs in place')
+    decrypt.add_argument('pdf_files', nargs='*')
+    decrypt.add_argument('--password')
+
+    compress = subparsers.add_parser('compress', help='Recompress streams and downsample images')
+    compress.add_argument('pdf_files', nargs='*')
+    compress.add_argument('--output', dest='output_file', help='Output path, only valid with a single input')
+    compress.add_argument('--level', type=int, default=9, help='Flate compression level, 1-9')
+    compress.add_argument('--image-dpi', type=int, default=150, help='Downsample images above this resolution, 0 keeps them')
+    compress.add_argument('--image-quality', type=int, default=75, help='JPEG quality of re-encoded images')
+    compress.add_argument('--workers', type=int, default=1, help='Processes used to recompress streams of one file')
+
+    images = subparsers.add_parser('images', help='Export embedded images, JPEGs are copied without re-encoding')
+    images.add_argument('pdf_file', nargs='?')
+    images.add_argument('output_dir', nargs='?')
+    images.add_argument('--workers', type=int, default=1, help='Processes used to encode PNGs of one file')
+
+    text = subparsers.add_parser('text', help='Extract page text to plain text, JSON lines or a basic .docx')
+    text.add_argument('pdf_files', nargs='*')
+    text.add_argument('--format', dest='output_format', choices=['txt', 'jsonl', 'docx'],
+                      help='Output format, default from the --output extension or txt')
+    text.add_argument('--output', dest='output_file', help='Output path, only valid with a single input')
+    text.add_argument('--workers', type=int, default=1, help='Processes used to extract pages of one file')
+
+    rotate = subparsers.add_parser('rotate', help='Rotate pages by setting /Rotate, content is not rewritten')
+    rotate.add_argument('pdf_files', nargs='*')
+    rotate.add_argument('--pages', help='Page ranges with optional angles, e.g. 1-3:90,5:180,8 (default all pages)')
+    rotate.add_argument('--angle', type=int, default=90, help='Clockwise angle for ranges without one, default 90')
+    rotate.add_argument('--output', dest='output_file', help='Output path, only valid with a single input')
+    rotate.add_argument('--incremental', action='store_true',
+                        help='Append the rotated pages as an incremental update instead of rewriting the file')
+
+    watermark = subparsers.add_parser('watermark', help='Stamp a text or image watermark on every page')
+    watermark.add_argument('pdf_files', nargs='*')
+    watermark.add_argument('--text')
+    watermark.add_argument('--image', dest='image_file', help='Image to stamp instead of a text')
+    watermark.add_argument('--opacity', type=float, default=0.3)
+    watermark.add_argument('--font-size', type=float, default=48)
+    watermark.add_argument('--angle', type=float, default=45, help='Counter-clockwise angle in degrees')
+    watermark.add_argument('--scale', type=float, default=0.5, help='Image width as a share of the page width')
+    watermark.add_argument('--pages', help='Page ranges to stamp, e.g. 2-5,9 (default all pages)')
+    watermark.add_argument('--output', dest='output_file', help='Output path, only valid with a single input')
+
+    batch = subparsers.add_parser('batch', help='Run a manifest of mixed jobs, each line naming its operation')
+    batch.add_argument('manifest')
+
+    watch = subparsers.add_parser('watch', help='Watch hot folders and run a rule on every PDF dropped into them')
+    watch.add_argument('config', help='JSON file with a "rules" list, see pdf_utility/watch.py')
+    watch.add_argument('--settle', type=float, default=2.0,
+                       help='Seconds a file must stay unchanged before it is picked up')
+    watch.add_argument('--stale', type=float, default=60.0,
+                       help='Seconds after which an unchanged file without %%%%EOF is moved to the error folder')
+    watch.add_argument('--poll', action='store_true', help='Poll directory mtimes instead of using inotify')
+    watch.add_argument('--once', action='store_true', help='Handle the files already there and exit')
+
+    for subparser in subparsers.choices.values():
+        if subparser not in (batch, watch):
+            subparser.add_argument('--manifest', help='JSON lines file, one job per line')
+        subparser.add_argument('--jobs', type=int, default=1, help='Number of jobs to run in parallel')
+        subparser.add_argument('--trace', dest='trace_file',
+                               help='Append per-stage timing events of every job to this JSON lines file')
+    return parser
+
+
+def read_manifest(manifest_file: str, operation: str = None):
+    # each line is a JSON object of keyword arguments for the operation;
+    # batch manifests also carry an "operation" key (merge/split/encrypt/decrypt/compress/images/text/rotate/watermark)
+    jobs = []
+    with open(manifest_file, 'r', encoding='utf-8') as file:
+        for line_number, line in enumerate(file, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            job = json.loads(line)
+            command = job.pop('operation', operation)
+            if command not in OPERATIONS:
+                raise ValueError(f'{manifest_file}:{line_number}: unknown operation {command!r}')
+            jobs.append((command, job))
+    return jobs
+
+
+def jobs_from_args(args):
+    if args.command == 'batch':
+        return read_manifest(args.manifest)
+    if args.manifest:
+        return read_manifest(args.manifest, args.command)
+
+    if args.command == 'merge':
+        if not args.output_file or not args.pdf_files:
+            raise ValueError('merge needs an output file and at least one input')
+        page_ranges = args.page_ranges
+        if page_ranges is not None:
+            if len(page_ranges) == 1:
+                page_ranges = page_ranges * len(args.pdf_files)
+            elif len(page_ranges) != len(args.pdf_files):
+                raise ValueError('--pages must be given once or once per input')
+            page_ranges = [None if page_spec.strip().lower() == 'all' else page_spec for page_spec in page_ranges]
+        return [('merge', {'pdf_files': args.pdf_files, 'output_file': args.output_file, 'streaming': args.streaming,
+                           'deduplicate': args.deduplicate, 'append': args.append, 'page_ranges': page_ranges})]
+    if args.command == 'split':
+        if not args.pdf_file or not args.output_dir:
+            raise ValueError('split needs an input file and an output directory')
+        if args.split_type == 'Chunks' and not (args.max_bytes or args.max_pages):
+            raise ValueError('--type Chunks needs --max-size and/or --max-pages')
+        return [('split', {'pdf_file': args.pdf_file, 'output_dir': args.output_dir, 'split_type': args.split_type,
+                           'custom_pages': args.custom_pages, 'workers': args.workers, 'max_bytes': args.max_bytes,
+                           'max_pages': args.max_pages})]
+    if args.command == 'images':
+        if not args.pdf_file or not args.output_dir:
+            raise ValueError('images needs an input file and an output directory')
+        return [('images', {'pdf_file': args.pdf_file, 'output_dir': args.output_dir, 'workers': args.workers})]
+    if args.command == 'text':
+        if not args.pdf_files:
+            raise ValueError('text needs at least one input')
+        if args.output_file and len(args.pdf_files) > 1:
+            raise ValueError('--output can only be used with a single input')
+        return [('text', {'pdf_file': pdf_file, 'output_file': args.output_file,
+                          'output_format': args.output_format, 'workers': args.workers})
+                for pdf_file in args.pdf_files]
+    if args.command == 'rotate':
+        if not args.pdf_files:
+            raise ValueError('rotate needs at least one input')
+        if args.output_file and len(args.pdf_files) > 1:
+            raise ValueError('--output can only be used with a single input')
+        return [('rotate', {'pdf_file': pdf_file, 'pages': args.pages, 'angle': args.angle,
+                            'output_file': args.output_file, 'incremental': args.incremental})
+                for pdf_file in args.pdf_files]
+    if args.command == 'watermark':
+        if not args.pdf_files or not (args.text or args.image_file):
+            raise ValueError('watermark needs at least one input and --text or --image')
+        if args.output_file and len(args.pdf_files) > 1:
+            raise ValueError('--output can only be used with a single input')
+        return [('watermark', {'pdf_file': pdf_file, 'output_file': args.output_file, 'text': args.text,
+                               'image_file': args.image_file, 'opacity': args.opacity, 'font_size': args.font_size,
+                               'angle': args.angle, 'scale': args.scale, 'pages': args.pages})
+                for pdf_file in args.pdf_files]
+    if args.command == 'compress':
+        if not args.pdf_files:
+            raise ValueError('compress needs at least one input')
+        if args.output_file and len(args.pdf_files) > 1:
+            raise ValueError('--output can only be used with a single input')
+        return [('compress', {'pdf_file': pdf_file, 'output_file': args.output_file, 'level': args.level,
+                              'image_dpi': args.image_dpi, 'image_quality': args.image_quality,
+                              'workers': args.workers})
+                for pdf_file in args.pdf_files]
+
+    if not args.pdf_files or args.password is None:
+        raise ValueError(f'{args.command} needs at least one input and --password')
+    if args.command == 'encrypt':
+        if args.output_file and len(args.pdf_files) > 1:
+            raise ValueError('--output can only be used with a single input')
+        return [('encrypt', {'pdf_file': pdf_file, 'password': args.password, 'output_file': args.output_file})
+                for pdf_file in args.pdf_files]
+    return [('decrypt', {'pdf_file': pdf_file, 'password': args.password}) for pdf_file in args.pdf_files]
+
+
+def run_job(index: int, command: str, kwargs: dict):
+    start = time.perf_counter()
+    try:
+        result = {'job': index, 'operation': command, 'status': 'ok',
+                  'result': run_pdf_job(OPERATIONS[command], **kwargs)}
+    except Exception as e:
+        result = {'job': index, 'operation': command, 'status': 'error', 'error': str(e)}
+    result['elapsed'] = round(time.perf_counter() - start, 6)
+    return result
+
+
+def run_jobs(jobs: List[tuple], max_workers: int = 1, output=sys.stdout, trace_file: str = None):
+    failed = 0
+    if max_workers > 1 and len(jobs) > 1:
+        with process_pool(max_workers, init_pdf_job_worker, (None, trace_file)) as executor:
+            futures = [executor.submit(run_job, index, command, kwargs) for index, (command, kwargs) in enumerate(jobs)]
+            results = (future.result() for future in as_completed(futures))
+            failed = _emit_results(results, output)
+    else:
+        init_pdf_job_worker(None, trace_file)
+        results = (run_job(index, command, kwargs) for index, (command, kwargs) in enumerate(jobs))
+        failed = _emit_results(results, output)
+    return failed
+
+
+def _emit_results(results, output):
+    # one JSON object per line as soon as each job finishes, so long batches can be tailed
+    failed = 0
+    for result in results:
+        failed += result['status'] != 'ok'
+        output.write(json.dumps(result) + '\n')
+        output.flush()
+    return failed
+
+
+def main(argv: List[str] = None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == 'watch':
+        try:
+            rules = load_rules(args.config)
+        except (OSError, ValueError, KeyError) as e:
+            parser.error(str(e))
+        # --jobs is the size of the worker pool the rules share
+        hot_folder = HotFolder(rules, workers=args.jobs, settle=args.settle, stale=args.stale,
+                               use_inotify=not args.poll, trace_file=args.trace_file)
+        # on SIGTERM running jobs are finished and their inputs moved before exiting
+        signal.signal(signal.SIGTERM, lambda signum, frame: hot_folder.stop())
+        hot_folder.run(once=args.once)
+        return 0
+    try:
+        jobs = jobs_from_args(args)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    return 1 if run_jobs(jobs, args.jobs, trace_file=args.trace_file) else 0
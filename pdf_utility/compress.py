@@ -0,0 +1,172 @@
+import zlib
+from io import BytesIO
+from PyPDF2 import PdfReader
+from PyPDF2.generic import (ArrayObject, DictionaryObject, EncodedStreamObject, IndirectObject, NameObject,
+                            NumberObject, StreamObject)
+
+try:
+    from PIL import Image
+except ImportError:
+    # without Pillow images are only recompressed losslessly, never resampled or re-encoded
+    Image = None
+
+STREAM_CLASSES = ('image', 'font', 'content', 'other')
+FONT_SUBTYPES = ('/Type1C', '/CIDFontType0C', '/OpenType')
+LINK_KEYS = ('/Parent', '/P', '/Dest')
+IMAGE_MODES = {('/DeviceRGB', 8): 'RGB', ('/DeviceGray', 8): 'L'}
+
+
+def stream_filters(stream: StreamObject):
+    filters = stream.get('/Filter')
+    if filters is None:
+        return []
+    if isinstance(filters, ArrayObject):
+        return [str(name) for name in filters]
+    return [str(filters)]
+
+
+def _stream_class(stream: StreamObject, reached_by: str):
+    if stream.get('/Subtype') == '/Image':
+        return 'image'
+    if reached_by.startswith('/FontFile') or stream.get('/Subtype') in FONT_SUBTYPES or '/Length1' in stream:
+        return 'font'
+    if reached_by == '/Contents' or stream.get('/Subtype') == '/Form':
+        return 'content'
+    return 'other'
+
+
+def collect_streams(pdf_reader: PdfReader):
+    # walks everything reachable from the pages, which is also everything a rewrite keeps;
+    # images remember the largest page they are drawn on to estimate their resolution
+    jobs = {}
+    for page in pdf_reader.pages:
+        media_box = page.mediabox
+        page_size = (float(media_box.width), float(media_box.height))
+        visited = set()
+        todo = [(page, '')]
+        while todo:
+            pdf_object, reached_by = todo.pop()
+            if isinstance(pdf_object, IndirectObject):
+                key = (pdf_object.idnum, pdf_object.generation)
+                if key in visited:
+                    continue
+                visited.add(key)
+                resolved = pdf_object.get_object()
+                if isinstance(resolved, StreamObject):
+                    job = jobs.get(key)
+                    if job is None:
+                        job = jobs[key] = _stream_job(key, resolved, reached_by)
+                    if job['class'] == 'image' and job['page_size']:
+                        job['page_size'] = (max(job['page_size'][0], page_size[0]), max(job['page_size'][1], page_size[1]))
+                    elif job['class'] == 'image':
+                        job['page_size'] = page_size
+                pdf_object = resolved
+            if isinstance(pdf_object, DictionaryObject):
+                todo.extend((value, key) for key, value in pdf_object.items() if key not in LINK_KEYS)
+            elif isinstance(pdf_object, ArrayObject):
+                todo.extend((value, reached_by) for value in pdf_object)
+    return list(jobs.values())
+
+
+def _stream_job(key: tuple, stream: StreamObject, reached_by: str):
+    stream_class = _stream_class(stream, reached_by)
+    job = {
+        'key': key,
+        'class': stream_class,
+        'data': stream._data,
+        'filters': stream_filters(stream),
+        'predictor': '/DecodeParms' in stream,
+        'page_size': None,
+    }
+    if stream_class == 'image':
+        color_space = stream.get('/ColorSpace')
+        job['mode'] = IMAGE_MODES.get((color_space if isinstance(color_space, str) else None,
+                                       stream.get('/BitsPerComponent')))
+        if '/Mask' in stream or '/Decode' in stream:
+            # color keys and decode arrays refer to exact sample values, resampling would break them
+            job['mode'] = None
+        job['width'] = stream.get('/Width')
+        job['height'] = stream.get('/Height')
+        # soft masks are resampled but never turned into JPEGs
+        job['lossless'] = reached_by == '/SMask'
+    return job
+
+
+def recompress_stream(job: dict, level: int = 9, image_dpi: int = 150, image_quality: int = 75):
+    # returns (key, data, entries) when the stream got smaller, otherwise (key, None, None);
+    # runs in a worker process, so it only sees plain bytes and numbers
+    candidates = [_recompress_flate(job, level)]
+    if job['class'] == 'image' and Image is not None and job['mode']:
+        candidates.extend(_recompress_image(job, level, image_dpi, image_quality))
+    data, entries = min((candidate for candidate in candidates if candidate[0] is not None),
+                        key=lambda candidate: len(candidate[0]), default=(None, None))
+    if data is None or len(data) >= len(job['data']):
+        return job['key'], None, None
+    return job['key'], data, entries
+
+
+def _recompress_flate(job: dict, level: int):
+    if job['filters'] == ['/FlateDecode']:
+        try:
+            # predictor rows are kept as they are, /DecodeParms stays valid
+            return zlib.compress(zlib.decompress(job['data']), level), {}
+        except zlib.error:
+            return None, None
+    if not job['filters']:
+        return zlib.compress(job['data'], level), {'/Filter': '/FlateDecode'}
+    return None, None
+
+
+def _target_size(job: dict, image_dpi: int):
+    if not job['page_size'] or not image_dpi:
+        return None
+    # the image covers at most its page, so this is the lowest resolution it can be shown at
+    scale = min(image_dpi * job['page_size'][0] / 72 / job['width'], image_dpi * job['page_size'][1] / 72 / job['height'])
+    if scale >= 1:
+        return None
+    return max(1, round(job['width'] * scale)), max(1, round(job['height'] * scale))
+
+
+def _recompress_image(job: dict, level: int, image_dpi: int, image_quality: int):
+    target_size = _target_size(job, image_dpi)
+    # a corrupt image keeps its original stream instead of failing the whole document
+    if job['filters'] == ['/DCTDecode']:
+        try:
+            image = Image.open(BytesIO(job['data']))
+        except OSError:
+            return []
+        if image.mode != job['mode']:
+            return []
+    elif job['filters'] in (['/FlateDecode'], []) and not job['predictor'] and target_size:
+        try:
+            raw = zlib.decompress(job['data']) if job['filters'] else job['data']
+            image = Image.frombytes(job['mode'], (job['width'], job['height']), raw)
+        except (zlib.error, ValueError):
+            return []
+    else:
+        return []
+
+    if target_size:
+        image = image.resize(target_size, Image.LANCZOS)
+    width, height = image.size
+    candidates = []
+    if target_size and (job['lossless'] or job['filters'] != ['/DCTDecode']):
+        candidates.append((zlib.compress(image.tobytes(), level),
+                           {'/Filter': '/FlateDecode', '/Width': width, '/Height': height}))
+    if not job['lossless']:
+        output = BytesIO()
+        image.save(output, 'JPEG', quality=image_quality, optimize=True)
+        candidates.append((output.getvalue(), {'/Filter': '/DCTDecode', '/Width': width, '/Height': height}))
+    return candidates
+
+
+def replacement_stream(stream: StreamObject, data: bytes, entries: dict):
+    replacement = EncodedStreamObject()
+    for key, value in stream.items():
+        if key == '/Length' or (key == '/DecodeParms' and entries):
+            continue
+        replacement[NameObject(key)] = value
+    for key, value in entries.items():
+        replacement[NameObject(key)] = NameObject(value) if isinstance(value, str) else NumberObject(value)
+    replacement._data = data
+    return replacement
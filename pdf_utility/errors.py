@@ -0,0 +1,5 @@
+class OperationCancelled(Exception):
+    pass
+
+class InvalidPasswordError(Exception):
+    pass
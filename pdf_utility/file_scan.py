@@ -0,0 +1,71 @@
+import os
+from threading import Event
+from typing import Iterable
+
+PDF_MAGIC = b'%PDF-'
+# readers accept the header anywhere in the first kilobyte, e.g. after a MacBinary or mail prefix
+HEADER_WINDOW = 1024
+
+
+def is_pdf(path: str):
+    try:
+        with open(path, 'rb') as file:
+            return PDF_MAGIC in file.read(HEADER_WINDOW)
+    except OSError:
+        return False
+
+
+def _real_entry_path(directory: str, entry: os.DirEntry):
+    # directory is already a real path, so only symlinked entries need resolving
+    return os.path.realpath(entry.path) if entry.is_symlink() else os.path.join(directory, entry.name)
+
+
+def scan_pdfs(paths: Iterable[str], cancel_event: Event = None):
+    # yields the real path of every PDF among paths and, recursively, inside the directories among them,
+    # by name within each directory; a file reached through several links is yielded once and symlinked
+    # directories that loop back are walked once
+    seen_files = set()
+    seen_dirs = set()
+    stack = []
+    for path in reversed(list(paths)):
+        if os.path.isdir(path):
+            stack.append(os.path.realpath(path))
+        elif os.path.isfile(path):
+            stack.append((os.path.realpath(path),))
+
+    while stack:
+        if cancel_event is not None and cancel_event.is_set():
+            return
+        item = stack.pop()
+        if isinstance(item, tuple):
+            if item[0] not in seen_files:
+                seen_files.add(item[0])
+                if is_pdf(item[0]):
+                    yield item[0]
+            continue
+
+        if item in seen_dirs:
+            continue
+        seen_dirs.add(item)
+        try:
+            with os.scandir(item) as entries:
+                entries = sorted(entries, key=lambda entry: entry.name)
+        except OSError:
+            continue
+
+        subdirs = []
+        for entry in entries:
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            try:
+                if entry.is_dir():
+                    subdirs.append(_real_entry_path(item, entry))
+                elif entry.is_file():
+                    path = _real_entry_path(item, entry)
+                    if path not in seen_files:
+                        seen_files.add(path)
+                        if is_pdf(path):
+                            yield path
+            except OSError:
+                continue
+        stack.extend(reversed(subdirs))
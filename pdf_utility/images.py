@@ -0,0 +1,146 @@
+import zlib
+import struct
+from PyPDF2.generic import ArrayObject, IndirectObject, StreamObject
+from .compress import stream_filters
+
+try:
+    from PIL import Image
+except ImportError:
+    # CMYK images need Pillow to become PNGs, everything else is encoded without it
+    Image = None
+
+PASSTHROUGH_EXTENSIONS = {'/DCTDecode': '.jpg', '/JPXDecode': '.jp2'}
+PNG_COLOR_TYPES = {'gray': 0, 'rgb': 2, 'palette': 3}
+COMPONENTS = {'gray': 1, 'rgb': 3, 'palette': 1, 'cmyk': 4}
+COLOR_SPACES = {'/DeviceGray': 'gray', '/CalGray': 'gray', '/DeviceRGB': 'rgb', '/CalRGB': 'rgb', '/DeviceCMYK': 'cmyk'}
+
+
+def page_images(page, visited: set):
+    # yields (key, image stream) for every image drawn on the page, including those inside form xobjects;
+    # visited is shared across pages so an image used on many pages is exported once
+    todo = [page.get('/Resources')]
+    while todo:
+        resources = todo.pop()
+        resources = resources.get_object() if resources is not None else None
+        if not resources or '/XObject' not in resources:
+            continue
+        for reference in resources['/XObject'].get_object().values():
+            if not isinstance(reference, IndirectObject):
+                continue
+            key = (reference.idnum, reference.generation)
+            if key in visited:
+                continue
+            visited.add(key)
+            xobject = reference.get_object()
+            if not isinstance(xobject, StreamObject):
+                continue
+            if xobject.get('/Subtype') == '/Image':
+                yield key, xobject
+            elif xobject.get('/Subtype') == '/Form':
+                todo.append(xobject.get('/Resources'))
+
+
+def _color_space(image: StreamObject):
+    if image.get('/ImageMask'):
+        return 'gray', None
+    color_space = image.get('/ColorSpace')
+    color_space = color_space.get_object() if color_space is not None else None
+    if isinstance(color_space, ArrayObject):
+        family = color_space[0]
+        if family == '/ICCBased':
+            return {1: 'gray', 3: 'rgb', 4: 'cmyk'}.get(color_space[1].get_object().get('/N')), None
+        if family == '/Indexed':
+            base = color_space[1].get_object()
+            if isinstance(base, ArrayObject) and base[0] == '/ICCBased':
+                base = '/DeviceRGB' if base[1].get_object().get('/N') == 3 else None
+            if base != '/DeviceRGB':
+                return None, None
+            lookup = color_space[3].get_object()
+            if isinstance(lookup, StreamObject):
+                lookup = lookup.get_data()
+            elif isinstance(lookup, str):
+                lookup = lookup.get_original_bytes()
+            return 'palette', bytes(lookup[:3 * (int(color_space[2]) + 1)])
+        return COLOR_SPACES.get(family), None
+    return COLOR_SPACES.get(color_space), None
+
+
+def image_job(image: StreamObject):
+    # a picklable description of a Flate or unfiltered image, or None when it can't become a PNG
+    filters = stream_filters(image)
+    if filters not in (['/FlateDecode'], []):
+        return None
+    color, palette = _color_space(image)
+    bits = 1 if image.get('/ImageMask') else image.get('/BitsPerComponent', 8)
+    if color is None or (color in ('rgb', 'cmyk') and bits not in (8, 16)):
+        return None
+
+    width, height = image['/Width'], image['/Height']
+    decode_parms = image.get('/DecodeParms')
+    decode_parms = decode_parms.get_object() if decode_parms is not None else {}
+    if isinstance(decode_parms, ArrayObject):
+        decode_parms = decode_parms[0].get_object() if decode_parms else {}
+    predictor = decode_parms.get('/Predictor', 1)
+    # PNG predicted Flate data is already a valid IDAT when its row layout matches the image
+    png_rows = (predictor >= 10 and color != 'cmyk' and decode_parms.get('/Colors', 1) == COMPONENTS[color]
+                and decode_parms.get('/BitsPerComponent', 8) == bits and decode_parms.get('/Columns', 1) == width)
+    if predictor != 1 and not png_rows:
+        return None
+
+    return {
+        'data': image._data,
+        'flate': bool(filters),
+        'png_rows': png_rows,
+        'width': width,
+        'height': height,
+        'bits': bits,
+        'color': color,
+        'palette': palette,
+    }
+
+
+def _png_chunk(kind: bytes, data: bytes):
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+
+def _raw_samples(job: dict):
+    return zlib.decompress(job['data']) if job['flate'] else job['data']
+
+
+def encode_png(job: dict):
+    if job['color'] == 'cmyk':
+        if Image is None or job['bits'] != 8:
+            raise ValueError('CMYK images need Pillow')
+        image = Image.frombytes('CMYK', (job['width'], job['height']), _raw_samples(job)).convert('RGB')
+        job = {**job, 'data': image.tobytes(), 'flate': False, 'png_rows': False, 'color': 'rgb'}
+
+    if job['png_rows']:
+        idat = job['data']
+    else:
+        raw = memoryview(_raw_samples(job))
+        row_bytes = (job['width'] * COMPONENTS[job['color']] * job['bits'] + 7) // 8
+        rows = bytearray()
+        for row in range(job['height']):
+            rows += b'\x00'
+            rows += raw[row * row_bytes:(row + 1) * row_bytes]
+        idat = zlib.compress(rows, 6)
+
+    header = struct.pack('>IIBBBBB', job['width'], job['height'], job['bits'], PNG_COLOR_TYPES[job['color']], 0, 0, 0)
+    chunks = [_png_chunk(b'IHDR', header)]
+    if job['palette']:
+        chunks.append(_png_chunk(b'PLTE', job['palette']))
+    chunks.append(_png_chunk(b'IDAT', idat))
+    chunks.append(_png_chunk(b'IEND', b''))
+    return b'\x89PNG\r\n\x1a\n' + b''.join(chunks)
+
+
+def write_png(job: dict, output_file: str):
+    data = encode_png(job)
+    with open(output_file, 'wb') as output:
+        output.write(data)
+    return output_file
+
+
+def passthrough_extension(image: StreamObject):
+    filters = stream_filters(image)
+    return PASSTHROUGH_EXTENSIONS.get(filters[0]) if len(filters) == 1 else None
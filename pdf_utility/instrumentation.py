@@ -0,0 +1,160 @@
+import os
+import json
+import time
+import threading
+from typing import Callable
+
+# an event is a plain dict so it can cross process boundaries and be written as JSON as it is:
+# operation, file, stage (one of STAGES), pages_done, pages_total,
+# bytes_written, elapsed_ns since the operation started and stage_ns spent since the previous event
+STAGES = ('open', 'input', 'page', 'encrypt', 'decrypt', 'serialize', 'write', 'done')
+
+
+class Trace:
+    def __init__(self, observer: Callable, operation: str, pdf_file: str = None):
+        self.observer = observer
+        self.operation = operation
+        self.file = pdf_file
+        self.output = None
+        self.pages_done = 0
+        self.pages_total = None
+        self.bytes_written = 0
+        self.start = self.last = time.perf_counter_ns()
+
+    def track(self, output):
+        # bytes_written is read from this stream's position on every event
+        self.output = output
+        return output
+
+    def event(self, stage: str, pages_done: int = None, pages_total: int = None, bytes_written: int = None,
+              stage_ns: int = None):
+        now = time.perf_counter_ns()
+        if pages_done is not None:
+            self.pages_done = pages_done
+        if pages_total is not None:
+            self.pages_total = pages_total
+        if bytes_written is not None:
+            self.bytes_written = bytes_written
+        elif self.output is not None and not self.output.closed:
+            self.bytes_written = self.output.tell()
+
+        if self.observer is not None:
+            self.observer({
+                'operation': self.operation,
+                'file': self.file,
+                'stage': stage,
+                'pages_done': self.pages_done,
+                'pages_total': self.pages_total,
+                'bytes_written': self.bytes_written,
+                'elapsed_ns': now - self.start,
+                'stage_ns': now - self.last if stage_ns is None else stage_ns,
+            })
+        self.last = now
+
+    def progress(self, progress_callback: Callable = None):
+        # a progress callback that also turns page and input progress into events
+        if self.observer is None:
+            return progress_callback
+
+        def callback(stage: str, done: int, total: int):
+            if progress_callback is not None:
+                progress_callback(stage, done, total)
+            if stage == 'input':
+                self.event('input')
+            else:
+                self.event('page', done, total)
+        return callback
+
+
+class CountingWriter:
+    # wraps an output file so time spent in the OS write calls can be told apart from PyPDF2's serialization
+    def __init__(self, stream):
+        self.stream = stream
+        self.bytes_written = 0
+        self.write_ns = 0
+
+    @property
+    def closed(self):
+        return self.stream.closed
+
+    def write(self, data):
+        start = time.perf_counter_ns()
+        written = self.stream.write(data)
+        self.write_ns += time.perf_counter_ns() - start
+        self.bytes_written += len(data)
+        return written
+
+    def tell(self):
+        return self.stream.tell()
+
+    def flush(self):
+        self.stream.flush()
+
+
+def write_traced(trace: Trace, pdf_writer, output):
+    # PyPDF2 serializes straight into the file, so one write call is split into two events afterwards
+    counting = CountingWriter(output)
+    start = time.perf_counter_ns()
+    pdf_writer.write(counting)
+    total_ns = time.perf_counter_ns() - start
+    trace.event('serialize', bytes_written=counting.bytes_written, stage_ns=total_ns - counting.write_ns)
+    trace.event('write', bytes_written=counting.bytes_written, stage_ns=counting.write_ns)
+
+
+class JsonLinesTraceSink:
+    # appends one JSON object per event; safe to share between processes since each line is a single write
+    def __init__(self, trace_file: str):
+        self.trace_file = trace_file
+        self.lock = threading.Lock()
+        self.file = None
+
+    def __call__(self, event: dict):
+        line = json.dumps({'pid': os.getpid(), 'time': time.time(), **event}) + '\n'
+        with self.lock:
+            if self.file is None:
+                self.file = open(self.trace_file, 'a', encoding='utf-8', buffering=1)
+            self.file.write(line)
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+
+class ThrottledObserver:
+    # page events arrive for every page; forward at most one per interval, plus the last one
+    def __init__(self, observer: Callable, interval: float = 0.1):
+        self.observer = observer
+        self.interval_ns = int(interval * 1e9)
+        self.last_page = 0
+
+    def __call__(self, event: dict):
+        if event['stage'] == 'page' and event['pages_done'] != event['pages_total']:
+            now = time.perf_counter_ns()
+            if now - self.last_page < self.interval_ns:
+                return
+            self.last_page = now
+        self.observer(event)
+
+
+def combine_observers(*observers: Callable):
+    observers = [observer for observer in observers if observer is not None]
+    if len(observers) < 2:
+        return observers[0] if observers else None
+
+    def observer(event: dict):
+        for each in observers:
+            each(event)
+    return observer
+
+
+def describe_event(event: dict):
+    # one line for a status bar, e.g. 'merge_pdfs a.pdf: page 120/400, 1.2 MB written, 0.84 s'
+    name = os.path.basename(event['file']) if event['file'] else ''
+    if event['stage'] == 'page' and event['pages_total']:
+        stage = f"page {event['pages_done']}/{event['pages_total']}"
+    else:
+        stage = event['stage']
+    return (f"{event['operation']} {name}: {stage}, {event['bytes_written'] / 1e6:.1f} MB written, "
+            f"{event['elapsed_ns'] / 1e9:.2f} s")
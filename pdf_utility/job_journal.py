@@ -0,0 +1,187 @@
+import os
+import hmac
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from typing import List
+from .pdf_utility import run_pdf_job
+
+DEFAULT_JOURNAL_PATH = os.path.join(os.path.expanduser('~'), '.pdf_utility', 'jobs.sqlite3')
+# scrypt cost of a parameter digest, about 50 ms and 16 MB per derivation
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+
+
+def file_digest(path: str, chunk_size: int = 1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _stat(path: str):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class JobJournal:
+    # one row per (operation, input, output); a job counts as done while its input still has the recorded
+    # content and its output still has the recorded size and mtime, so re-running a batch only stats files
+    def __init__(self, db_path: str = DEFAULT_JOURNAL_PATH):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        if db_path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        # process pool workers write to the same file, WAL lets them do so while the GUI reads
+        self.connection = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.execute('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                operation TEXT NOT NULL,
+                input TEXT NOT NULL,
+                output TEXT NOT NULL,
+                batch TEXT,
+                params TEXT NOT NULL,
+                input_size INTEGER,
+                input_mtime INTEGER,
+                input_hash TEXT,
+                output_size INTEGER,
+                output_mtime INTEGER,
+                status TEXT NOT NULL,
+                error TEXT,
+                updated REAL NOT NULL,
+                PRIMARY KEY (operation, input, output)
+            )
+        ''')
+        self.connection.commit()
+        self._digests = {}
+
+    def params_record(self, params: dict, salt: bytes = None):
+        # 'salt$digest'. Parameters include passwords, so they are stretched with scrypt and a random salt.
+        # A batch shares one salt (its jobs share the password anyway), derivations are remembered per
+        # salt, so checking a batch costs one derivation rather than one per file
+        salt = salt or os.urandom(16)
+        data = json.dumps(params, sort_keys=True, default=str).encode('utf-8')
+        digest = self._digests.get((salt, data))
+        if digest is None:
+            if len(self._digests) >= 64:
+                self._digests.clear()
+            digest = hashlib.scrypt(data, salt=salt, n=SCRYPT_N, r=SCRYPT_R, p=1, dklen=16)
+            self._digests[(salt, data)] = digest
+        return f'{salt.hex()}${digest.hex()}'
+
+    def params_match(self, record: str, params: dict):
+        salt, separator, _ = (record or '').partition('$')
+        if not separator:
+            return False
+        try:
+            salt = bytes.fromhex(salt)
+        except ValueError:
+            return False
+        return hmac.compare_digest(record, self.params_record(params, salt))
+
+    def _key(self, operation: str, pdf_file: str, output_file: str):
+        return operation, os.path.realpath(pdf_file), os.path.realpath(output_file)
+
+    def is_done(self, operation: str, pdf_file: str, output_file: str, params: dict, verify_hash: bool = True):
+        # without verify_hash an input whose size or mtime changed counts as not done, which keeps the check
+        # to two stat calls; with it the input is hashed and a file that was only touched is still recognized
+        key = self._key(operation, pdf_file, output_file)
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT params, input_size, input_mtime, input_hash, output_size, output_mtime, status FROM jobs '
+                'WHERE operation = ? AND input = ? AND output = ?', key).fetchone()
+        if row is None or row[6] != 'done':
+            return False
+        if _stat(key[2]) != (row[4], row[5]) or not self.params_match(row[0], params):
+            return False
+
+        input_stat = _stat(key[1])
+        if input_stat is None:
+            return False
+        if input_stat == (row[1], row[2]):
+            return True
+        if not verify_hash or file_digest(key[1]) != row[3]:
+            return False
+        with self.lock:
+            self.connection.execute('UPDATE jobs SET input_size = ?, input_mtime = ? '
+                                    'WHERE operation = ? AND input = ? AND output = ?', (*input_stat, *key))
+            self.connection.commit()
+        return True
+
+    def add_pending(self, batch: str, operation: str, jobs: List[tuple], params: dict):
+        # jobs is a list of (pdf_file, output_file); written in one transaction before anything is submitted,
+        # so a batch that dies halfway can be listed again with unfinished()
+        record = self.params_record(params)
+        now = time.time()
+        rows = [(*self._key(operation, pdf_file, output_file), batch, record, now) for pdf_file, output_file in jobs]
+        with self.lock:
+            self.connection.executemany('''
+                INSERT INTO jobs (operation, input, output, batch, params, status, updated)
+                VALUES (?, ?, ?, ?, ?, 'pending', ?)
+                ON CONFLICT (operation, input, output)
+                DO UPDATE SET batch = excluded.batch, params = excluded.params, status = 'pending', error = NULL,
+                              updated = excluded.updated
+            ''', rows)
+            self.connection.commit()
+
+    def finish(self, batch: str, operation: str, pdf_file: str, output_file: str, params: dict, input_stat: tuple,
+               input_hash: str, error: str = None):
+        key = self._key(operation, pdf_file, output_file)
+        output_stat = (None, None) if error else _stat(key[2]) or (None, None)
+        with self.lock:
+            row = self.connection.execute('SELECT params FROM jobs WHERE operation = ? AND input = ? AND output = ?',
+                                          key).fetchone()
+        # keep the batch's salt from add_pending
+        record = row[0] if row is not None and self.params_match(row[0], params) else self.params_record(params)
+        with self.lock:
+            self.connection.execute('INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', (
+                *key, batch, record, *input_stat, input_hash, *output_stat,
+                'failed' if error else 'done', error, time.time()))
+            self.connection.commit()
+
+    def unfinished(self, operation: str):
+        # inputs of the most recent batch of this operation that are pending or failed
+        with self.lock:
+            row = self.connection.execute('SELECT batch FROM jobs WHERE operation = ? ORDER BY updated DESC LIMIT 1',
+                                          (operation,)).fetchone()
+            if row is None:
+                return []
+            return [input_file for input_file, in self.connection.execute(
+                "SELECT input FROM jobs WHERE operation = ? AND batch = ? AND status != 'done' ORDER BY input",
+                (operation, row[0]))]
+
+
+_journals = {}
+
+
+def job_journal(db_path: str = DEFAULT_JOURNAL_PATH):
+    # one connection per journal file and process
+    if db_path not in _journals:
+        _journals[db_path] = JobJournal(db_path)
+    return _journals[db_path]
+
+
+def run_journaled_job(journal_file: str, batch: str, operation: str, pdf_file: str, output_file: str, **params):
+    # picklable entry point for process pool workers: skips the job if the journal shows it done,
+    # otherwise runs it and records the outcome
+    journal = job_journal(journal_file)
+    if journal.is_done(operation, pdf_file, output_file, params):
+        return True
+
+    input_stat = _stat(pdf_file)
+    input_hash = file_digest(pdf_file) if input_stat is not None else None
+    try:
+        result = run_pdf_job(operation, pdf_file=pdf_file, output_file=output_file, **params)
+    except Exception as e:
+        journal.finish(batch, operation, pdf_file, output_file, params, input_stat or (None, None), input_hash, str(e))
+        raise
+    journal.finish(batch, operation, pdf_file, output_file, params, input_stat, input_hash)
+    return result
@@ -0,0 +1,34 @@
+import os
+import mmap
+from contextlib import contextmanager
+from PyPDF2 import PdfMerger
+
+
+def map_pdf(pdf_file: str):
+    # PdfReader seeks to every object through the xref; on a mapped file a seek only moves an offset and a read
+    # is one copy out of the page cache, instead of lseek/read system calls through an 8 KiB buffer.
+    # The descriptor is closed right away, the mapping stays valid until it is closed itself
+    with open(pdf_file, 'rb') as file:
+        try:
+            return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            # empty files and special files can't be mapped, PyPDF2 then reports them as it would anyway
+            pass
+    return open(pdf_file, 'rb')
+
+
+@contextmanager
+def open_pdf(pdf_file: str):
+    stream = map_pdf(pdf_file)
+    try:
+        yield stream
+    finally:
+        stream.close()
+
+
+class MappedPdfMerger(PdfMerger):
+    # PdfMerger opens path inputs with an unbuffered FileIO, so every byte its parser reads is a system call
+    def _create_stream(self, fileobj):
+        if isinstance(fileobj, (str, os.PathLike)):
+            return map_pdf(fileobj), None
+        return super()._create_stream(fileobj)
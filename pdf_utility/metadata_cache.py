@@ -0,0 +1,105 @@
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from PyPDF2 import PdfReader
+from .mapped_input import open_pdf
+
+DEFAULT_DB_PATH = os.path.join(os.path.expanduser('~'), '.pdf_utility', 'metadata.sqlite3')
+
+
+def read_metadata(pdf_file: str):
+    with open_pdf(pdf_file) as file:
+        pdf_reader = PdfReader(file)
+        encrypted = pdf_reader.is_encrypted
+        page_count = None
+        # encrypted files only expose their page tree once decrypted, most have an empty user password
+        if not encrypted or pdf_reader.decrypt(''):
+            page_count = len(pdf_reader.pages)
+        return {
+            'page_count': page_count,
+            'encrypted': encrypted,
+            'pdf_version': pdf_reader.pdf_header.replace('%PDF-', ''),
+        }
+
+
+class MetadataCache:
+    # entries are keyed by (path, size, mtime) so a file that changes on disk is read again
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        if db_path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        self.connection.execute('''
+            CREATE TABLE IF NOT EXISTS metadata (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime INTEGER NOT NULL,
+                page_count INTEGER,
+                encrypted INTEGER NOT NULL,
+                pdf_version TEXT
+            )
+        ''')
+        self.connection.commit()
+
+    def _key(self, pdf_file: str):
+        path = os.path.realpath(pdf_file)
+        stat = os.stat(path)
+        return path, stat.st_size, stat.st_mtime_ns
+
+    def peek(self, pdf_file: str):
+        # cached metadata or None, never parses the file
+        try:
+            key = self._key(pdf_file)
+        except OSError:
+            return None
+        with self.lock:
+            return self._lookup(key)
+
+    def get(self, pdf_file: str):
+        key = self._key(pdf_file)
+        with self.lock:
+            metadata = self._lookup(key)
+        if metadata is not None:
+            return metadata
+
+        metadata = read_metadata(key[0])
+        with self.lock:
+            self._remember(key, metadata)
+            self.connection.execute(
+                'INSERT OR REPLACE INTO metadata VALUES (?, ?, ?, ?, ?, ?)',
+                (*key, metadata['page_count'], int(metadata['encrypted']), metadata['pdf_version']))
+            self.connection.commit()
+        return metadata
+
+    def _lookup(self, key: tuple):
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+        row = self.connection.execute(
+            'SELECT page_count, encrypted, pdf_version FROM metadata WHERE path = ? AND size = ? AND mtime = ?',
+            key).fetchone()
+        if row is None:
+            return None
+        metadata = {'page_count': row[0], 'encrypted': bool(row[1]), 'pdf_version': row[2]}
+        self._remember(key, metadata)
+        return metadata
+
+    def _remember(self, key: tuple, metadata: dict):
+        self.entries[key] = metadata
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+
+_default_cache = None
+
+
+def default_metadata_cache():
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = MetadataCache()
+    return _default_cache
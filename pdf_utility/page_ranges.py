@@ -0,0 +1,60 @@
+from typing import Dict, List, Tuple
+
+
+def parse_page_ranges(page_spec: str, page_count: int = None) -> List[Tuple[int, int]]:
+    # '2-5, 9, 12-16' -> [(2, 5), (9, 9), (12, 16)], 1-based and inclusive; repeated ranges are kept once
+    plan = []
+    seen = set()
+    for page_range in page_spec.split(','):
+        page_range = page_range.strip()
+        if not page_range:
+            continue
+        try:
+            if '-' in page_range:
+                start, end = (int(part) for part in page_range.split('-', 1))
+            else:
+                start = end = int(page_range)
+        except ValueError:
+            raise ValueError(f'Invalid page range: {page_range}')
+
+        if start < 1:
+            raise ValueError(f'Invalid page range: {page_range}. Page numbers start at 1.')
+        if start > end:
+            raise ValueError(f'Invalid range: {start}-{end}. Start page must be smaller than end page.')
+        if page_count is not None and end > page_count:
+            raise ValueError(f'Page {end} is out of range, the document has {page_count} pages')
+        if (start, end) not in seen:
+            seen.add((start, end))
+            plan.append((start, end))
+
+    if not plan:
+        raise ValueError('No pages selected')
+    return plan
+
+
+def range_label(start: int, end: int):
+    return f'page{start}' if start == end else f'pages{start}-{end}'
+
+
+def parse_rotation_plan(plan: str, page_count: int = None, angle: int = 90) -> Dict[int, int]:
+    # '1-3:90, 5:180, 8' -> {1: 90, 2: 90, 3: 90, 5: 180, 8: angle}, 1-based; a page named twice keeps the last angle
+    rotations = {}
+    for entry in plan.split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        page_range, _, entry_angle = entry.partition(':')
+        try:
+            entry_angle = int(entry_angle) if entry_angle.strip() else angle
+        except ValueError:
+            raise ValueError(f'Invalid rotation: {entry}')
+        if entry_angle % 90:
+            raise ValueError(f'Invalid rotation: {entry_angle}. Rotation must be a multiple of 90.')
+
+        for start, end in parse_page_ranges(page_range, page_count):
+            for page in range(start, end + 1):
+                rotations[page] = entry_angle
+
+    if not rotations:
+        raise ValueError('No pages selected')
+    return rotations
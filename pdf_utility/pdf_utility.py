@@ -1,113 +1,752 @@
 import os
-from typing import List
-from PyPDF2 import PdfMerger, PdfReader, PdfWriter
+import gc
+import json
+import math
+import shutil
+import tempfile
+import multiprocessing
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from threading import Event
+from typing import Callable, List
+from PyPDF2 import PasswordType, PdfReader, PdfWriter
+from PyPDF2.generic import IndirectObject, TextStringObject
+from .chunk_plan import plan_chunks
+from .compress import STREAM_CLASSES, collect_streams, recompress_stream, replacement_stream
+from .errors import InvalidPasswordError, OperationCancelled
+from .instrumentation import JsonLinesTraceSink, ThrottledObserver, Trace, combine_observers, write_traced
+from .mapped_input import MappedPdfMerger, map_pdf, open_pdf
+from .images import image_job, page_images, passthrough_extension, write_png
+from .watermark import Watermark
+from .page_ranges import parse_page_ranges, parse_rotation_plan, range_label
+from .stream_writer import IncrementalPdfWriter, StreamingPdfWriter, has_classic_xref, page_count, select_pages
+from .text_output import TEXT_WRITERS
+
+_worker_reader = None
+_job_observer = None
+
+MERGE_MANIFEST_KEY = '/PDFUtilityInputs'
+# the umask can only be read by setting it, so it is done once at import rather than from worker threads
+_UMASK = os.umask(0o022)
+os.umask(_UMASK)
+# pages per text extraction job, small enough that the output keeps up with the slowest worker
+TEXT_CHUNK_PAGES = 16
+# below this many pages starting worker processes costs more than it saves, the work runs in process
+PARALLEL_MIN_PAGES = 64
+# the same for compress, whose work is in the stream bytes: a few scanned pages can hold hundreds of MB
+PARALLEL_MIN_STREAM_BYTES = 4 * 1024 * 1024
+
+def _check_cancelled(cancel_event: Event = None):
+    if cancel_event is not None and cancel_event.is_set():
+        raise OperationCancelled('Operation cancelled')
+
+def _report_progress(progress_callback: Callable, stage: str, done: int, total: int):
+    if progress_callback is not None:
+        progress_callback(stage, done, total)
+
+def _remove_files(file_paths: List[str]):
+    for file_path in file_paths:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+def _replace_file(temp_file: str, output_file: str):
+    # NamedTemporaryFile creates files only the owner can read: a replaced file keeps its mode, a new one
+    # gets the mode open() would have given it
+    if os.path.exists(output_file):
+        shutil.copymode(output_file, temp_file)
+    else:
+        os.chmod(temp_file, 0o666 & ~_UMASK)
+    os.replace(temp_file, output_file)
+
+def _cached_metadata(metadata_cache, pdf_file: str):
+    # what the metadata cache knows about the file; peek() only answers while the path, size and mtime
+    # still match, and never parses, so a miss costs a stat
+    metadata = metadata_cache.peek(pdf_file) if metadata_cache is not None else None
+    return metadata or {}
+
+def _page_total(pdf_reader: PdfReader, metadata: dict):
+    # page count from the cache, the root's /Count otherwise; neither flattens the page tree
+    return metadata.get('page_count') or page_count(pdf_reader)
+
+def _check_not_encrypted(metadata: dict, pdf_reader: PdfReader = None):
+    if metadata.get('encrypted') or (pdf_reader is not None and pdf_reader.is_encrypted):
+        raise Exception('PDF file is encrypted, decrypt it first')
+
+def _selected_pages(pdf_reader: PdfReader, pdf_file: str, page_spec: str = None, total: int = None):
+    if not page_spec:
+        return None
+    try:
+        plan = parse_page_ranges(page_spec, total or page_count(pdf_reader))
+    except ValueError as e:
+        raise ValueError(f'{pdf_file}: {e}')
+    return [page - 1 for start, end in plan for page in range(start, end + 1)]
+
+def _stream_inputs(pdf_writer: StreamingPdfWriter, pdf_files: List[str], progress_callback: Callable = None,
+                   cancel_event: Event = None, trace: Trace = None, page_ranges: List[str] = None,
+                   metadata_cache=None):
+    for index, pdf_file in enumerate(pdf_files):
+        _check_cancelled(cancel_event)
+        with open_pdf(pdf_file) as file:
+            pdf_reader = PdfReader(file)
+            total = _page_total(pdf_reader, _cached_metadata(metadata_cache, pdf_file))
+            # with a page spec only the selected pages, and the objects they reach, are read from the input
+            pages = _selected_pages(pdf_reader, pdf_file, page_ranges[index] if page_ranges else None, total)
+            if trace is not None:
+                trace.event('open', 0, len(pages) if pages is not None else total)
+            pdf_writer.add_pages(pdf_reader, pages, progress_callback=progress_callback, cancel_event=cancel_event)
+        # readers hold reference cycles, collect them now so peak memory stays at one document; a few
+        # selected pages are left to the regular collector, a full collection per input would dominate
+        if pages is None:
+            gc.collect()
+        _report_progress(progress_callback, 'input', index + 1, len(pdf_files))
+
+def _file_fingerprint(pdf_file: str):
+    stat = os.stat(pdf_file)
+    return [os.path.realpath(pdf_file), stat.st_size, stat.st_mtime_ns]
+
+def _read_merge_manifest(output_file: str):
+    if not os.path.exists(output_file):
+        return None
+    try:
+        with open_pdf(output_file) as file:
+            pdf_reader = PdfReader(file)
+            if pdf_reader.is_encrypted or not pdf_reader.metadata:
+                return None
+            manifest = pdf_reader.metadata.get(MERGE_MANIFEST_KEY)
+            return json.loads(manifest) if manifest else None
+    except Exception:
+        return None
+
+def _recompress_streams(jobs: List[dict], options: dict, workers: int = 1, progress_callback: Callable = None,
+                        cancel_event: Event = None):
+    if workers > 1 and len(jobs) > 1:
+        with process_pool(workers) as executor:
+            futures = [executor.submit(recompress_stream, job, **options) for job in jobs]
+            try:
+                for index, future in enumerate(as_completed(futures)):
+                    _check_cancelled(cancel_event)
+                    yield future.result()
+                    _report_progress(progress_callback, 'stream', index + 1, len(jobs))
+            finally:
+                for future in futures:
+                    future.cancel()
+    else:
+        for index, job in enumerate(jobs):
+            _check_cancelled(cancel_event)
+            yield recompress_stream(job, **options)
+            _report_progress(progress_callback, 'stream', index + 1, len(jobs))
+
+def _document_info(pdf_reader: PdfReader):
+    # only direct values can be carried into a rewritten file, references point into the old numbering
+    return {key: value for key, value in (pdf_reader.metadata or {}).items() if not isinstance(value, IndirectObject)}
+
+def _verify_password(pdf_reader: PdfReader, password: str):
+    if not pdf_reader.is_encrypted:
+        raise Exception('PDF file is not encrypted')
+    password_type = pdf_reader.decrypt(password)
+    if password_type == PasswordType.OWNER_PASSWORD:
+        return 'owner'
+    if password_type == PasswordType.USER_PASSWORD:
+        return 'user'
+    raise InvalidPasswordError('Incorrect password')
+
+def _page_output_file(output_dir: str, file_base_name: str, page: int):
+    return os.path.join(output_dir, f'{file_base_name}_page{page + 1}.pdf')
+
+def pool_context():
+    # forkserver (spawn where it is missing) rather than fork: callers can be threads of a multithreaded
+    # process such as the GUI, and a forked child inherits locks held by the other threads. Queues passed
+    # to the workers must come from the same context
+    start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return multiprocessing.get_context(start_method)
+
+def process_pool(workers: int, initializer: Callable = None, initargs: tuple = ()):
+    return ProcessPoolExecutor(max_workers=workers, mp_context=pool_context(), initializer=initializer,
+                               initargs=initargs)
+
+def _init_reader_worker(pdf_file: str):
+    # each worker parses the source once, the reader lives in the worker process only
+    global _worker_reader
+    _worker_reader = PdfReader(map_pdf(pdf_file))
+
+def _split_pages_worker(pages: List[int], output_dir: str, file_base_name: str):
+    return _write_single_pages(_worker_reader, pages, output_dir, file_base_name)
+
+def _write_single_pages(pdf_reader: PdfReader, pages: List[int], output_dir: str, file_base_name: str,
+                        progress_callback: Callable = None, cancel_event: Event = None, output_files: list = None):
+    # output_files receives every file as it is written, so a cancelled caller knows what to remove
+    output_files = [] if output_files is None else output_files
+    for page in pages:
+        _check_cancelled(cancel_event)
+        pdf_writer = PdfWriter()
+        pdf_writer.add_page(pdf_reader.pages[page])
+        output_file = _page_output_file(output_dir, file_base_name, page)
+        with open(output_file, 'wb') as output:
+            pdf_writer.write(output)
+        output_files.append(output_file)
+        _report_progress(progress_callback, 'page', len(output_files), len(pages))
+    return output_files
+
+def _extract_page_texts(pdf_reader: PdfReader, pages: List[int]):
+    cached = set(pdf_reader.resolved_objects)
+    texts = [select_pages(pdf_reader, [page])[0].extract_text() for page in pages]
+    # drop what the chunk loaded (page tree nodes, content streams, fonts), memory stays at one chunk
+    for key in set(pdf_reader.resolved_objects) - cached:
+        del pdf_reader.resolved_objects[key]
+    return texts
+
+def _extract_text_worker(pages: List[int]):
+    return _extract_page_texts(_worker_reader, pages)
+
+def _ordered_results(executor: ProcessPoolExecutor, function: Callable, jobs, window: int):
+    # results in submission order with at most window jobs in flight, finished jobs never pile up
+    # behind a slow one
+    pending = deque()
+    for job in jobs:
+        pending.append(executor.submit(function, job))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
 
 class PDFUtility:
-    def merge_pdfs(self, pdf_files: List[str] , output_file: str):
+    def __init__(self, observer: Callable = None, metadata_cache=None):
+        # observer receives instrumentation events (see instrumentation.Trace) from every operation;
+        # split, merge and compress take page counts and encryption state from metadata_cache (a
+        # metadata_cache.MetadataCache) for files it has seen unchanged
+        self.observer = observer
+        self.metadata_cache = metadata_cache
+
+    def merge_pdfs(self, pdf_files: List[str] , output_file: str, streaming: bool = False,
+                   progress_callback: Callable = None, cancel_event: Event = None, deduplicate: bool = False,
+                   append: bool = False, page_ranges: List[str] = None):
+        # page_ranges holds a page spec like '1-2, 5' per input, an empty one takes the whole file
         if not pdf_files:
             print('hit')
             raise FileNotFoundError('No PDF files found')
+        if page_ranges is not None and len(page_ranges) != len(pdf_files):
+            raise ValueError('page_ranges needs one entry per input')
+        if page_ranges is not None and not any(page_ranges):
+            page_ranges = None
         
+        trace = Trace(self.observer, 'merge_pdfs', output_file)
+        progress_callback = trace.progress(progress_callback)
         try:
-            # clear the merger object
-            with PdfMerger() as self.merger:
-                for pdf_file in pdf_files:
-                    self.merger.append(pdf_file)
+            # inputs the cache knows to be encrypted fail the merge before anything is written
+            for pdf_file in pdf_files:
+                if _cached_metadata(self.metadata_cache, pdf_file).get('encrypted'):
+                    raise Exception(f'{pdf_file} is encrypted, decrypt it first')
+            if append:
+                result = self._merge_pdfs_append(pdf_files, output_file, progress_callback, cancel_event, deduplicate,
+                                                 trace, page_ranges)
+            elif streaming or deduplicate or page_ranges:
+                # PdfMerger flattens every input's page tree, the streaming writer loads only the selected pages
+                result = self._merge_pdfs_streaming(pdf_files, output_file, progress_callback, cancel_event,
+                                                    deduplicate, trace, page_ranges)
+            else:
+                # clear the merger object
+                with MappedPdfMerger() as self.merger:
+                    for index, pdf_file in enumerate(pdf_files):
+                        _check_cancelled(cancel_event)
+                        self.merger.append(pdf_file)
+                        _report_progress(progress_callback, 'input', index + 1, len(pdf_files))
 
-                with open(output_file, 'wb') as output_file:
-                    self.merger.write(output_file)
-                return True
+                    _check_cancelled(cancel_event)
+                    with open(output_file, 'wb') as output:
+                        write_traced(trace, self.merger, output)
+                    result = True
+            trace.event('done')
+            return result
+        except OperationCancelled:
+            # in append mode the existing output is left untouched by the append path itself
+            if not append:
+                _remove_files([output_file])
+            raise
         except Exception as e:
             raise Exception(f'Error merging PDFs: {e}')
 
-    def split_pdf(self, pdf_file: str, output_dir: str, split_type: str = 'All', custom_pages: str = None):
+    def _merge_pdfs_streaming(self, pdf_files: List[str], output_file: str, progress_callback: Callable = None,
+                              cancel_event: Event = None, deduplicate: bool = False, trace: Trace = None,
+                              page_ranges: List[str] = None):
+        with StreamingPdfWriter(output_file, deduplicate) as pdf_writer:
+            if trace is not None:
+                trace.track(pdf_writer.stream)
+            _stream_inputs(pdf_writer, pdf_files, progress_callback, cancel_event, trace, page_ranges,
+                           self.metadata_cache)
+        if trace is not None:
+            trace.event('write', bytes_written=os.path.getsize(output_file))
+        if deduplicate:
+            return {'bytes_saved': pdf_writer.bytes_saved, 'objects_deduplicated': pdf_writer.objects_deduplicated}
+        return True
+
+    def _merge_pdfs_append(self, pdf_files: List[str], output_file: str, progress_callback: Callable = None,
+                           cancel_event: Event = None, deduplicate: bool = False, trace: Trace = None,
+                           page_ranges: List[str] = None):
+        # the output records which inputs (path, size, mtime and page spec, if any) it was built from; when
+        # they are a prefix of pdf_files only the remaining inputs are appended as an incremental update
+        fingerprints = [_file_fingerprint(pdf_file) for pdf_file in pdf_files]
+        if page_ranges is not None:
+            for fingerprint, page_spec in zip(fingerprints, page_ranges):
+                if page_spec:
+                    fingerprint.append(page_spec)
+        info = {MERGE_MANIFEST_KEY: TextStringObject(json.dumps(fingerprints))}
+        recorded = _read_merge_manifest(output_file)
+
+        if recorded == fingerprints:
+            return {'mode': 'unchanged', 'appended_inputs': 0}
+
+        if recorded and fingerprints[:len(recorded)] == recorded:
+            try:
+                with IncrementalPdfWriter(output_file, deduplicate, info) as pdf_writer:
+                    _stream_inputs(pdf_writer, pdf_files[len(recorded):], progress_callback, cancel_event, trace,
+                                   page_ranges[len(recorded):] if page_ranges is not None else None,
+                                   self.metadata_cache)
+                return {'mode': 'incremental', 'appended_inputs': len(pdf_files) - len(recorded)}
+            except ValueError:
+                # encrypted or cross-reference stream outputs cannot be appended to, rebuild them instead
+                pass
+
+        # rebuild into a temp file so the previous output survives a failure or cancellation
+        temp_file = None
+        try:
+            with tempfile.NamedTemporaryFile('wb', dir=os.path.dirname(os.path.abspath(output_file)),
+                                             suffix='.pdf', delete=False) as temp:
+                temp_file = temp.name
+            with StreamingPdfWriter(temp_file, deduplicate, info) as pdf_writer:
+                _stream_inputs(pdf_writer, pdf_files, progress_callback, cancel_event, trace, page_ranges,
+                               self.metadata_cache)
+            _replace_file(temp_file, output_file)
+        except BaseException:
+            _remove_files([temp_file])
+            raise
+        return {'mode': 'rewrite', 'appended_inputs': len(pdf_files)}
+
+    def split_pdf(self, pdf_file: str, output_dir: str, split_type: str = 'All', custom_pages: str = None,
+                  workers: int = 1, progress_callback: Callable = None, cancel_event: Event = None,
+                  max_bytes: int = None, max_pages: int = None):
         if not pdf_file:
             raise FileNotFoundError('No PDF file found')
         
+        output_files = []
+        trace = Trace(self.observer, 'split_pdf', pdf_file)
+        progress_callback = trace.progress(progress_callback)
         try:
-            with open(pdf_file, 'rb') as file:
+            metadata = _cached_metadata(self.metadata_cache, pdf_file)
+            _check_not_encrypted(metadata)
+            with open_pdf(pdf_file) as file:
                 pdf_reader = PdfReader(file)
+                total = _page_total(pdf_reader, metadata)
+                trace.event('open', 0, total)
                 file_base_name = os.path.splitext(os.path.basename(pdf_file))[0]
 
-                if split_type == 'All':
-                    for page in range(len(pdf_reader.pages)):
-                        pdf_writer = PdfWriter()
-                        pdf_writer.add_page(pdf_reader.pages[page])
-                        output_file = os.path.join(output_dir, f'{file_base_name}_page{page + 1}.pdf')
-                        with open(output_file, 'wb') as output:
-                            pdf_writer.write(output)
-
-                elif split_type == 'Even':
-                    for page in range(1, len(pdf_reader.pages), 2):
-                        pdf_writer = PdfWriter()
-                        pdf_writer.add_page(pdf_reader.pages[page])
-                        output_file = os.path.join(output_dir, f'{file_base_name}_page{page + 1}.pdf')
-                        with open(output_file, 'wb') as output:
-                            pdf_writer.write(output)
-
-                elif split_type == 'Odd':
-                    for page in range(0, len(pdf_reader.pages), 2):
-                        pdf_writer = PdfWriter()
-                        pdf_writer.add_page(pdf_reader.pages[page])
-                        output_file = os.path.join(output_dir, f'{file_base_name}_page{page + 1}.pdf')
-                        with open(output_file, 'wb') as output:
-                            pdf_writer.write(output)
-
-                elif split_type == 'Custom':
-                    pages = custom_pages.split(',')
-                    for page_range in pages:
-                        pdf_writer = PdfWriter()
-                        if '-' in page_range:
-                            start, end = map(int, page_range.split('-'))
-                            for page in range(start, end + 1):
-                                pdf_writer.add_page(pdf_reader.pages[page - 1])
-                            output_file = os.path.join(output_dir, f'{file_base_name}_pages{start}-{end}.pdf')
-                        else:
-                            page = int(page_range)
-                            pdf_writer.add_page(pdf_reader.pages[page - 1])
-                            output_file = os.path.join(output_dir, f'{file_base_name}_page{page}.pdf')
-                        
-                        with open(output_file, 'wb') as output:
-                            pdf_writer.write(output)
-                return True
+                if split_type in ('All', 'Even', 'Odd'):
+                    start = {'All': 0, 'Even': 1, 'Odd': 0}[split_type]
+                    step = 1 if split_type == 'All' else 2
+                    pages = list(range(start, total, step))
+                    # only files this run has written go into output_files, a cancelled split removes them and
+                    # leaves files of the same name from earlier runs alone
+                    if workers > 1 and len(pages) >= PARALLEL_MIN_PAGES:
+                        self._split_pages_parallel(pdf_file, pages, output_dir, file_base_name, workers,
+                                                   progress_callback, cancel_event, output_files)
+                    else:
+                        _write_single_pages(pdf_reader, pages, output_dir, file_base_name, progress_callback,
+                                            cancel_event, output_files)
+
+                elif split_type in ('Custom', 'Chunks'):
+                    # the plan is made once; each range streams into its own writer so objects shared
+                    # by its pages (fonts, images) are copied once per output, straight from the reader cache.
+                    # Chunks are consecutive ranges under max_bytes and/or max_pages, cut where the estimated
+                    # size of the next page would go over, without writing candidate chunks
+                    if split_type == 'Custom':
+                        plan = parse_page_ranges(custom_pages, total)
+                    else:
+                        plan = plan_chunks(pdf_reader, max_bytes, max_pages)
+                    for start, end in plan:
+                        _check_cancelled(cancel_event)
+                        output_file = os.path.join(output_dir, f'{file_base_name}_{range_label(start, end)}.pdf')
+                        output_files.append(output_file)
+                        with StreamingPdfWriter(output_file) as pdf_writer:
+                            pdf_writer.add_pages(pdf_reader, range(start - 1, end))
+                        _report_progress(progress_callback, 'page', len(output_files), len(plan))
+
+            trace.event('write', bytes_written=sum(os.path.getsize(output_file) for output_file in output_files))
+            trace.event('done')
+            return output_files
+        except OperationCancelled:
+            _remove_files(output_files)
+            raise
         except Exception as e:
             raise Exception(f'Error splitting PDF: {e}')
+
+    def _split_pages_parallel(self, pdf_file: str, pages: List[int], output_dir: str, file_base_name: str,
+                              workers: int, progress_callback: Callable = None, cancel_event: Event = None,
+                              output_files: list = None):
+        # every worker parses the source once in the initializer
+        output_files = [] if output_files is None else output_files
+        chunk_size = math.ceil(len(pages) / (workers * 4))
+        chunks = [pages[i:i + chunk_size] for i in range(0, len(pages), chunk_size)]
+        with process_pool(workers, _init_reader_worker, (pdf_file,)) as executor:
+            futures = [executor.submit(_split_pages_worker, chunk, output_dir, file_base_name) for chunk in chunks]
+            try:
+                for future in futures:
+                    output_files.extend(future.result())
+                    _report_progress(progress_callback, 'page', len(output_files), len(pages))
+                    _check_cancelled(cancel_event)
+            except OperationCancelled:
+                executor.shutdown(wait=True, cancel_futures=True)
+                # chunks that were already running complete, their files are written by this run too
+                output_files[:] = [output_file for future in futures
+                                   if not future.cancelled() and future.exception() is None
+                                   for output_file in future.result()]
+                raise
+            return output_files
         
     def encrypt_pdf(self, pdf_file: str, password: str, output_file: str = None):
         if not pdf_file:
             raise FileNotFoundError('No PDF file found')
             
+        trace = Trace(self.observer, 'encrypt_pdf', pdf_file)
         try:
-            with open(pdf_file, 'rb') as file:
+            with open_pdf(pdf_file) as file:
                 pdf_reader = PdfReader(file)
+                trace.event('open', 0, len(pdf_reader.pages))
                 pdf_writer = PdfWriter()
-                for page in pdf_reader.pages:
+                for index, page in enumerate(pdf_reader.pages):
                     pdf_writer.add_page(page)
+                    trace.event('page', index + 1)
+                # this only derives the keys, objects are encrypted as they are serialized
                 pdf_writer.encrypt(password)
+                trace.event('encrypt')
                 if not output_file:
                     output_file = os.path.splitext(pdf_file)[0] + '_encrypted.pdf'
                 with open(output_file, 'wb') as output:
-                    pdf_writer.write(output)
+                    write_traced(trace, pdf_writer, output)
+                trace.event('done')
                 return True
         except Exception as e:
             raise Exception(f'Error encrypting PDF: {e}')
         
+    def verify_password(self, pdf_file: str, password: str):
+        # only the xref, trailer and /Encrypt dictionary are read, no page or content object is touched
+        with open_pdf(pdf_file) as file:
+            return _verify_password(PdfReader(file), password)
+
     def decrypt_pdf(self, pdf_file: str, password: str):
         if not pdf_file:
             raise FileNotFoundError('No PDF file found')
         
+        temp_file = None
+        trace = Trace(self.observer, 'decrypt_pdf', pdf_file)
+        try:
+            with open_pdf(pdf_file) as file:
+                pdf_reader = PdfReader(file)
+                if not pdf_reader.is_encrypted:
+                    raise Exception('PDF file is not encrypted')
+                trace.event('open')
+
+                # a wrong password fails here, before any page is copied or the source is touched
+                password_type = _verify_password(pdf_reader, password)
+                trace.event('decrypt', 0, len(pdf_reader.pages))
+                pdf_writer = PdfWriter()
+                for index, page in enumerate(pdf_reader.pages):
+                    pdf_writer.add_page(page)
+                    trace.event('page', index + 1)
+                with tempfile.NamedTemporaryFile('wb', dir=os.path.dirname(os.path.abspath(pdf_file)),
+                                                 suffix='.pdf', delete=False) as output:
+                    temp_file = output.name
+                    write_traced(trace, pdf_writer, output)
+
+            _replace_file(temp_file, pdf_file)
+            trace.event('done')
+            return password_type
+        except Exception as e:
+            if temp_file:
+                _remove_files([temp_file])
+            raise Exception(f'Error decrypting PDF: {e}')
+
+    def compress_pdf(self, pdf_file: str, output_file: str = None, level: int = 9, image_dpi: int = 150,
+                     image_quality: int = 75, workers: int = 1, progress_callback: Callable = None,
+                     cancel_event: Event = None):
+        if not pdf_file:
+            raise FileNotFoundError('No PDF file found')
+        if not output_file:
+            output_file = os.path.splitext(pdf_file)[0] + '_compressed.pdf'
+
+        temp_file = None
         try:
-            with open(pdf_file, 'rb') as file:
+            input_size = os.path.getsize(pdf_file)
+            metadata = _cached_metadata(self.metadata_cache, pdf_file)
+            _check_not_encrypted(metadata)
+            with open_pdf(pdf_file) as file:
+                pdf_reader = PdfReader(file)
+                _check_not_encrypted(metadata, pdf_reader)
+
+                jobs = collect_streams(pdf_reader)
+                if sum(len(job['data']) for job in jobs) < PARALLEL_MIN_STREAM_BYTES:
+                    workers = 1
+                jobs_by_key = {job['key']: job for job in jobs}
+                options = {'level': level, 'image_dpi': image_dpi, 'image_quality': image_quality}
+                stats = {stream_class: {'streams': 0, 'before': 0, 'after': 0} for stream_class in STREAM_CLASSES}
+                replacements = {}
+                for key, data, entries in _recompress_streams(jobs, options, workers, progress_callback, cancel_event):
+                    job = jobs_by_key[key]
+                    stats[job['class']]['streams'] += 1
+                    stats[job['class']]['before'] += len(job['data'])
+                    stats[job['class']]['after'] += len(job['data'] if data is None else data)
+                    if data is not None:
+                        replacements[key] = replacement_stream(IndirectObject(*key, pdf_reader).get_object(),
+                                                               data, entries)
+
+                # only objects reachable from the pages or the catalog are copied, unused objects and duplicate
+                # streams are dropped
+                info = _document_info(pdf_reader)
+                with tempfile.NamedTemporaryFile('wb', dir=os.path.dirname(os.path.abspath(output_file)),
+                                                 suffix='.pdf', delete=False) as output:
+                    temp_file = output.name
+                with StreamingPdfWriter(temp_file, deduplicate=True, info=info) as pdf_writer:
+                    pdf_writer.add_pages(pdf_reader, progress_callback=progress_callback, cancel_event=cancel_event,
+                                         replacements=replacements, catalog=True)
+
+            # a rewrite that is not smaller is of no use, the output is the input as it was
+            kept_original = os.path.getsize(temp_file) >= input_size
+            if kept_original:
+                _remove_files([temp_file])
+                temp_file = None
+                if os.path.abspath(output_file) != os.path.abspath(pdf_file):
+                    shutil.copyfile(pdf_file, output_file)
+            else:
+                _replace_file(temp_file, output_file)
+            return {'input_size': input_size, 'output_size': os.path.getsize(output_file), 'streams': stats,
+                    'kept_original': kept_original}
+        except OperationCancelled:
+            if temp_file:
+                _remove_files([temp_file])
+            raise
+        except Exception as e:
+            if temp_file:
+                _remove_files([temp_file])
+            raise Exception(f'Error compressing PDF: {e}')
+
+    def extract_images(self, pdf_file: str, output_dir: str, workers: int = 1, progress_callback: Callable = None,
+                       cancel_event: Event = None):
+        if not pdf_file:
+            raise FileNotFoundError('No PDF file found')
+
+        output_files = []
+        skipped = 0
+        pending = set()
+        executor = None
+        try:
+            with open_pdf(pdf_file) as file:
+                pdf_reader = PdfReader(file)
+                if workers > 1 and len(pdf_reader.pages) >= PARALLEL_MIN_PAGES:
+                    executor = process_pool(workers)
+                file_base_name = os.path.splitext(os.path.basename(pdf_file))[0]
+                visited = set()
+                for page_number, page in enumerate(pdf_reader.pages, 1):
+                    _check_cancelled(cancel_event)
+                    for index, (key, image) in enumerate(page_images(page, visited), 1):
+                        output_base = os.path.join(output_dir, f'{file_base_name}_page{page_number}_image{index}')
+                        extension = passthrough_extension(image)
+                        job = None if extension else image_job(image)
+                        if extension:
+                            # JPEG and JPEG 2000 streams are complete image files, their bytes are copied as they are
+                            output_files.append(output_base + extension)
+                            with open(output_files[-1], 'wb') as output:
+                                output.write(image._data)
+                        elif job is None:
+                            skipped += 1
+                        elif executor is None:
+                            output_files.append(write_png(job, output_base + '.png'))
+                        else:
+                            output_files.append(output_base + '.png')
+                            if len(pending) >= workers * 4:
+                                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                                for future in done:
+                                    future.result()
+                            pending.add(executor.submit(write_png, job, output_files[-1]))
+                        # drop the image from the reader cache, only the page being read stays in memory
+                        pdf_reader.resolved_objects.pop((key[1], key[0]), None)
+                    _report_progress(progress_callback, 'page', page_number, len(pdf_reader.pages))
+
+            for future in as_completed(pending):
+                _check_cancelled(cancel_event)
+                future.result()
+            return {'output_files': output_files, 'skipped': skipped}
+        except OperationCancelled:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+            _remove_files(output_files)
+            raise
+        except Exception as e:
+            raise Exception(f'Error extracting images: {e}')
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+    def extract_text(self, pdf_file: str, output_file: str = None, output_format: str = None, workers: int = 1,
+                     progress_callback: Callable = None, cancel_event: Event = None):
+        # output_format is 'txt' (pages separated by form feeds), 'jsonl' (one page per line) or 'docx',
+        # by default taken from the output's extension. Pages are written in order as their chunk comes
+        # back, so txt and jsonl outputs can be read while a long document is still being extracted
+        if not pdf_file:
+            raise FileNotFoundError('No PDF file found')
+        if output_format is None:
+            extension = os.path.splitext(output_file)[1].lower().lstrip('.') if output_file else ''
+            output_format = extension if extension in TEXT_WRITERS else 'txt'
+        if output_format not in TEXT_WRITERS:
+            raise ValueError(f'Unknown text format: {output_format}')
+        output_file = output_file or f'{os.path.splitext(pdf_file)[0]}.{output_format}'
+
+        trace = Trace(self.observer, 'extract_text', pdf_file)
+        progress_callback = trace.progress(progress_callback)
+        executor = None
+        try:
+            with open_pdf(pdf_file) as file:
                 pdf_reader = PdfReader(file)
                 if pdf_reader.is_encrypted:
-                    pdf_reader.decrypt(password)
-                    pdf_writer = PdfWriter()
-                    for page in pdf_reader.pages:
-                        pdf_writer.add_page(page)
-                    with open(pdf_file, 'wb') as output:
-                        pdf_writer.write(output)
-                    return True
+                    raise Exception('PDF file is encrypted, decrypt it first')
+                total = page_count(pdf_reader)
+                trace.event('open', 0, total)
+
+                chunks = (list(range(start, min(start + TEXT_CHUNK_PAGES, total)))
+                          for start in range(0, total, TEXT_CHUNK_PAGES))
+                if workers > 1 and total >= PARALLEL_MIN_PAGES:
+                    executor = process_pool(workers, _init_reader_worker, (pdf_file,))
+                    results = _ordered_results(executor, _extract_text_worker, chunks, workers * 2)
                 else:
-                    raise Exception('PDF file is not encrypted')
+                    results = (_extract_page_texts(pdf_reader, pages) for pages in chunks)
+
+                with TEXT_WRITERS[output_format](output_file) as writer:
+                    for texts in results:
+                        _check_cancelled(cancel_event)
+                        for text in texts:
+                            writer.write_page(writer.pages + 1, text)
+                        _report_progress(progress_callback, 'page', writer.pages, total)
+
+            trace.event('write', bytes_written=os.path.getsize(output_file))
+            trace.event('done')
+            return {'output_file': output_file, 'pages': writer.pages, 'characters': writer.characters}
+        except OperationCancelled:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+            _remove_files([output_file])
+            raise
         except Exception as e:
-            raise Exception(f'Error decrypting PDF: {e}')
\ No newline at end of file
+            raise Exception(f'Error extracting text: {e}')
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+    def rotate_pdf(self, pdf_file: str, pages: str = None, angle: int = 90, output_file: str = None,
+                   incremental: bool = False, progress_callback: Callable = None, cancel_event: Event = None):
+        # pages uses the split range syntax, a range may carry its own angle: '1-3:90, 5:180, 8'
+        if not pdf_file:
+            raise FileNotFoundError('No PDF file found')
+        output_file = output_file or pdf_file
+
+        temp_file = None
+        try:
+            with open_pdf(pdf_file) as file:
+                pdf_reader = PdfReader(file)
+                if pdf_reader.is_encrypted:
+                    raise Exception('PDF file is encrypted, decrypt it first')
+
+                rotations = parse_rotation_plan(pages or f'1-{len(pdf_reader.pages)}', len(pdf_reader.pages), angle)
+                rotated = []
+                for page_number, rotation in rotations.items():
+                    page = pdf_reader.pages[page_number - 1]
+                    if rotation % 360:
+                        page.rotation = (page.rotation + rotation) % 360
+                        rotated.append(page)
+
+                # cross-reference stream documents cannot take a classic update, rewrite them instead
+                incremental = incremental and has_classic_xref(file)
+                if not incremental:
+                    with tempfile.NamedTemporaryFile('wb', dir=os.path.dirname(os.path.abspath(output_file)),
+                                                     suffix='.pdf', delete=False) as output:
+                        temp_file = output.name
+                    with StreamingPdfWriter(temp_file, info=_document_info(pdf_reader)) as pdf_writer:
+                        pdf_writer.add_pages(pdf_reader, progress_callback=progress_callback, cancel_event=cancel_event,
+                                             catalog=True)
+
+            if incremental:
+                self._rotate_incremental(pdf_file, output_file, rotated, progress_callback, cancel_event)
+                return {'mode': 'incremental', 'pages_rotated': len(rotated)}
+
+            _replace_file(temp_file, output_file)
+            return {'mode': 'rewrite', 'pages_rotated': len(rotated)}
+        except OperationCancelled:
+            if temp_file:
+                _remove_files([temp_file])
+            raise
+        except Exception as e:
+            if temp_file:
+                _remove_files([temp_file])
+            raise Exception(f'Error rotating PDF: {e}')
+
+    def _rotate_incremental(self, pdf_file: str, output_file: str, rotated: list, progress_callback: Callable = None,
+                            cancel_event: Event = None):
+        # only the rotated page dictionaries are appended, their content and resources are not touched
+        copied = os.path.abspath(output_file) != os.path.abspath(pdf_file)
+        if copied:
+            shutil.copyfile(pdf_file, output_file)
+        try:
+            with IncrementalPdfWriter(output_file) as pdf_writer:
+                for index, page in enumerate(rotated):
+                    _check_cancelled(cancel_event)
+                    pdf_writer.update_object(page.indirect_reference, page)
+                    _report_progress(progress_callback, 'page', index + 1, len(rotated))
+        except BaseException:
+            if copied:
+                _remove_files([output_file])
+            raise
+
+    def watermark_pdf(self, pdf_file: str, output_file: str = None, text: str = None, image_file: str = None,
+                      opacity: float = 0.3, font_size: float = 48, angle: float = 45, scale: float = 0.5,
+                      pages: str = None, progress_callback: Callable = None, cancel_event: Event = None):
+        if not pdf_file:
+            raise FileNotFoundError('No PDF file found')
+        if not output_file:
+            output_file = os.path.splitext(pdf_file)[0] + '_watermarked.pdf'
+
+        temp_file = None
+        try:
+            with open_pdf(pdf_file) as file:
+                pdf_reader = PdfReader(file)
+                if pdf_reader.is_encrypted:
+                    raise Exception('PDF file is encrypted, decrypt it first')
+                selected = None
+                if pages:
+                    selected = {page - 1 for start, end in parse_page_ranges(pages, len(pdf_reader.pages))
+                                for page in range(start, end + 1)}
+
+                with tempfile.NamedTemporaryFile('wb', dir=os.path.dirname(os.path.abspath(output_file)),
+                                                 suffix='.pdf', delete=False) as output:
+                    temp_file = output.name
+                with StreamingPdfWriter(temp_file, info=_document_info(pdf_reader)) as pdf_writer:
+                    watermark = Watermark(pdf_writer, text, image_file, opacity, font_size, angle, scale, selected)
+                    pdf_writer.add_pages(pdf_reader, progress_callback=progress_callback, cancel_event=cancel_event,
+                                         page_hook=watermark, catalog=True)
+
+            _replace_file(temp_file, output_file)
+            return output_file
+        except OperationCancelled:
+            if temp_file:
+                _remove_files([temp_file])
+            raise
+        except Exception as e:
+            if temp_file:
+                _remove_files([temp_file])
+            raise Exception(f'Error watermarking PDF: {e}')
+
+def init_pdf_job_worker(event_queue=None, trace_file: str = None):
+    # process pool initializer: events of every job run in this process go to the queue and/or trace file
+    global _job_observer
+    _job_observer = combine_observers(ThrottledObserver(event_queue.put) if event_queue is not None else None,
+                                      JsonLinesTraceSink(trace_file) if trace_file else None)
+
+
+def run_pdf_job(operation: str, *args, **kwargs):
+    # picklable entry point for process pool workers
+    return getattr(PDFUtility(_job_observer), operation)(*args, **kwargs)
@@ -0,0 +1,432 @@
+import os
+import hashlib
+from io import BytesIO
+from threading import Event
+from typing import Callable, Iterable, List
+from PyPDF2 import PageObject, PdfReader
+from PyPDF2.generic import (ArrayObject, DecodedStreamObject, DictionaryObject, EncodedStreamObject,
+                            IndirectObject, NameObject, NullObject, NumberObject, StreamObject)
+from .errors import OperationCancelled
+from .mapped_input import open_pdf
+
+CATALOG_ID = 1
+PAGES_ID = 2
+PAGE_EXCLUDED_KEYS = ('/Parent', '/StructParents', '/B')
+# written by close(), every other entry of a carried over catalog is copied
+CATALOG_OWN_KEYS = ('/Type', '/Pages')
+INHERITED_PAGE_KEYS = ('/Resources', '/MediaBox', '/CropBox', '/Rotate')
+
+
+def page_count(pdf_reader: PdfReader):
+    # the root's /Count, so the page tree does not have to be flattened just to validate a page range
+    if pdf_reader.flattened_pages is not None:
+        return len(pdf_reader.flattened_pages)
+    return int(pdf_reader.trailer['/Root']['/Pages']['/Count'])
+
+
+def _find_page(pdf_reader: PdfReader, index: int):
+    # descends from the root along the kids' /Count, loading only the nodes on the way to the page;
+    # inherited attributes are filled in the way PdfReader does when it flattens the tree
+    node = pdf_reader.trailer['/Root']['/Pages']
+    inherited = {}
+    visited = set()
+    while True:
+        if id(node) in visited:
+            raise ValueError('Page tree contains a cycle')
+        visited.add(id(node))
+        for key in INHERITED_PAGE_KEYS:
+            if key in node:
+                inherited[key] = node.raw_get(key)
+
+        kids = node['/Kids']
+        reference = None
+        if int(node['/Count']) == len(kids) and index < len(kids) and '/Kids' not in kids[index].get_object():
+            # every kid is a page, so the one at index is found without loading its siblings
+            reference = kids[index]
+        else:
+            for kid in kids:
+                kid_count = int(kid.get_object()['/Count']) if '/Kids' in kid.get_object() else 1
+                if index < kid_count:
+                    reference = kid
+                    break
+                index -= kid_count
+        if reference is None:
+            raise IndexError('Page index out of range')
+
+        kid = reference.get_object()
+        if '/Kids' in kid:
+            node = kid
+            continue
+        page = PageObject(pdf_reader, reference)
+        page.update(kid)
+        for key, value in inherited.items():
+            if key not in page:
+                page[NameObject(key)] = value
+        return page
+
+
+def select_pages(pdf_reader: PdfReader, pages: List[int]):
+    if pdf_reader.flattened_pages is not None:
+        return [pdf_reader.pages[page] for page in pages]
+    found = {}
+    for page in pages:
+        if page not in found:
+            found[page] = _find_page(pdf_reader, page)
+    return [found[page] for page in pages]
+
+
+class StreamingPdfWriter:
+    # writes objects to the output as soon as they are copied, so only the input
+    # currently being added has to stay in memory
+    def __init__(self, output_file: str, deduplicate: bool = False, info: dict = None):
+        self.stream = open(output_file, 'wb')
+        self.stream.write(b'%PDF-1.7\n%\xe2\xe3\xcf\xd3\n')
+        self.offsets = [None, None, None]
+        self.pages_id = PAGES_ID
+        self._init_state(deduplicate, info)
+
+    def _init_state(self, deduplicate: bool, info: dict):
+        self.info = info or {}
+        self.deduplicate = deduplicate
+        self.bytes_saved = 0
+        self.objects_deduplicated = 0
+        self.generations = {}
+        self.kids = []
+        self.catalog = DictionaryObject()
+        self._stream_hashes = {}
+        self._digests = {}
+        self._in_progress = set()
+        self._inputs = 0
+        self._translated = {}
+        self._page_ids = set()
+        self._pending = []
+        self._replacements = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.stream.close()
+
+    def add_pages(self, pdf_reader: PdfReader, pages: Iterable[int] = None, progress_callback: Callable = None,
+                  cancel_event: Event = None, replacements: dict = None, page_hook: Callable = None,
+                  catalog: bool = False):
+        # replacements maps (idnum, generation) of the reader's objects to objects written in their place;
+        # page_hook(page_index, page) returns page entries, already in the output's numbering, that replace
+        # the copied ones. catalog carries the reader's catalog entries (outlines, forms, names, page labels,
+        # structure tree...) over to the output, for rewrites of a whole document
+        self._replacements = replacements or {}
+        self._inputs += 1
+        if pages is None:
+            pages = range(len(pdf_reader.pages))
+        pages = list(pages)
+        if pdf_reader.flattened_pages is None:
+            # a selection from a tree that was not flattened yet: only the selected pages are loaded, pages
+            # left out are recognised by their type when something links to them
+            page_objects = select_pages(pdf_reader, pages)
+            self._page_ids = None
+        else:
+            page_objects = [pdf_reader.pages[page] for page in pages]
+            self._page_ids = {(page.indirect_reference.idnum, page.indirect_reference.generation)
+                              for page in pdf_reader.pages}
+
+        # the structure tree and article threads come along with the catalog, so the pages keep their links to them
+        excluded_keys = ('/Parent',) if catalog else PAGE_EXCLUDED_KEYS
+        # number every selected page up front so links between them survive the copy
+        page_numbers = []
+        for page_object in page_objects:
+            number = self._allocate()
+            reference = page_object.indirect_reference
+            self._translated.setdefault((reference.idnum, reference.generation), number)
+            page_numbers.append(number)
+
+        try:
+            for index, (page, page_object, number) in enumerate(zip(pages, page_objects, page_numbers)):
+                if cancel_event is not None and cancel_event.is_set():
+                    raise OperationCancelled('Operation cancelled')
+                overrides = page_hook(page, page_object) if page_hook is not None else {}
+                page_object = self._copy(page_object, excluded_keys + tuple(overrides))
+                page_object.update({NameObject(key): value for key, value in overrides.items()})
+                page_object[NameObject('/Parent')] = IndirectObject(self.pages_id, self.generations.get(self.pages_id, 0), None)
+                self._write_object(number, page_object)
+                self.kids.append(number)
+                self._drain()
+                if progress_callback is not None:
+                    progress_callback('page', index + 1, len(pages))
+            if catalog:
+                # copied once the pages are numbered, so outline and form references to them translate
+                self.catalog.update(self._copy(pdf_reader.trailer['/Root'], CATALOG_OWN_KEYS))
+                self._drain()
+        finally:
+            self._translated = {}
+            self._digests = {}
+            self._page_ids = set()
+            self._pending = []
+            self._replacements = {}
+        return page_numbers
+
+    def copy_object(self, pdf_object):
+        # copies an object of the reader being added, references are translated like the pages' own
+        return self._copy(pdf_object)
+
+    def add_object(self, pdf_object):
+        return self._write_new_object(pdf_object)
+
+    def close(self):
+        pages = DictionaryObject({
+            NameObject('/Type'): NameObject('/Pages'),
+            NameObject('/Kids'): ArrayObject(IndirectObject(number, 0, None) for number in self.kids),
+            NameObject('/Count'): NumberObject(len(self.kids)),
+        })
+        self._write_object(PAGES_ID, pages)
+        catalog = DictionaryObject(self.catalog)
+        catalog[NameObject('/Type')] = NameObject('/Catalog')
+        catalog[NameObject('/Pages')] = IndirectObject(PAGES_ID, 0, None)
+        self._write_object(CATALOG_ID, catalog)
+
+        trailer = DictionaryObject({NameObject('/Root'): IndirectObject(CATALOG_ID, 0, None)})
+        if self.info:
+            info = DictionaryObject({NameObject(key): value for key, value in self.info.items()})
+            trailer[NameObject('/Info')] = self._write_new_object(info)
+        self._write_trailer(trailer)
+
+    def _write_trailer(self, trailer: DictionaryObject):
+        # consecutive object numbers share an xref subsection, an incremental update only lists what it wrote
+        entries = [(0, b'0000000000 65535 f \n')]
+        for number, offset in enumerate(self.offsets):
+            if offset is not None:
+                entries.append((number, f'{offset:010d} {self.generations.get(number, 0):05d} n \n'.encode()))
+
+        xref_offset = self.stream.tell()
+        self.stream.write(b'xref\n')
+        start = 0
+        while start < len(entries):
+            end = start + 1
+            while end < len(entries) and entries[end][0] == entries[end - 1][0] + 1:
+                end += 1
+            self.stream.write(f'{entries[start][0]} {end - start}\n'.encode())
+            self.stream.write(b''.join(line for _, line in entries[start:end]))
+            start = end
+
+        trailer[NameObject('/Size')] = NumberObject(len(self.offsets))
+        self.stream.write(b'trailer\n')
+        trailer.write_to_stream(self.stream, None)
+        self.stream.write(f'\nstartxref\n{xref_offset}\n%%EOF\n'.encode())
+        self.stream.close()
+
+    def _write_new_object(self, pdf_object):
+        number = self._allocate()
+        self._write_object(number, pdf_object)
+        return IndirectObject(number, 0, None)
+
+    def _allocate(self):
+        self.offsets.append(None)
+        return len(self.offsets) - 1
+
+    def _write_object(self, number: int, pdf_object):
+        self.offsets[number] = self.stream.tell()
+        self.stream.write(f'{number} {self.generations.get(number, 0)} obj\n'.encode())
+        pdf_object.write_to_stream(self.stream, None)
+        self.stream.write(b'\nendobj\n')
+
+    def _deduplicated_stream(self, reference: IndirectObject, pdf_object: StreamObject):
+        # streams are matched on their content before anything is copied, so a duplicate leaves no copied
+        # children behind and the original's number is reused
+        key = (reference.idnum, reference.generation)
+        digest = self._content_digest(reference)
+        number = self._stream_hashes.get(digest)
+        if number is not None:
+            self.bytes_saved += len(pdf_object._data)
+            self.objects_deduplicated += 1
+            self._translated[key] = number
+            return IndirectObject(number, 0, None)
+
+        number = self._allocate()
+        self._stream_hashes[digest] = number
+        self._translated[key] = number
+        self._write_object(number, self._copy(pdf_object))
+        return IndirectObject(number, 0, None)
+
+    def _content_digest(self, pdf_object):
+        # references are replaced by the digest of what they point to, so equal streams match across inputs
+        # however their children (/DecodeParms, /ColorSpace, an /SMask...) are numbered
+        if isinstance(pdf_object, IndirectObject):
+            key = (pdf_object.idnum, pdf_object.generation)
+            if key in self._digests:
+                return self._digests[key]
+            if key in self._in_progress:
+                return b'cycle'
+            resolved = self._resolve(pdf_object)
+            if isinstance(resolved, DictionaryObject) and resolved.get('/Type') in ('/Page', '/Pages'):
+                # the page tree is not followed, a link to a page only matches within the same input
+                digest = hashlib.sha256(f'page {self._inputs} {key}'.encode()).digest()
+            else:
+                self._in_progress.add(key)
+                try:
+                    digest = self._content_digest(resolved)
+                finally:
+                    self._in_progress.discard(key)
+            self._digests[key] = digest
+            return digest
+
+        hasher = hashlib.sha256(type(pdf_object).__name__.encode())
+        if isinstance(pdf_object, StreamObject):
+            hasher.update(pdf_object._data)
+        if isinstance(pdf_object, DictionaryObject):
+            for key in sorted(pdf_object):
+                if key != '/Length':
+                    hasher.update(key.encode())
+                    hasher.update(self._content_digest(pdf_object.raw_get(key)))
+        elif isinstance(pdf_object, ArrayObject):
+            for item in pdf_object:
+                hasher.update(self._content_digest(item))
+        else:
+            buffer = BytesIO()
+            pdf_object.write_to_stream(buffer, None)
+            hasher.update(buffer.getvalue())
+        return hasher.digest()
+
+    def _drain(self):
+        while self._pending:
+            reference, number = self._pending.pop()
+            self._write_object(number, self._copy(self._resolve(reference)))
+
+    def _reference(self, reference: IndirectObject):
+        key = (reference.idnum, reference.generation)
+        if key in self._translated:
+            return IndirectObject(self._translated[key], 0, None)
+        if self._page_ids is None:
+            pdf_object = self._resolve(reference)
+            unselected_page = isinstance(pdf_object, DictionaryObject) and pdf_object.get('/Type') == '/Page'
+        else:
+            unselected_page = key in self._page_ids
+        if unselected_page:
+            # a page that is not part of the selection, drop the dangling link
+            return NullObject()
+        if self.deduplicate:
+            pdf_object = self._resolve(reference)
+            if isinstance(pdf_object, StreamObject):
+                return self._deduplicated_stream(reference, pdf_object)
+        number = self._allocate()
+        self._translated[key] = number
+        self._pending.append((reference, number))
+        return IndirectObject(number, 0, None)
+
+    def _resolve(self, reference: IndirectObject):
+        return self._replacements.get((reference.idnum, reference.generation)) or reference.get_object()
+
+    def _copy(self, pdf_object, excluded_keys: List[str] = ()):
+        # copies are built instead of rewriting in place because the reader shares
+        # inherited direct objects (e.g. /Resources) between pages
+        if isinstance(pdf_object, IndirectObject):
+            return self._reference(pdf_object)
+        if isinstance(pdf_object, StreamObject):
+            copy = EncodedStreamObject() if isinstance(pdf_object, EncodedStreamObject) else DecodedStreamObject()
+            copy._data = pdf_object._data
+        elif isinstance(pdf_object, DictionaryObject):
+            copy = DictionaryObject()
+        elif isinstance(pdf_object, ArrayObject):
+            return ArrayObject(self._copy(item) for item in pdf_object)
+        else:
+            return pdf_object
+
+        for key, value in pdf_object.items():
+            if key not in excluded_keys:
+                copy[NameObject(key)] = self._copy(value)
+        return copy
+
+
+def find_startxref(stream):
+    stream.seek(0, os.SEEK_END)
+    size = stream.tell()
+    stream.seek(max(0, size - 1024))
+    tail = stream.read()
+    position = tail.rfind(b'startxref')
+    if position < 0:
+        raise ValueError('startxref not found')
+    return int(tail[position + len(b'startxref'):].split()[0])
+
+
+def has_classic_xref(stream):
+    # documents with cross-reference streams cannot take a classic incremental update
+    stream.seek(find_startxref(stream))
+    return stream.read(4) == b'xref'
+
+
+class IncrementalPdfWriter(StreamingPdfWriter):
+    # appends to an existing document as an incremental update: only new or updated objects, a new
+    # version of the page tree root when pages were added, and an xref section chained with /Prev
+    def __init__(self, output_file: str, deduplicate: bool = False, info: dict = None):
+        with open_pdf(output_file) as file:
+            base = PdfReader(file)
+            if base.is_encrypted:
+                raise ValueError('Encrypted documents cannot be updated incrementally')
+            self.prev_xref = find_startxref(file)
+            if not has_classic_xref(file):
+                raise ValueError('Documents with cross-reference streams cannot be updated incrementally')
+
+            trailer = base.trailer
+            self.root = trailer.raw_get('/Root')
+            pages_ref = self.root.get_object().raw_get('/Pages')
+            pages = pages_ref.get_object()
+            self.base_pages = {key: pages.raw_get(key) for key in pages if key not in ('/Kids', '/Count')}
+            self.base_kids = list(pages['/Kids'])
+            self.base_count = int(pages['/Count'])
+            self.info_ref = trailer.raw_get('/Info') if '/Info' in trailer else None
+            self.base_info = {}
+            if self.info_ref is not None:
+                base_info = self.info_ref.get_object()
+                self.base_info = {key: base_info.raw_get(key) for key in base_info}
+            self.document_id = trailer.get('/ID')
+            size = int(trailer['/Size'])
+
+        self.base_length = os.path.getsize(output_file)
+        self.stream = open(output_file, 'r+b')
+        self.stream.seek(0, os.SEEK_END)
+        self.stream.write(b'\n')
+        self.offsets = [None] * size
+        self.pages_id = pages_ref.idnum
+        self._init_state(deduplicate, info)
+        self.generations[self.pages_id] = pages_ref.generation
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            # leave the original document exactly as it was
+            self.stream.truncate(self.base_length)
+            self.stream.close()
+
+    def update_object(self, reference: IndirectObject, pdf_object):
+        # a new version of an object of the base document, references inside it must already use its numbering
+        self.generations[reference.idnum] = reference.generation
+        self._write_object(reference.idnum, pdf_object)
+
+    def close(self):
+        if self.kids:
+            pages = DictionaryObject({NameObject(key): value for key, value in self.base_pages.items()})
+            pages[NameObject('/Kids')] = ArrayObject(self.base_kids + [IndirectObject(number, 0, None) for number in self.kids])
+            pages[NameObject('/Count')] = NumberObject(self.base_count + len(self.kids))
+            self._write_object(self.pages_id, pages)
+
+        trailer = DictionaryObject({
+            NameObject('/Root'): self.root,
+            NameObject('/Prev'): NumberObject(self.prev_xref),
+        })
+        if self.document_id is not None:
+            trailer[NameObject('/ID')] = self.document_id
+        if self.info:
+            info = DictionaryObject({NameObject(key): value for key, value in {**self.base_info, **self.info}.items()})
+            if self.info_ref is not None:
+                self.generations[self.info_ref.idnum] = self.info_ref.generation
+                self._write_object(self.info_ref.idnum, info)
+                trailer[NameObject('/Info')] = self.info_ref
+            else:
+                trailer[NameObject('/Info')] = self._write_new_object(info)
+        elif self.info_ref is not None:
+            # the trailer of an update replaces the previous one, the document info is lost unless repeated
+            trailer[NameObject('/Info')] = self.info_ref
+        self._write_trailer(trailer)
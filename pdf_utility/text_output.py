@@ -0,0 +1,113 @@
+import re
+import json
+import zipfile
+from abc import ABC, abstractmethod
+from xml.sax.saxutils import escape
+
+# characters XML 1.0 does not allow, extracted text can contain them (e.g. from broken font encodings)
+XML_INVALID = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+
+DOCX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>')
+DOCX_RELATIONSHIPS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/>'
+    '</Relationships>')
+DOCX_DOCUMENT_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>')
+DOCX_DOCUMENT_END = '<w:sectPr/></w:body></w:document>'
+DOCX_PAGE_BREAK = '<w:p><w:r><w:br w:type="page"/></w:r></w:p>'
+
+
+class TextWriter(ABC):
+    # pages are written as they arrive and flushed, so the output can be read while it grows
+    def __init__(self, output_file: str):
+        self.output_file = output_file
+        self.pages = 0
+        self.characters = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write_page(self, page_number: int, text: str):
+        self._write_page(page_number, text)
+        self.pages += 1
+        self.characters += len(text)
+
+    @abstractmethod
+    def _write_page(self, page_number: int, text: str):
+        pass
+
+    @abstractmethod
+    def close(self):
+        pass
+
+
+class PlainTextWriter(TextWriter):
+    # pages separated by form feeds, as pdftotext does
+    def __init__(self, output_file: str):
+        super().__init__(output_file)
+        self.file = open(output_file, 'w', encoding='utf-8')
+
+    def _write_page(self, page_number: int, text: str):
+        if self.pages:
+            self.file.write('\f')
+        self.file.write(text)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class JsonLinesTextWriter(TextWriter):
+    def __init__(self, output_file: str):
+        super().__init__(output_file)
+        self.file = open(output_file, 'w', encoding='utf-8')
+
+    def _write_page(self, page_number: int, text: str):
+        self.file.write(json.dumps({'page': page_number, 'text': text}, ensure_ascii=False) + '\n')
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class DocxTextWriter(TextWriter):
+    # a minimal WordprocessingML package: one paragraph per line and a page break between pages. The
+    # document part is streamed into the zip, only the central directory is written on close, so the
+    # file is usable once the extraction is done
+    def __init__(self, output_file: str):
+        super().__init__(output_file)
+        self.package = zipfile.ZipFile(output_file, 'w', zipfile.ZIP_DEFLATED)
+        self.package.writestr('[Content_Types].xml', DOCX_CONTENT_TYPES)
+        self.package.writestr('_rels/.rels', DOCX_RELATIONSHIPS)
+        self.document = self.package.open('word/document.xml', 'w', force_zip64=True)
+        self.document.write(DOCX_DOCUMENT_START.encode())
+
+    def _write_page(self, page_number: int, text: str):
+        parts = [DOCX_PAGE_BREAK] if self.pages else []
+        for line in text.split('\n'):
+            line = escape(XML_INVALID.sub('', line))
+            parts.append(f'<w:p><w:r><w:t xml:space="preserve">{line}</w:t></w:r></w:p>')
+        self.document.write(''.join(parts).encode())
+
+    def close(self):
+        self.document.write(DOCX_DOCUMENT_END.encode())
+        self.document.close()
+        self.package.close()
+
+
+TEXT_WRITERS = {'txt': PlainTextWriter, 'jsonl': JsonLinesTextWriter, 'docx': DocxTextWriter}
@@ -0,0 +1,106 @@
+import os
+import time
+import hashlib
+import sqlite3
+import threading
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.pdf_utility', 'thumbnails')
+
+
+class ThumbnailCache:
+    # rendered page images (PNG bytes) on disk, keyed by (path, size, mtime, page, width) so a file that
+    # changes is rendered again; the least recently used are deleted once the files pass max_bytes
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = 128 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self.connection = sqlite3.connect(os.path.join(cache_dir, 'index.sqlite3'), check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.execute('''
+            CREATE TABLE IF NOT EXISTS thumbnails (
+                path TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime INTEGER NOT NULL,
+                page INTEGER NOT NULL,
+                width INTEGER NOT NULL,
+                file TEXT NOT NULL,
+                bytes INTEGER NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (path, size, mtime, page, width)
+            )
+        ''')
+        self.connection.execute('CREATE INDEX IF NOT EXISTS thumbnails_last_used ON thumbnails (last_used)')
+        self.connection.commit()
+        self.total_bytes = self.connection.execute('SELECT COALESCE(SUM(bytes), 0) FROM thumbnails').fetchone()[0]
+
+    def key(self, pdf_file: str, page: int, width: int):
+        path = os.path.realpath(pdf_file)
+        stat = os.stat(path)
+        return path, stat.st_size, stat.st_mtime_ns, page, width
+
+    def _file(self, key: tuple):
+        return os.path.join(self.cache_dir, hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest() + '.png')
+
+    def get(self, key: tuple):
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT file FROM thumbnails WHERE path = ? AND size = ? AND mtime = ? AND page = ? AND width = ?',
+                key).fetchone()
+            if row is None:
+                return None
+            self.connection.execute(
+                'UPDATE thumbnails SET last_used = ? WHERE path = ? AND size = ? AND mtime = ? AND page = ? AND width = ?',
+                (time.time(), *key))
+            self.connection.commit()
+        try:
+            with open(os.path.join(self.cache_dir, row[0]), 'rb') as file:
+                return file.read()
+        except OSError:
+            # removed behind our back, render it again
+            return None
+
+    def put(self, key: tuple, data: bytes):
+        file_path = self._file(key)
+        temp_path = f'{file_path}.{threading.get_ident()}.tmp'
+        with open(temp_path, 'wb') as file:
+            file.write(data)
+        os.replace(temp_path, file_path)
+
+        with self.lock:
+            previous = self.connection.execute(
+                'SELECT bytes FROM thumbnails WHERE path = ? AND size = ? AND mtime = ? AND page = ? AND width = ?',
+                key).fetchone()
+            self.total_bytes += len(data) - (previous[0] if previous else 0)
+            self.connection.execute('INSERT OR REPLACE INTO thumbnails VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                                    (*key, os.path.basename(file_path), len(data), time.time()))
+            self._evict()
+            self.connection.commit()
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes:
+            rows = self.connection.execute(
+                'SELECT rowid, file, bytes FROM thumbnails ORDER BY last_used LIMIT 64').fetchall()
+            if not rows:
+                self.total_bytes = 0
+                return
+            for rowid, file, size in rows:
+                if self.total_bytes <= self.max_bytes:
+                    break
+                self.connection.execute('DELETE FROM thumbnails WHERE rowid = ?', (rowid,))
+                self.total_bytes -= size
+                try:
+                    os.remove(os.path.join(self.cache_dir, file))
+                except OSError:
+                    pass
+
+
+_default_cache = None
+
+
+def default_thumbnail_cache():
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ThumbnailCache()
+    return _default_cache
@@ -0,0 +1,363 @@
+import os
+import sys
+import json
+import time
+import shutil
+import select
+import struct
+import ctypes
+import ctypes.util
+import fnmatch
+from collections import deque
+from typing import List
+from .pdf_utility import init_pdf_job_worker, process_pool, run_pdf_job
+
+# operations that turn one input into one output file, merge and split are handled separately
+FILE_OPERATIONS = {
+    'encrypt': 'encrypt_pdf',
+    'decrypt': 'decrypt_pdf',
+    'compress': 'compress_pdf',
+    'rotate': 'rotate_pdf',
+    'watermark': 'watermark_pdf',
+}
+RULE_KEYS = ('directory', 'operation', 'output_dir', 'done_dir', 'error_dir', 'pattern', 'batch_wait', 'batch_size')
+
+IN_MODIFY = 0x2
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_Q_OVERFLOW = 0x4000
+INOTIFY_EVENT = struct.Struct('iIII')
+
+
+def load_rules(config_file: str):
+    # a JSON object with a "rules" list; every key that is not in RULE_KEYS is passed to the operation, e.g.
+    # {"rules": [{"directory": "in", "operation": "encrypt", "output_dir": "out", "password": "secret"}]}
+    with open(config_file, 'r', encoding='utf-8') as file:
+        config = json.load(file)
+
+    rules = []
+    for rule in config['rules']:
+        operation = rule.get('operation')
+        if operation not in FILE_OPERATIONS and operation not in ('merge', 'split'):
+            raise ValueError(f'{config_file}: unknown operation {operation!r}')
+        if not rule.get('directory') or not rule.get('output_dir'):
+            raise ValueError(f'{config_file}: every rule needs a directory and an output_dir')
+        directory = os.path.realpath(rule['directory'])
+        output_dir = os.path.realpath(rule['output_dir'])
+        if output_dir == directory:
+            raise ValueError(f'{config_file}: output_dir must differ from the watched directory {directory}')
+        rules.append({
+            'directory': directory,
+            'operation': operation,
+            'output_dir': output_dir,
+            # inputs are moved out of the watched directory once handled, so a restart does not redo them
+            'done_dir': os.path.realpath(rule.get('done_dir') or os.path.join(directory, 'done')),
+            'error_dir': os.path.realpath(rule.get('error_dir') or os.path.join(directory, 'failed')),
+            'pattern': rule.get('pattern', '*.pdf'),
+            'batch_wait': float(rule.get('batch_wait', 10)),
+            'batch_size': int(rule.get('batch_size', 0)),
+            'params': {key: value for key, value in rule.items() if key not in RULE_KEYS},
+        })
+    if len({rule['directory'] for rule in rules}) != len(rules):
+        raise ValueError(f'{config_file}: a directory can only be watched by one rule')
+    return rules
+
+
+def _stat(path: str):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _has_eof(path: str):
+    # a PDF that is still being written has no %%EOF marker near its end yet
+    try:
+        with open(path, 'rb') as file:
+            file.seek(max(os.fstat(file.fileno()).st_size - 1024, 0))
+            return b'%%EOF' in file.read()
+    except OSError:
+        return False
+
+
+def _unique_path(directory: str, name: str, reserved: set = frozenset()):
+    # reserved holds names handed to jobs that have not created their output yet
+    stem, extension = os.path.splitext(name)
+    path = os.path.join(directory, name)
+    counter = 1
+    while os.path.exists(path) or path in reserved:
+        path = os.path.join(directory, f'{stem}-{counter}{extension}')
+        counter += 1
+    return path
+
+
+def _move(path: str, directory: str):
+    os.makedirs(directory, exist_ok=True)
+    target = _unique_path(directory, os.path.basename(path))
+    os.replace(path, target)
+    return target
+
+
+def _scan(directory: str):
+    with os.scandir(directory) as entries:
+        return {entry.path for entry in entries if entry.is_file()}
+
+
+class InotifyWatcher:
+    # reports only the names the kernel saw change, the watched directories are never listed again
+    # unless the event queue overflows
+    MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+    def __init__(self, directories: List[str]):
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self.directories = {}
+        for directory in directories:
+            wd = libc.inotify_add_watch(self.fd, os.fsencode(directory), self.MASK)
+            if wd < 0:
+                os.close(self.fd)
+                raise OSError(ctypes.get_errno(), f'inotify_add_watch failed for {directory}')
+            self.directories[wd] = directory
+
+    def changes(self, timeout: float):
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return set()
+        paths = set()
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                return paths
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+                offset += INOTIFY_EVENT.size
+                if mask & IN_Q_OVERFLOW:
+                    for directory in self.directories.values():
+                        paths |= _scan(directory)
+                elif wd in self.directories:
+                    name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+                    paths.add(os.path.join(self.directories[wd], name))
+                offset += length
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    # a directory's mtime only changes when names are added or removed, so a directory is listed again
+    # only then; files still being written are followed by HotFolder with one stat each
+    def __init__(self, directories: List[str], interval: float = 1.0):
+        self.interval = interval
+        self.mtimes = {directory: None for directory in directories}
+
+    def changes(self, timeout: float):
+        time.sleep(min(timeout, self.interval))
+        paths = set()
+        now = time.time_ns()
+        for directory, last_mtime in self.mtimes.items():
+            mtime = _stat(directory)
+            mtime = mtime[1] if mtime else None
+            # coarse filesystem timestamps can hide a second change within the same tick, so a directory
+            # modified in the last two seconds is listed again
+            if mtime != last_mtime or (mtime is not None and now - mtime < 2_000_000_000):
+                self.mtimes[directory] = mtime
+                if mtime is not None:
+                    paths |= _scan(directory)
+        return paths
+
+    def close(self):
+        pass
+
+
+def run_watch_job(operation: str, pdf_files: List[str], output_path: str, params: dict):
+    # picklable entry point for the worker pool; the result is written under a hidden name in the output
+    # folder and renamed into place, so whatever consumes the output folder never sees a partial file
+    directory, name = os.path.split(output_path)
+    staging = os.path.join(directory, f'.{name}.part')
+    os.makedirs(directory, exist_ok=True)
+    try:
+        if operation == 'merge':
+            run_pdf_job('merge_pdfs', pdf_files, staging, **params)
+        elif operation == 'split':
+            os.makedirs(staging, exist_ok=True)
+            run_pdf_job('split_pdf', pdf_files[0], staging, **params)
+        elif operation == 'decrypt':
+            # decryption works in place, on a copy so the original can still be moved to done_dir
+            shutil.copyfile(pdf_files[0], staging)
+            run_pdf_job('decrypt_pdf', staging, **params)
+        else:
+            run_pdf_job(FILE_OPERATIONS[operation], pdf_files[0], output_file=staging, **params)
+        os.replace(staging, output_path)
+    except Exception:
+        if os.path.isdir(staging):
+            shutil.rmtree(staging, ignore_errors=True)
+        elif os.path.exists(staging):
+            os.remove(staging)
+        raise
+    return output_path
+
+
+class HotFolder:
+    def __init__(self, rules: List[dict], workers: int = 1, settle: float = 2.0, stale: float = 60.0,
+                 use_inotify: bool = True, output=sys.stdout, trace_file: str = None):
+        self.rules = {rule['directory']: rule for rule in rules}
+        self.workers = workers
+        self.settle = settle
+        self.stale = stale
+        self.use_inotify = use_inotify
+        self.output = output
+        self.trace_file = trace_file
+        # path -> [last (size, mtime), time it was last seen changing]
+        self.pending = {}
+        # every path that is pending, batched, queued or running, so events for it are ignored
+        self.seen = set()
+        self.batches = {directory: [] for directory in self.rules}
+        self.last_arrival = {directory: 0 for directory in self.rules}
+        self.queue = deque()
+        self.running = {}
+        # output paths of running jobs; a name is only taken on disk when its job finishes, so two jobs
+        # dispatched close together would otherwise be given the same one
+        self.reserved = set()
+        self.stopped = False
+
+    def _watcher(self):
+        if self.use_inotify and sys.platform.startswith('linux'):
+            try:
+                return InotifyWatcher(list(self.rules))
+            except (OSError, AttributeError):
+                pass
+        return PollingWatcher(list(self.rules))
+
+    def _add(self, path: str, now: float):
+        rule = self.rules.get(os.path.dirname(path))
+        name = os.path.basename(path)
+        if rule is None or path in self.seen or name.startswith('.'):
+            return
+        if not fnmatch.fnmatch(name.lower(), rule['pattern'].lower()):
+            return
+        self.seen.add(path)
+        self.pending[path] = [None, now]
+
+    def _check_pending(self, now: float):
+        # a file is ready once its size and mtime have not changed for `settle` seconds and it ends in %%EOF
+        for path, (last_stat, since) in list(self.pending.items()):
+            stat = _stat(path)
+            if stat is None:
+                del self.pending[path]
+                self.seen.discard(path)
+            elif stat != last_stat:
+                self.pending[path] = [stat, now]
+            elif now - since >= self.settle:
+                if _has_eof(path):
+                    del self.pending[path]
+                    self._route(path, now)
+                elif now - since >= self.stale:
+                    del self.pending[path]
+                    self._finished(self.rules[os.path.dirname(path)], [path], None, 'Incomplete PDF, no %%EOF', 0)
+
+    def _route(self, path: str, now: float):
+        rule = self.rules[os.path.dirname(path)]
+        if rule['operation'] != 'merge':
+            self.queue.append((rule, [path]))
+            return
+        self.batches[rule['directory']].append(path)
+        self.last_arrival[rule['directory']] = now
+
+    def _flush_batches(self, now: float, idle: bool = False):
+        # a merge batch is closed when no file arrived for batch_wait seconds and none is still being written,
+        # or when it reaches batch_size
+        for directory, batch in self.batches.items():
+            if not batch:
+                continue
+            rule = self.rules[directory]
+            writing = any(os.path.dirname(path) == directory for path in self.pending)
+            full = rule['batch_size'] and len(batch) >= rule['batch_size']
+            if full or idle or (not writing and now - self.last_arrival[directory] >= rule['batch_wait']):
+                self.queue.append((rule, sorted(batch)))
+                self.batches[directory] = []
+
+    def _output_path(self, rule: dict, pdf_files: List[str]):
+        if rule['operation'] == 'merge':
+            name = time.strftime('merged-%Y%m%d-%H%M%S.pdf')
+        else:
+            name = os.path.basename(pdf_files[0])
+            if rule['operation'] == 'split':
+                name = os.path.splitext(name)[0]
+        output_path = _unique_path(rule['output_dir'], name, self.reserved)
+        self.reserved.add(output_path)
+        return output_path
+
+    def _dispatch(self, executor):
+        # at most one job per worker is handed to the pool, the rest waits here
+        while self.queue and len(self.running) < self.workers:
+            rule, pdf_files = self.queue.popleft()
+            output_path = self._output_path(rule, pdf_files)
+            future = executor.submit(run_watch_job, rule['operation'], pdf_files, output_path, rule['params'])
+            self.running[future] = (rule, pdf_files, output_path, time.perf_counter())
+
+    def _reap(self):
+        for future in [future for future in self.running if future.done()]:
+            rule, pdf_files, output_path, start = self.running.pop(future)
+            self.reserved.discard(output_path)
+            error = future.exception()
+            self._finished(rule, pdf_files, None if error else future.result(), str(error) if error else None,
+                           time.perf_counter() - start)
+
+    def _finished(self, rule: dict, pdf_files: List[str], output_path: str, error: str, elapsed: float):
+        moved = []
+        for path in pdf_files:
+            self.seen.discard(path)
+            try:
+                moved.append(_move(path, rule['error_dir'] if error else rule['done_dir']))
+            except OSError:
+                moved.append(path)
+        result = {'operation': rule['operation'], 'inputs': moved, 'status': 'error' if error else 'ok',
+                  'elapsed': round(elapsed, 6)}
+        if error:
+            result['error'] = error
+        else:
+            result['output'] = output_path
+        self.output.write(json.dumps(result) + '\n')
+        self.output.flush()
+
+    def _idle(self):
+        return not (self.pending or self.queue or self.running or any(self.batches.values()))
+
+    def stop(self):
+        self.stopped = True
+
+    def run(self, once: bool = False):
+        # once: handle the files already in the directories and return when nothing is left to do
+        for rule in self.rules.values():
+            os.makedirs(rule['directory'], exist_ok=True)
+            os.makedirs(rule['output_dir'], exist_ok=True)
+        watcher = self._watcher()
+        executor = process_pool(self.workers, init_pdf_job_worker, (None, self.trace_file))
+        now = time.monotonic()
+        for directory in self.rules:
+            for path in _scan(directory):
+                self._add(path, now)
+        try:
+            while not self.stopped:
+                timeout = 0.05 if self.running else min(self.settle / 4, 0.25)
+                for path in watcher.changes(timeout):
+                    self._add(path, time.monotonic())
+                now = time.monotonic()
+                self._check_pending(now)
+                self._reap()
+                self._flush_batches(now, idle=once and not self.pending and not self.queue and not self.running)
+                self._dispatch(executor)
+                if once and self._idle():
+                    break
+        except KeyboardInterrupt:
+            pass
+        finally:
+            # jobs already handed to a worker are finished and their inputs moved before returning
+            executor.shutdown(wait=True)
+            self._reap()
+            watcher.close()
@@ -0,0 +1,187 @@
+import math
+import zlib
+from PyPDF2.generic import (ArrayObject, DecodedStreamObject, DictionaryObject, EncodedStreamObject, FloatObject,
+                            IndirectObject, NameObject, NumberObject)
+from .stream_writer import StreamingPdfWriter
+
+try:
+    from PIL import Image
+except ImportError:
+    # image watermarks need Pillow to read the image, text watermarks do not
+    Image = None
+
+WATERMARK_NAME = '/PUWm0'
+# Helvetica advance widths for ASCII 32-126 in 1/1000 em, used to center the text without embedding a font
+HELVETICA_WIDTHS = (
+    278, 278, 355, 556, 556, 889, 667, 222, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    222, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+)
+
+
+def _name(value: str):
+    return NameObject(value)
+
+
+def _stream(data: bytes, entries: dict = None):
+    stream = DecodedStreamObject()
+    stream.set_data(data)
+    for key, value in (entries or {}).items():
+        stream[_name(key)] = value
+    return stream
+
+
+def _number(value: float):
+    return f'{value:.4f}'.rstrip('0').rstrip('.')
+
+
+def text_width(text: str, font_size: float):
+    return sum(HELVETICA_WIDTHS[ord(char) - 32] if 32 <= ord(char) < 127 else 556 for char in text) * font_size / 1000
+
+
+def _pdf_string(text: str):
+    encoded = text.encode('cp1252', errors='replace')
+    return b'(' + encoded.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+class Watermark:
+    # the stamp is written once as a Form XObject; every page only gets a reference to it in its resources
+    # and a shared "q" stream and placement stream (one per page size) around its existing content
+    def __init__(self, pdf_writer: StreamingPdfWriter, text: str = None, image_file: str = None, opacity: float = 0.3,
+                 font_size: float = 48, angle: float = 45, scale: float = 0.5, pages: set = None):
+        if not text and not image_file:
+            raise ValueError('A watermark needs a text or an image')
+        self.pdf_writer = pdf_writer
+        self.angle = angle
+        self.scale = scale
+        self.pages = pages
+        self.is_image = not text
+        self.form = self._image_form(image_file, opacity) if self.is_image else self._text_form(text, opacity, font_size)
+        self.save_state = pdf_writer.add_object(_stream(b'q\n'))
+        self.placements = {}
+        self.resources = {}
+
+    def _graphics_state(self, opacity: float):
+        return DictionaryObject({
+            _name('/GS0'): DictionaryObject({
+                _name('/Type'): _name('/ExtGState'),
+                _name('/ca'): FloatObject(opacity),
+                _name('/CA'): FloatObject(opacity),
+            }),
+        })
+
+    def _text_form(self, text: str, opacity: float, font_size: float):
+        self.width, self.height = text_width(text, font_size), font_size
+        # the baseline sits a fifth of the size up so descenders stay inside the box
+        content = (f'/GS0 gs 0.5 g BT /F0 {_number(font_size)} Tf 0 {_number(font_size * 0.2)} Td '.encode()
+                   + _pdf_string(text) + b' Tj ET')
+        font = DictionaryObject({
+            _name('/Type'): _name('/Font'),
+            _name('/Subtype'): _name('/Type1'),
+            _name('/BaseFont'): _name('/Helvetica'),
+            _name('/Encoding'): _name('/WinAnsiEncoding'),
+        })
+        resources = DictionaryObject({
+            _name('/Font'): DictionaryObject({_name('/F0'): self.pdf_writer.add_object(font)}),
+            _name('/ExtGState'): self._graphics_state(opacity),
+        })
+        return self._form(content, resources)
+
+    def _image_form(self, image_file: str, opacity: float):
+        if Image is None:
+            raise ValueError('Image watermarks need Pillow')
+        with Image.open(image_file) as image:
+            self.width, self.height = image.size
+            if image.format == 'JPEG' and image.mode in ('RGB', 'L'):
+                # JPEGs are embedded as they are, without decoding
+                image_stream = EncodedStreamObject()
+                with open(image_file, 'rb') as file:
+                    image_stream._data = file.read()
+                image_stream[_name('/Filter')] = _name('/DCTDecode')
+                color_space = '/DeviceRGB' if image.mode == 'RGB' else '/DeviceGray'
+            else:
+                alpha = image.getchannel('A') if 'A' in image.getbands() else None
+                image = image.convert('RGB')
+                image_stream = EncodedStreamObject()
+                image_stream._data = zlib.compress(image.tobytes())
+                image_stream[_name('/Filter')] = _name('/FlateDecode')
+                color_space = '/DeviceRGB'
+                if alpha is not None:
+                    image_stream[_name('/SMask')] = self._soft_mask(alpha)
+
+        for key, value in {'/Type': _name('/XObject'), '/Subtype': _name('/Image'), '/Width': NumberObject(self.width),
+                           '/Height': NumberObject(self.height), '/ColorSpace': _name(color_space),
+                           '/BitsPerComponent': NumberObject(8)}.items():
+            image_stream[_name(key)] = value
+        content = f'/GS0 gs {self.width} 0 0 {self.height} 0 0 cm /Im0 Do'.encode()
+        resources = DictionaryObject({
+            _name('/XObject'): DictionaryObject({_name('/Im0'): self.pdf_writer.add_object(image_stream)}),
+            _name('/ExtGState'): self._graphics_state(opacity),
+        })
+        return self._form(content, resources)
+
+    def _soft_mask(self, alpha):
+        mask = EncodedStreamObject()
+        mask._data = zlib.compress(alpha.tobytes())
+        for key, value in {'/Type': _name('/XObject'), '/Subtype': _name('/Image'), '/Width': NumberObject(alpha.width),
+                           '/Height': NumberObject(alpha.height), '/ColorSpace': _name('/DeviceGray'),
+                           '/BitsPerComponent': NumberObject(8), '/Filter': _name('/FlateDecode')}.items():
+            mask[_name(key)] = value
+        return self.pdf_writer.add_object(mask)
+
+    def _form(self, content: bytes, resources: DictionaryObject):
+        return self.pdf_writer.add_object(_stream(content, {
+            '/Type': _name('/XObject'),
+            '/Subtype': _name('/Form'),
+            '/BBox': ArrayObject(FloatObject(value) for value in (0, 0, self.width, self.height)),
+            '/Resources': resources,
+        }))
+
+    def _placement(self, media_box):
+        # closes the page's own graphics state and draws the form centered and rotated on the page
+        box = tuple(round(float(value), 2) for value in (media_box.left, media_box.bottom, media_box.width, media_box.height))
+        if box not in self.placements:
+            left, bottom, width, height = box
+            # images are scaled to a share of the page width, text keeps its font size
+            scale = width * self.scale / self.width if self.is_image else 1
+            cos, sin = math.cos(math.radians(self.angle)), math.sin(math.radians(self.angle))
+            matrix = (scale * cos, scale * sin, -scale * sin, scale * cos,
+                      left + width / 2 - scale * (self.width / 2 * cos - self.height / 2 * sin),
+                      bottom + height / 2 - scale * (self.width / 2 * sin + self.height / 2 * cos))
+            content = f'Q q {" ".join(_number(value) for value in matrix)} cm {WATERMARK_NAME} Do Q'.encode()
+            self.placements[box] = self.pdf_writer.add_object(_stream(content))
+        return self.placements[box]
+
+    def _page_resources(self, page):
+        resources = page.raw_get('/Resources') if '/Resources' in page else None
+        key = (resources.idnum, resources.generation) if isinstance(resources, IndirectObject) else None
+        if key in self.resources:
+            # pages sharing a resource dictionary share the stamped copy too
+            return self.resources[key]
+
+        source = resources.get_object() if resources is not None else DictionaryObject()
+        stamped = DictionaryObject({_name(name): self.pdf_writer.copy_object(value)
+                                    for name, value in source.items() if name != '/XObject'})
+        xobjects = DictionaryObject({_name(name): self.pdf_writer.copy_object(value)
+                                     for name, value in (source['/XObject'] if '/XObject' in source else {}).items()})
+        xobjects[_name(WATERMARK_NAME)] = self.form
+        stamped[_name('/XObject')] = xobjects
+        if key is not None:
+            stamped = self.resources[key] = self.pdf_writer.add_object(stamped)
+        return stamped
+
+    def __call__(self, page_index: int, page):
+        if self.pages is not None and page_index not in self.pages:
+            return {}
+        contents = page.raw_get('/Contents') if '/Contents' in page else None
+        if isinstance(contents, IndirectObject) and isinstance(contents.get_object(), ArrayObject):
+            contents = contents.get_object()
+        contents = list(contents) if isinstance(contents, ArrayObject) else [contents] if contents is not None else []
+        return {
+            '/Resources': self._page_resources(page),
+            '/Contents': ArrayObject([self.save_state] + [self.pdf_writer.copy_object(content) for content in contents]
+                                     + [self._placement(page.mediabox)]),
+        }
@@ -1,56 +1,385 @@
 import os
+import time
+import uuid
+import queue
+from collections import OrderedDict, deque
 from pathlib import Path
+from threading import Event, Lock
 from PyQt6.QtWidgets import (QWidget, QLabel, QPushButton, QLineEdit, QFileDialog, 
-                             QComboBox, QListWidget, QAbstractItemView, QStyledItemDelegate,
-                             QMenuBar, QTableWidget, QTableWidgetItem, QHBoxLayout, QVBoxLayout)
-from PyQt6.QtGui import QKeySequence, QShortcut, QColor
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
-from pdf_utility import PDFUtility
+                             QComboBox, QListView, QAbstractItemView, QStyledItemDelegate,
+                             QMenuBar, QTableView, QHBoxLayout, QVBoxLayout,
+                             QSpinBox, QProgressBar, QInputDialog)
+from PyQt6.QtGui import QKeySequence, QShortcut, QColor, QImage, QPixmap
+from PyQt6.QtCore import (Qt, QAbstractTableModel, QBuffer, QIODevice, QModelIndex, QObject, QRunnable, QSize, QSizeF,
+                          QThread, QThreadPool, QTimer, pyqtSignal)
+from PyQt6.QtPdf import QPdfDocument
+from pdf_utility import (PDFUtility, OperationCancelled, describe_event, init_pdf_job_worker, parse_page_ranges,
+                         pool_context, process_pool, run_pdf_job)
+from pdf_utility.file_scan import is_pdf, scan_pdfs
+from pdf_utility.instrumentation import ThrottledObserver
+from pdf_utility.job_journal import DEFAULT_JOURNAL_PATH, job_journal, run_journaled_job
+from pdf_utility.metadata_cache import default_metadata_cache
+from pdf_utility.thumbnail_cache import default_thumbnail_cache
+
+def selected_rows(view):
+    # reads the selection ranges instead of selectedRows(), which builds one index per selected row
+    return [row for selection_range in view.selectionModel().selection()
+            for row in range(selection_range.top(), selection_range.bottom() + 1)]
 
 def check_if_file_exists(file_path):
     if not os.path.exists(file_path):
         return False
     return True
 
-class EncryptPDFThread(QThread):
+class PDFOperationThread(QThread):
+    input_progress = pyqtSignal(int, int)
+    page_progress = pyqtSignal(int, int)
+    event = pyqtSignal(object)
     finished = pyqtSignal(str)
 
-    def __init__(self, target_file: str, password: str, pdf_utility: PDFUtility, parent=None):
+    def __init__(self, pdf_utility: PDFUtility, parent=None):
         super().__init__(parent)
-        self.target_file = Path(target_file)
-        self.password = password
+        # subclasses define operation(), the work run() does off the GUI thread
+        if not callable(getattr(self, 'operation', None)):
+            raise TypeError(f'{type(self).__name__} does not define operation()')
         self.pdf_utility = pdf_utility
+        self.pdf_utility.observer = ThrottledObserver(self.event.emit)
+        self.cancel_event = Event()
+        self.result = None
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def on_progress(self, stage, done, total):
+        # called from the worker thread, signals are queued to the GUI thread
+        if stage == 'input':
+            self.input_progress.emit(done, total)
+        else:
+            self.page_progress.emit(done, total)
 
     def run(self):
         try:
-            # Generate the encrypted file name
-            original_file_path = Path(self.target_file)
-            encrypted_file_name = original_file_path.stem + '_encrypted.pdf'
-            encrypted_file_path = original_file_path.parent / encrypted_file_name
-            
-            # Perform the encryption
-            self.pdf_utility.encrypt_pdf(self.target_file, self.password, encrypted_file_path)
-            
-            # Emit the finished signal with the encrypted file name
-            self.finished.emit('Success')            
+            self.result = self.operation()
+            self.finished.emit('Success')
+        except OperationCancelled:
+            self.finished.emit('Cancelled')
         except Exception as e:
             self.finished.emit(str(e))
 
-class DecryptPDFThread(QThread):
-    finished = pyqtSignal(str)
+class MergePDFThread(PDFOperationThread):
+    def __init__(self, pdf_files: list, output_file: str, pdf_utility: PDFUtility, page_ranges: list = None,
+                 parent=None):
+        super().__init__(pdf_utility, parent)
+        self.pdf_files = pdf_files
+        self.output_file = output_file
+        self.page_ranges = page_ranges
+
+    def operation(self):
+        # whole files go through PdfMerger, which keeps their bookmarks and reports progress per input; with
+        # page ranges merge_pdfs streams the selected pages and reports every page
+        self.pdf_utility.merge_pdfs(self.pdf_files, self.output_file, progress_callback=self.on_progress,
+                                    cancel_event=self.cancel_event, page_ranges=self.page_ranges)
+
+class SplitPDFThread(PDFOperationThread):
+    def __init__(self, input_file: str, output_dir: str, split_type: str, custom_pages: str,
+                 pdf_utility: PDFUtility, max_bytes: int = None, max_pages: int = None, workers: int = 1,
+                 parent=None):
+        super().__init__(pdf_utility, parent)
+        self.input_file = input_file
+        self.output_dir = output_dir
+        self.split_type = split_type
+        self.custom_pages = custom_pages
+        self.max_bytes = max_bytes
+        self.max_pages = max_pages
+        self.workers = workers
+
+    def operation(self):
+        self.pdf_utility.split_pdf(self.input_file, self.output_dir, self.split_type, self.custom_pages,
+                                   workers=self.workers,
+                                   progress_callback=self.on_progress, cancel_event=self.cancel_event,
+                                   max_bytes=self.max_bytes, max_pages=self.max_pages)
+
+class CompressPDFThread(PDFOperationThread):
+    def __init__(self, input_file: str, output_file: str, level: int, image_dpi: int, image_quality: int,
+                 pdf_utility: PDFUtility, workers: int = 1, parent=None):
+        super().__init__(pdf_utility, parent)
+        self.input_file = input_file
+        self.output_file = output_file
+        self.level = level
+        self.image_dpi = image_dpi
+        self.image_quality = image_quality
+        self.workers = workers
+
+    def operation(self):
+        return self.pdf_utility.compress_pdf(self.input_file, self.output_file, self.level, self.image_dpi,
+                                             self.image_quality, workers=self.workers,
+                                             progress_callback=self.on_progress, cancel_event=self.cancel_event)
+
+class MetadataThread(QThread):
+    loaded = pyqtSignal(str, object)
+
+    def __init__(self, file_paths: list, metadata_cache, parent=None):
+        super().__init__(parent)
+        self.file_paths = deque(file_paths)
+        self.metadata_cache = metadata_cache
+        self.lock = Lock()
+        self.closed = False
+
+    def enqueue(self, file_paths: list):
+        # folder scans deliver files batch by batch, they join the running thread instead of starting one each
+        with self.lock:
+            if self.closed:
+                return False
+            self.file_paths.extend(file_paths)
+            return True
 
-    def __init__(self, target_file: str, password: str, pdf_utility: PDFUtility, parent=None):       
+    def run(self):
+        while True:
+            with self.lock:
+                if not self.file_paths:
+                    self.closed = True
+                    return
+                file_path = self.file_paths.popleft()
+            try:
+                metadata = self.metadata_cache.get(file_path)
+            except Exception:
+                metadata = None
+            self.loaded.emit(file_path, metadata)
+
+class FileScanThread(QThread):
+    found = pyqtSignal(list)
+
+    def __init__(self, paths: list, limit: int = None, batch_size: int = 1000, interval: float = 0.1, parent=None):
         super().__init__(parent)
-        self.target_file = Path(target_file)
-        self.password = password
-        self.pdf_utility = pdf_utility
+        self.paths = paths
+        self.limit = limit
+        self.batch_size = batch_size
+        self.interval = interval
+        self.cancel_event = Event()
+        self.count = 0
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def run(self):
+        # folders are walked and files checked for a PDF header here; results go out in batches, at most every
+        # interval, so the model inserts and the view lays out a few times a second however large the tree is
+        batch = []
+        last_emit = time.monotonic()
+        for file_path in scan_pdfs(self.paths, self.cancel_event):
+            batch.append(file_path)
+            self.count += 1
+            if self.limit is not None and self.count >= self.limit:
+                break
+            if len(batch) >= self.batch_size or time.monotonic() - last_emit >= self.interval:
+                self.found.emit(batch)
+                batch = []
+                last_emit = time.monotonic()
+        if batch and not self.cancel_event.is_set():
+            self.found.emit(batch)
+
+class ThumbnailJob(QRunnable):
+    def __init__(self, renderer):
+        super().__init__()
+        self.renderer = renderer
 
     def run(self):
+        self.renderer.work()
+
+class ThumbnailRenderer(QObject):
+    # page images for the file lists: an in-memory LRU in front of the disk cache, misses rendered with
+    # QtPdf on a thread pool. Requests come from the rows being painted and the most recent is served
+    # first, rows scrolled past long ago fall off the queue
+    rendered = pyqtSignal(str, int, int)
+    loaded = pyqtSignal(object, object)
+
+    def __init__(self, thumbnail_cache, max_images: int = 1024, max_pending: int = 128, parent=None):
+        super().__init__(parent)
+        self.thumbnail_cache = thumbnail_cache
+        self.max_images = max_images
+        self.max_pending = max_pending
+        self.images = OrderedDict()
+        self.placeholders = {}
+        self.failed = set()
+        self.pending = deque()
+        self.queued = set()
+        self.workers = 0
+        self.lock = Lock()
+        self.pool = QThreadPool(self)
+        # QtPdf renders one page at a time, more threads only overlap cache reads and PNG encoding
+        self.pool.setMaxThreadCount(min(os.cpu_count() or 1, 4))
+        self.loaded.connect(self.on_loaded)
+
+    def thumbnail(self, path: str, page: int, width: int):
+        # the image if it is in memory, otherwise a blank one of the same size while it is loaded
+        request = (path, page, width)
+        image = self.images.get(request)
+        if image is not None:
+            self.images.move_to_end(request)
+            return image
+        if request not in self.failed:
+            self.schedule(request)
+        if width not in self.placeholders:
+            placeholder = QImage(width, width, QImage.Format.Format_ARGB32_Premultiplied)
+            placeholder.fill(Qt.GlobalColor.transparent)
+            self.placeholders[width] = placeholder
+        return self.placeholders[width]
+
+    def schedule(self, request: tuple):
+        with self.lock:
+            if request in self.queued:
+                # painted again, so it is on screen: serve it before older requests
+                if request in self.pending:
+                    self.pending.remove(request)
+                    self.pending.append(request)
+                return
+            self.queued.add(request)
+            self.pending.append(request)
+            while len(self.pending) > self.max_pending:
+                self.queued.discard(self.pending.popleft())
+            start = self.workers < self.pool.maxThreadCount()
+            if start:
+                self.workers += 1
+        if start:
+            self.pool.start(ThumbnailJob(self))
+
+    def work(self):
+        while True:
+            with self.lock:
+                if not self.pending:
+                    self.workers -= 1
+                    return
+                request = self.pending.pop()
+            try:
+                image = self.load(*request)
+            except Exception:
+                image = None
+            with self.lock:
+                self.queued.discard(request)
+            self.loaded.emit(request, image)
+
+    def load(self, path: str, page: int, width: int):
         try:
-            self.pdf_utility.decrypt_pdf(self.target_file, self.password)
-            self.finished.emit('Success')
-        except Exception as e:
-            self.finished.emit(str(e))
+            key = self.thumbnail_cache.key(path, page, width)
+        except OSError:
+            return None
+        data = self.thumbnail_cache.get(key)
+        if data is not None:
+            image = QImage()
+            if image.loadFromData(data, 'PNG'):
+                return image
+
+        document = QPdfDocument(None)
+        try:
+            # encrypted files with a password are left without a thumbnail
+            if document.load(path) != QPdfDocument.Error.None_ or page >= document.pageCount():
+                return None
+            size = document.pagePointSize(page).scaled(QSizeF(width, width), Qt.AspectRatioMode.KeepAspectRatio)
+            image = document.render(page, size.toSize())
+        finally:
+            document.close()
+        if image.isNull():
+            return None
+
+        buffer = QBuffer()
+        buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+        image.save(buffer, 'PNG')
+        self.thumbnail_cache.put(key, bytes(buffer.data()))
+        return image
+
+    def on_loaded(self, request, image):
+        if image is None:
+            self.failed.add(request)
+            return
+        self.images[request] = image
+        while len(self.images) > self.max_images:
+            self.images.popitem(last=False)
+        self.rendered.emit(*request)
+
+class PDFJobScheduler(QObject):
+    # job ids are the input file paths, rows shift when the list changes
+    job_started = pyqtSignal(str)
+    job_finished = pyqtSignal(str, str)
+    job_event = pyqtSignal(object)
+    all_finished = pyqtSignal()
+    _future_done = pyqtSignal(str, str)
+
+    def __init__(self, max_workers: int = None, parent=None):
+        super().__init__(parent)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.executor = None
+        self.events = None
+        self.queue = deque()
+        self.running = {}
+        self._future_done.connect(self._on_future_done)
+        # workers put instrumentation events on a process queue, polled here on the GUI thread
+        self.event_timer = QTimer(self)
+        self.event_timer.setInterval(100)
+        self.event_timer.timeout.connect(self._drain_events)
+
+    def is_busy(self):
+        return bool(self.queue or self.running)
+
+    def submit(self, job_id: str, operation: str, *args):
+        self.submit_call(job_id, run_pdf_job, operation, *args)
+
+    def submit_call(self, job_id: str, function, *args, **kwargs):
+        # function must be picklable, i.e. defined at module level
+        self.queue.append((job_id, function, args, kwargs))
+        self._dispatch()
+
+    def cancel(self):
+        # queued jobs are dropped, jobs already handed to a worker run to completion
+        cancelled = bool(self.queue)
+        while self.queue:
+            job_id = self.queue.popleft()[0]
+            self.job_finished.emit(job_id, 'Cancelled')
+        if cancelled and not self.running:
+            self._shutdown()
+
+    def _dispatch(self):
+        if self.executor is None:
+            # process workers so CPU-bound crypto is not serialized by the GIL
+            self.events = pool_context().Queue()
+            self.executor = process_pool(self.max_workers, init_pdf_job_worker, (self.events,))
+            self.event_timer.start()
+
+        while self.queue and len(self.running) < self.max_workers:
+            job_id, function, args, kwargs = self.queue.popleft()
+            future = self.executor.submit(function, *args, **kwargs)
+            self.running[job_id] = future
+            self.job_started.emit(job_id)
+            # done callbacks fire on the executor's thread, the signal hops back to the GUI thread
+            future.add_done_callback(lambda future, job_id=job_id: self._future_done.emit(job_id, self._result_text(future)))
+
+    def _result_text(self, future):
+        if future.cancelled():
+            return 'Cancelled'
+        error = future.exception()
+        return 'Success' if error is None else str(error)
+
+    def _on_future_done(self, job_id, result):
+        self.running.pop(job_id, None)
+        self.job_finished.emit(job_id, result)
+        if self.queue:
+            self._dispatch()
+        elif not self.running:
+            self._shutdown()
+
+    def _drain_events(self):
+        while self.events is not None:
+            try:
+                self.job_event.emit(self.events.get_nowait())
+            except queue.Empty:
+                break
+
+    def _shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+            self.event_timer.stop()
+            self.events = None
+        self.all_finished.emit()
 
 class GridLineDelegate(QStyledItemDelegate):
     def paint(self, painter, option, index):
@@ -70,11 +399,224 @@ class GridLineDelegate(QStyledItemDelegate):
         
         painter.restore()
 
+class PDFFileListModel(QAbstractTableModel):
+    # one path per row; status and metadata live in dicts keyed by path and are only turned into text
+    # when a view asks for a visible cell, so adding or removing rows never creates per-cell objects
+    COLUMNS = {'path': 'PDF File', 'status': 'Status', 'pages': 'Pages', 'encrypted': 'Encrypted',
+               'page_ranges': 'Selected Pages'}
+
+    def __init__(self, columns=('path',), movable: bool = False, parent=None):
+        super().__init__(parent)
+        self.columns = list(columns)
+        self.movable = movable
+        self.paths = []
+        self.rows = {}
+        self.statuses = {}
+        self.metadata = {}
+        self.page_ranges = {}
+        self.thumbnails = None
+        self.thumbnail_width = 0
+
+    def set_thumbnails(self, renderer: ThumbnailRenderer, width: int):
+        # the first page of each row (of its page selection, if any) is shown next to the path; only
+        # rows a view paints ask for theirs
+        self.thumbnails = renderer
+        self.thumbnail_width = width
+        renderer.rendered.connect(self.on_thumbnail_rendered)
+
+    def on_thumbnail_rendered(self, path: str, page: int, width: int):
+        row = self.rows.get(path)
+        if row is not None and width == self.thumbnail_width:
+            index = self.index(row, self.columns.index('path'))
+            self.dataChanged.emit(index, index, [Qt.ItemDataRole.DecorationRole])
+
+    def first_page(self, row: int):
+        page_spec = self.page_spec(row)
+        return parse_page_ranges(page_spec)[0][0] - 1 if page_spec else 0
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.paths)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.COLUMNS[self.columns[section]]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        path = self.paths[index.row()]
+        column = self.columns[index.column()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == 'path':
+                # a list view only shows this column, so the page selection goes along with the path
+                if 'page_ranges' not in self.columns and path in self.page_ranges:
+                    return f'{path}  [pages {self.page_ranges[path]}]'
+                return path
+            if column == 'page_ranges':
+                return self.page_ranges.get(path, 'All')
+            if column == 'status':
+                return self.statuses.get(path, 'N/A')
+            metadata = self.metadata.get(path, '')
+            if not metadata:
+                return metadata
+            if column == 'pages':
+                return '?' if metadata['page_count'] is None else str(metadata['page_count'])
+            return 'Yes' if metadata['encrypted'] else 'No'
+        if role == Qt.ItemDataRole.DecorationRole and column == 'path' and self.thumbnails is not None:
+            return self.thumbnails.thumbnail(path, self.first_page(index.row()), self.thumbnail_width)
+        if role == Qt.ItemDataRole.ToolTipRole and column == 'path' and self.metadata.get(path):
+            metadata = self.metadata[path]
+            page_count = '?' if metadata['page_count'] is None else metadata['page_count']
+            encrypted = 'encrypted' if metadata['encrypted'] else 'not encrypted'
+            return f'{page_count} pages, {encrypted}, PDF {metadata["pdf_version"]}'
+        if role == Qt.ItemDataRole.TextAlignmentRole and column != 'path':
+            return Qt.AlignmentFlag.AlignCenter
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.ItemIsDropEnabled if self.movable else Qt.ItemFlag.NoItemFlags
+        flags = Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+        return flags | Qt.ItemFlag.ItemIsDragEnabled if self.movable else flags
+
+    def supportedDropActions(self):
+        return Qt.DropAction.MoveAction
+
+    def _reindex(self, start: int = 0):
+        for row in range(start, len(self.paths)):
+            self.rows[self.paths[row]] = row
+
+    def contains(self, path: str):
+        return path in self.rows
+
+    def path(self, row: int):
+        return self.paths[row]
+
+    def add_files(self, paths):
+        # one insert notification for the whole batch; returns the paths that were not in the list yet
+        new_paths = list(dict.fromkeys(path for path in paths if path not in self.rows))
+        if new_paths:
+            start = len(self.paths)
+            self.beginInsertRows(QModelIndex(), start, start + len(new_paths) - 1)
+            self.paths.extend(new_paths)
+            self._reindex(start)
+            self.endInsertRows()
+        return new_paths
+
+    def remove_rows(self, rows):
+        rows = sorted(set(rows))
+        if not rows:
+            return
+        ranges = []
+        for row in rows:
+            if ranges and ranges[-1][1] == row - 1:
+                ranges[-1][1] = row
+            else:
+                ranges.append([row, row])
+
+        removed = {self.paths[row] for row in rows}
+        if len(ranges) > 64:
+            # a scattered selection would mean one notification and list shift per range, rebuild instead
+            self.beginResetModel()
+            self.paths = [path for path in self.paths if path not in removed]
+            self._forget(removed)
+            self.endResetModel()
+            return
+        for first, last in reversed(ranges):
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self.paths[first:last + 1]
+            self.endRemoveRows()
+        self._forget(removed)
+
+    def _forget(self, paths: set):
+        for path in paths:
+            self.rows.pop(path, None)
+            self.statuses.pop(path, None)
+            self.metadata.pop(path, None)
+            self.page_ranges.pop(path, None)
+        self._reindex()
+
+    def clear(self):
+        self.beginResetModel()
+        self.paths = []
+        self.rows = {}
+        self.statuses = {}
+        self.metadata = {}
+        self.page_ranges = {}
+        self.endResetModel()
+
+    def _changed(self, row: int, column: str):
+        if column in self.columns:
+            index = self.index(row, self.columns.index(column))
+            self.dataChanged.emit(index, index)
+
+    def status(self, row: int):
+        return self.statuses.get(self.paths[row], 'N/A')
+
+    def set_status(self, row: int, status: str):
+        if 0 <= row < len(self.paths):
+            self.statuses[self.paths[row]] = status
+            self._changed(row, 'status')
+
+    def set_path_status(self, path: str, status: str):
+        # results of background jobs arrive by path, a row removed meanwhile is ignored
+        row = self.rows.get(path)
+        if row is not None:
+            self.set_status(row, status)
+
+    def page_spec(self, row: int):
+        return self.page_ranges.get(self.paths[row], '')
+
+    def set_page_spec(self, rows, page_spec: str):
+        # an empty spec takes the whole file again
+        for row in rows:
+            if page_spec:
+                self.page_ranges[self.paths[row]] = page_spec
+            else:
+                self.page_ranges.pop(self.paths[row], None)
+            self._changed(row, 'page_ranges' if 'page_ranges' in self.columns else 'path')
+
+    def set_metadata(self, path: str, metadata: dict):
+        row = self.rows.get(path)
+        if row is None or metadata is None:
+            return
+        self.metadata[path] = metadata
+        first, last = self.index(row, 0), self.index(row, len(self.columns) - 1)
+        self.dataChanged.emit(first, last)
+
+    def sort(self, column: int = 0, order=Qt.SortOrder.AscendingOrder):
+        self.beginResetModel()
+        self.paths.sort(reverse=order == Qt.SortOrder.DescendingOrder)
+        self._reindex()
+        self.endResetModel()
+
+    def moveRows(self, source_parent, source_row, count, destination_parent, destination_child):
+        # used by the view's internal drag and drop to reorder the list
+        if not self.beginMoveRows(source_parent, source_row, source_row + count - 1, destination_parent,
+                                  destination_child):
+            return False
+        moved = self.paths[source_row:source_row + count]
+        del self.paths[source_row:source_row + count]
+        if destination_child > source_row:
+            destination_child -= count
+        self.paths[destination_child:destination_child] = moved
+        self._reindex(min(source_row, destination_child))
+        self.endMoveRows()
+        return True
+
 class DecryptPDFWidget(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.parent = parent
         self.pdf_utility = PDFUtility()
+        self.scheduler = PDFJobScheduler(parent=self)
+        self.metadata_cache = default_metadata_cache()
+        self.metadata_threads = []
+        self.scan_threads = []
 
         self.setAcceptDrops(True)
         self.layout = {'main': QVBoxLayout()}
@@ -87,8 +629,9 @@ class DecryptPDFWidget(QWidget):
         self.label = {}
         self.button = {}
         self.lineedit = {}
-        self.tablewidget = {}
-        self.added_files = set()
+        self.tableview = {}
+        self.model = {}
+        self.spinbox = {}
 
     def init_ui(self):
         self._init_container()
@@ -103,13 +646,21 @@ class DecryptPDFWidget(QWidget):
         self.lineedit['pdf_password'].setPlaceholderText('Enter password')
         self.layout['password_input'].addWidget(self.lineedit['pdf_password'])
 
-        self.tablewidget['pdf_files'] = QTableWidget()
-        self.tablewidget['pdf_files'].setColumnCount(2)
-        self.tablewidget['pdf_files'].setHorizontalHeaderLabels(['PDF File', 'Status'])
-        self.tablewidget['pdf_files'].horizontalHeader().setStretchLastSection(True)
-        self.tablewidget['pdf_files'].setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
-        self.tablewidget['pdf_files'].setColumnWidth(0, 600)
-        self.layout['main'].addWidget(self.tablewidget['pdf_files'])
+        self.label['workers'] = QLabel('Workers:')
+        self.layout['password_input'].addWidget(self.label['workers'])
+
+        self.spinbox['workers'] = QSpinBox()
+        self.spinbox['workers'].setRange(1, 64)
+        self.spinbox['workers'].setValue(os.cpu_count() or 1)
+        self.layout['password_input'].addWidget(self.spinbox['workers'])
+
+        self.model['pdf_files'] = PDFFileListModel(('path', 'status', 'pages', 'encrypted'), parent=self)
+        self.tableview['pdf_files'] = QTableView()
+        self.tableview['pdf_files'].setModel(self.model['pdf_files'])
+        self.tableview['pdf_files'].horizontalHeader().setStretchLastSection(True)
+        self.tableview['pdf_files'].setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.tableview['pdf_files'].setColumnWidth(0, 600)
+        self.layout['main'].addWidget(self.tableview['pdf_files'])
 
         self.layout['buttons'] = QHBoxLayout()
         self.layout['main'].addLayout(self.layout['buttons'])
@@ -117,9 +668,15 @@ class DecryptPDFWidget(QWidget):
         self.button['add_pdf'] = QPushButton('&Add PDF')
         self.layout['buttons'].addWidget(self.button['add_pdf'])
 
+        self.button['add_folder'] = QPushButton('Add &Folder')
+        self.layout['buttons'].addWidget(self.button['add_folder'])
+
         self.button['decrypt_pdf'] = QPushButton('&Decrypt PDFs')
         self.layout['buttons'].addWidget(self.button['decrypt_pdf'])
 
+        self.button['cancel'] = QPushButton('Ca&ncel')
+        self.layout['buttons'].addWidget(self.button['cancel'])
+
         self.button['remove_pdf'] = QPushButton('&Remove PDF')
         self.layout['buttons'].addWidget(self.button['remove_pdf'])
 
@@ -128,12 +685,19 @@ class DecryptPDFWidget(QWidget):
 
     def config_signals(self):
         self.button['add_pdf'].clicked.connect(self.add_pdf)
+        self.button['add_folder'].clicked.connect(self.add_folder)
         self.button['decrypt_pdf'].clicked.connect(self.decrypt_pdf)
+        self.button['cancel'].clicked.connect(self.scheduler.cancel)
+        self.scheduler.job_started.connect(lambda path: self.model['pdf_files'].set_path_status(path, 'Running'))
+        self.scheduler.job_finished.connect(self.on_decrypt_pdf_finished)
+        self.scheduler.job_event.connect(lambda event: self.parent.status_bar.showMessage(describe_event(event)))
+        self.scheduler.all_finished.connect(lambda: self.parent.status_bar.showMessage('PDFs decrypted'))
+        self.scheduler.all_finished.connect(lambda: self.set_list_editable(True))
         self.button['remove_pdf'].clicked.connect(self.remove_selected_pdf)
         self.button['clear_list'].clicked.connect(self.clear_list)
 
     def decrypt_pdf(self):
-        if self.tablewidget['pdf_files'].rowCount() == 0:
+        if self.model['pdf_files'].rowCount() == 0:
             self.parent.status_bar.showMessage('No PDFs to decrypt')
             return
 
@@ -142,82 +706,109 @@ class DecryptPDFWidget(QWidget):
             self.parent.status_bar.showMessage('Enter password')
             return
 
-        self.threads = []  # Keep references to threads
+        if self.scheduler.is_busy():
+            self.parent.status_bar.showMessage('Decryption already in progress')
+            return
 
-        for row in range(self.tablewidget['pdf_files'].rowCount()):
-            file_path = self.tablewidget['pdf_files'].item(row, 0).text()
+        self.scheduler.max_workers = self.spinbox['workers'].value()
+        for row in range(self.model['pdf_files'].rowCount()):
+            file_path = self.model['pdf_files'].path(row)
             if not check_if_file_exists(file_path):
-                self.tablewidget['pdf_files'].item(row, 1).setText('File not found')
+                self.model['pdf_files'].set_status(row, 'File not found')
                 continue
 
-            # Create a thread for each PDF file
-            thread = DecryptPDFThread(file_path, password, self.pdf_utility)
-            thread.finished.connect(lambda result, row=row: self.on_decrypt_pdf_finished(result, row))
-            self.threads.append(thread)
-            thread.start()
-
-        self.parent.status_bar.showMessage('Encrypting PDFs...')
+            metadata = self.metadata_cache.peek(file_path)
+            if metadata is not None and not metadata['encrypted']:
+                self.model['pdf_files'].set_status(row, 'Not encrypted')
+                continue
 
-    def on_decrypt_pdf_finished(self, result, row):
-        # Handle the result of the decryption
-        if result == 'Success':
-            self.tablewidget['pdf_files'].item(row, 1).setText('Decrypted')
-        else:
-            self.tablewidget['pdf_files'].item(row, 1).setText(result)
+            self.model['pdf_files'].set_status(row, 'Queued')
+            self.scheduler.submit(file_path, 'decrypt_pdf', file_path, password)
 
-        # Check if all threads have finished
-        if all(not thread.isRunning() for thread in self.threads):
-            self.parent.status_bar.showMessage('PDFs decrypted')
+        if self.scheduler.is_busy():
+            self.set_list_editable(False)
+            self.parent.status_bar.showMessage('Decrypting PDFs...')
 
-    def on_encrypt_pdf_finished(self, result, row):
-        # Handle the result of the encryption
+    def on_decrypt_pdf_finished(self, file_path, result):
+        # Handle the result of the decryption
         if result == 'Success':
-            self.tablewidget['pdf_files'].item(row, 1).setText('Encrypted')
+            self.model['pdf_files'].set_path_status(file_path, 'Decrypted')
         else:
-            self.tablewidget['pdf_files'].item(row, 1).setText(result)
-
-        # Check if all threads have finished
-        if all(not thread.isRunning() for thread in self.threads):
-            self.parent.status_bar.showMessage('PDFs encrypted')
+            self.model['pdf_files'].set_path_status(file_path, result)
 
     def add_pdf(self):
         file_paths, _ = QFileDialog.getOpenFileNames(self, 'Add PDFs', '', 'PDF Files (*.pdf)')
         if file_paths:
-            for file_path in file_paths:
-                if file_path not in self.added_files:
-                    row_position = self.tablewidget['pdf_files'].rowCount()
-                    self.tablewidget['pdf_files'].insertRow(row_position)
-                    self.tablewidget['pdf_files'].setItem(row_position, 0, QTableWidgetItem(file_path))
-
-                    # status column
-                    item = QTableWidgetItem('N/A')
-                    item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-                    item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                    self.tablewidget['pdf_files'].setItem(row_position, 1, item)
-                    self.added_files.add(file_path)
+            # folder scans add real paths, so a file picked through a link is not listed twice
+            self.add_files([os.path.realpath(file_path) for file_path in file_paths])
             self.parent.status_bar.showMessage('PDFs added')
 
+    def add_folder(self):
+        directory = QFileDialog.getExistingDirectory(self, 'Add Folder')
+        if directory:
+            self.scan_paths([directory])
+
+    def scan_paths(self, paths):
+        thread = FileScanThread(paths)
+        thread.found.connect(lambda file_paths: self.on_files_found(thread, file_paths))
+        thread.finished.connect(lambda: self.on_scan_finished(thread))
+        self.scan_threads.append(thread)
+        thread.start()
+        self.parent.status_bar.showMessage('Scanning for PDFs...')
+
+    def on_files_found(self, thread, file_paths):
+        # a batch already queued when the list was cleared is dropped
+        if thread.cancel_event.is_set():
+            return
+        self.add_files(file_paths)
+        self.parent.status_bar.showMessage(f"Scanning for PDFs... {self.model['pdf_files'].rowCount()} listed")
+
+    def on_scan_finished(self, thread):
+        self.scan_threads.remove(thread)
+        if thread.cancel_event.is_set():
+            return
+        self.parent.status_bar.showMessage(f'{thread.count} PDFs found')
+
+    def add_files(self, file_paths):
+        new_files = self.model['pdf_files'].add_files(file_paths)
+        if new_files:
+            self.load_metadata(new_files)
+        return new_files
+
+    def load_metadata(self, file_paths):
+        # page count and encryption status are read (or fetched from the cache) off the GUI thread
+        if self.metadata_threads and self.metadata_threads[-1].enqueue(file_paths):
+            return
+        thread = MetadataThread(file_paths, self.metadata_cache)
+        thread.loaded.connect(self.model['pdf_files'].set_metadata)
+        thread.finished.connect(lambda: self.metadata_threads.remove(thread))
+        self.metadata_threads.append(thread)
+        thread.start()
+
+    def set_list_editable(self, editable: bool):
+        # files of a running batch stay listed until it is done, a worker may already be writing them
+        self.button['remove_pdf'].setEnabled(editable)
+        self.button['clear_list'].setEnabled(editable)
+
     def clear_list(self):
-        self.tablewidget['pdf_files'].setRowCount(0)
-        self.added_files.clear()
+        if self.scheduler.is_busy():
+            self.parent.status_bar.showMessage('Cancel the batch or wait for it to finish first')
+            return
+        for thread in self.scan_threads:
+            thread.cancel()
+        self.model['pdf_files'].clear()
         self.parent.status_bar.showMessage('Cleared')
 
     def remove_selected_pdf(self):
-        selected_items = self.tablewidget['pdf_files'].selectedItems()
-        if not selected_items:
+        if self.scheduler.is_busy():
+            self.parent.status_bar.showMessage('Cancel the batch or wait for it to finish first')
+            return
+        rows = selected_rows(self.tableview['pdf_files'])
+        if not rows:
             self.parent.status_bar.showMessage('No PDF selected to remove')
             return
 
-        rows_to_remove = set()
-        for item in selected_items:
-            row = self.tablewidget['pdf_files'].row(item)
-            rows_to_remove.add(row)
-            file_path = item.text()  # Retrieve file path before removing the item
-            self.added_files.discard(file_path)  # Remove the file path from the added_files set if needed
-
-        for row in sorted(rows_to_remove, reverse=True):
-            self.tablewidget['pdf_files'].removeRow(row)
-
+        self.model['pdf_files'].remove_rows(rows)
         self.parent.status_bar.showMessage('Selected PDFs removed')
 
     def dragEnterEvent(self, event):
@@ -228,21 +819,8 @@ class DecryptPDFWidget(QWidget):
 
     def dropEvent(self, event):
         if event.mimeData().hasUrls():
-            for url in event.mimeData().urls():
-                file_path = url.toLocalFile()
-                if file_path.endswith('.pdf'):
-                    if file_path not in self.added_files:
-                        row_position = self.tablewidget['pdf_files'].rowCount()
-
-                        self.tablewidget['pdf_files'].insertRow(row_position)
-                        self.tablewidget['pdf_files'].setItem(row_position, 0, QTableWidgetItem(file_path))
-                        self.added_files.add(file_path)
-
-                        # status column
-                        item = QTableWidgetItem('N/A')
-                        item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-                        item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                        self.tablewidget['pdf_files'].setItem(row_position, 1, item)
+            # dropped folders are walked in the background, files are checked by content rather than extension
+            self.scan_paths([url.toLocalFile() for url in event.mimeData().urls() if url.isLocalFile()])
         else:
             event.ignore()
 
@@ -251,6 +829,11 @@ class EncryptPDFWidget(QWidget):
         super().__init__(parent)
         self.parent = parent
         self.pdf_utility = PDFUtility()
+        self.scheduler = PDFJobScheduler(parent=self)
+        self.metadata_cache = default_metadata_cache()
+        self.journal = job_journal(DEFAULT_JOURNAL_PATH)
+        self.metadata_threads = []
+        self.scan_threads = []
 
         self.setAcceptDrops(True)
         self.layout = {'main': QVBoxLayout()}
@@ -263,8 +846,9 @@ class EncryptPDFWidget(QWidget):
         self.label = {}
         self.button = {}
         self.lineedit = {}
-        self.tablewidget = {}
-        self.added_files = set()
+        self.tableview = {}
+        self.model = {}
+        self.spinbox = {}
 
     def init_ui(self):
         self._init_container()
@@ -279,13 +863,21 @@ class EncryptPDFWidget(QWidget):
         self.lineedit['pdf_password'].setPlaceholderText('Enter password')
         self.layout['password_input'].addWidget(self.lineedit['pdf_password'])
 
-        self.tablewidget['pdf_files'] = QTableWidget()
-        self.tablewidget['pdf_files'].setColumnCount(2)
-        self.tablewidget['pdf_files'].setHorizontalHeaderLabels(['PDF File', 'Status'])
-        self.tablewidget['pdf_files'].horizontalHeader().setStretchLastSection(True)
-        self.tablewidget['pdf_files'].setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
-        self.tablewidget['pdf_files'].setColumnWidth(0, 600)
-        self.layout['main'].addWidget(self.tablewidget['pdf_files'])
+        self.label['workers'] = QLabel('Workers:')
+        self.layout['password_input'].addWidget(self.label['workers'])
+
+        self.spinbox['workers'] = QSpinBox()
+        self.spinbox['workers'].setRange(1, 64)
+        self.spinbox['workers'].setValue(os.cpu_count() or 1)
+        self.layout['password_input'].addWidget(self.spinbox['workers'])
+
+        self.model['pdf_files'] = PDFFileListModel(('path', 'status', 'pages', 'encrypted'), parent=self)
+        self.tableview['pdf_files'] = QTableView()
+        self.tableview['pdf_files'].setModel(self.model['pdf_files'])
+        self.tableview['pdf_files'].horizontalHeader().setStretchLastSection(True)
+        self.tableview['pdf_files'].setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.tableview['pdf_files'].setColumnWidth(0, 600)
+        self.layout['main'].addWidget(self.tableview['pdf_files'])
 
         self.layout['buttons'] = QHBoxLayout()
         self.layout['main'].addLayout(self.layout['buttons'])
@@ -293,9 +885,18 @@ class EncryptPDFWidget(QWidget):
         self.button['add_pdf'] = QPushButton('&Add PDF')
         self.layout['buttons'].addWidget(self.button['add_pdf'])
 
+        self.button['add_folder'] = QPushButton('Add &Folder')
+        self.layout['buttons'].addWidget(self.button['add_folder'])
+
         self.button['encrypt_pdf'] = QPushButton('&Encrypt PDFs')
         self.layout['buttons'].addWidget(self.button['encrypt_pdf'])
 
+        self.button['resume_batch'] = QPushButton('Re&sume Batch')
+        self.layout['buttons'].addWidget(self.button['resume_batch'])
+
+        self.button['cancel'] = QPushButton('Ca&ncel')
+        self.layout['buttons'].addWidget(self.button['cancel'])
+
         self.button['remove_pdf'] = QPushButton('&Remove PDF')
         self.layout['buttons'].addWidget(self.button['remove_pdf'])
 
@@ -305,12 +906,20 @@ class EncryptPDFWidget(QWidget):
 
     def config_signals(self):
         self.button['add_pdf'].clicked.connect(self.add_pdf)
+        self.button['add_folder'].clicked.connect(self.add_folder)
         self.button['encrypt_pdf'].clicked.connect(self.encrypt_pdf)
+        self.button['resume_batch'].clicked.connect(self.resume_batch)
+        self.button['cancel'].clicked.connect(self.scheduler.cancel)
+        self.scheduler.job_started.connect(lambda path: self.model['pdf_files'].set_path_status(path, 'Running'))
+        self.scheduler.job_finished.connect(self.on_encrypt_pdf_finished)
+        self.scheduler.job_event.connect(lambda event: self.parent.status_bar.showMessage(describe_event(event)))
+        self.scheduler.all_finished.connect(lambda: self.parent.status_bar.showMessage('PDFs encrypted'))
+        self.scheduler.all_finished.connect(lambda: self.set_list_editable(True))
         self.button['remove_pdf'].clicked.connect(self.remove_selected_pdf)
         self.button['clear_list'].clicked.connect(self.clear_list)
 
     def encrypt_pdf(self):
-        if self.tablewidget['pdf_files'].rowCount() == 0:
+        if self.model['pdf_files'].rowCount() == 0:
             self.parent.status_bar.showMessage('No PDFs to encrypt')
             return
 
@@ -319,71 +928,135 @@ class EncryptPDFWidget(QWidget):
             self.parent.status_bar.showMessage('Enter password')
             return
 
-        self.threads = []  # Keep references to threads
+        if self.scheduler.is_busy():
+            self.parent.status_bar.showMessage('Encryption already in progress')
+            return
 
-        for row in range(self.tablewidget['pdf_files'].rowCount()):
-            file_path = self.tablewidget['pdf_files'].item(row, 0).text()
+        self.scheduler.max_workers = self.spinbox['workers'].value()
+        params = {'password': password}
+        jobs = []
+        skipped = 0
+        for row in range(self.model['pdf_files'].rowCount()):
+            file_path = self.model['pdf_files'].path(row)
             if not check_if_file_exists(file_path):
-                self.tablewidget['pdf_files'].item(row, 1).setText('File not found')
+                self.model['pdf_files'].set_status(row, 'File not found')
                 continue
 
-            # Create a thread for each PDF file
-            thread = EncryptPDFThread(file_path, password, self.pdf_utility)
-            thread.finished.connect(lambda result, row=row: self.on_encrypt_pdf_finished(result, row))
-            self.threads.append(thread)  # Keep a reference to the thread
-            thread.start()
+            # Generate the encrypted file name
+            original_file_path = Path(file_path)
+            encrypted_file_path = str(original_file_path.parent / (original_file_path.stem + '_encrypted.pdf'))
 
-        self.parent.status_bar.showMessage('Encrypting PDFs...')
+            # jobs the journal shows done, with their input and output unchanged, are not run again
+            if self.journal.is_done('encrypt_pdf', file_path, encrypted_file_path, params, verify_hash=False):
+                self.model['pdf_files'].set_status(row, 'Already encrypted')
+                skipped += 1
+                continue
+            jobs.append((row, file_path, encrypted_file_path))
+
+        batch = uuid.uuid4().hex
+        self.journal.add_pending(batch, 'encrypt_pdf', [(file_path, output_file) for _, file_path, output_file in jobs],
+                                 params)
+        for row, file_path, output_file in jobs:
+            self.model['pdf_files'].set_status(row, 'Queued')
+            self.scheduler.submit_call(file_path, run_journaled_job, DEFAULT_JOURNAL_PATH, batch, 'encrypt_pdf',
+                                       file_path, output_file, **params)
+
+        if self.scheduler.is_busy():
+            self.set_list_editable(False)
+            self.parent.status_bar.showMessage(f'Encrypting {len(jobs)} PDFs, {skipped} already encrypted...')
+        elif skipped:
+            self.parent.status_bar.showMessage(f'All {skipped} PDFs already encrypted')
+
+    def resume_batch(self):
+        # lists the pending and failed files of the last batch again, e.g. after a crash
+        file_paths = [file_path for file_path in self.journal.unfinished('encrypt_pdf')
+                      if check_if_file_exists(file_path)]
+        new_files = self.add_files(file_paths)
+        if not new_files:
+            self.parent.status_bar.showMessage('No unfinished batch to resume')
+            return
+        self.parent.status_bar.showMessage(f'{len(new_files)} unfinished PDFs added, enter the password to resume')
 
-    def on_encrypt_pdf_finished(self, result, row):
+    def on_encrypt_pdf_finished(self, file_path, result):
         # Handle the result of the encryption
         if result == 'Success':
-            self.tablewidget['pdf_files'].item(row, 1).setText('Encrypted')
+            self.model['pdf_files'].set_path_status(file_path, 'Encrypted')
         else:
-            self.tablewidget['pdf_files'].item(row, 1).setText(result)
-
-        # Check if all threads have finished
-        if all(not thread.isRunning() for thread in self.threads):
-            self.parent.status_bar.showMessage('PDFs encrypted')
+            self.model['pdf_files'].set_path_status(file_path, result)
 
     def add_pdf(self):
         file_paths, _ = QFileDialog.getOpenFileNames(self, 'Add PDFs', '', 'PDF Files (*.pdf)')
         if file_paths:
-            for file_path in file_paths:
-                if file_path not in self.added_files:
-                    row_position = self.tablewidget['pdf_files'].rowCount()
-                    self.tablewidget['pdf_files'].insertRow(row_position)
-                    self.tablewidget['pdf_files'].setItem(row_position, 0, QTableWidgetItem(file_path))
-
-                    # status column
-                    item = QTableWidgetItem('N/A')
-                    item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-                    item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                    self.tablewidget['pdf_files'].setItem(row_position, 1, item)
-                    self.added_files.add(file_path)
+            # folder scans add real paths, so a file picked through a link is not listed twice
+            self.add_files([os.path.realpath(file_path) for file_path in file_paths])
             self.parent.status_bar.showMessage('PDFs added')
 
+    def add_folder(self):
+        directory = QFileDialog.getExistingDirectory(self, 'Add Folder')
+        if directory:
+            self.scan_paths([directory])
+
+    def scan_paths(self, paths):
+        thread = FileScanThread(paths)
+        thread.found.connect(lambda file_paths: self.on_files_found(thread, file_paths))
+        thread.finished.connect(lambda: self.on_scan_finished(thread))
+        self.scan_threads.append(thread)
+        thread.start()
+        self.parent.status_bar.showMessage('Scanning for PDFs...')
+
+    def on_files_found(self, thread, file_paths):
+        # a batch already queued when the list was cleared is dropped
+        if thread.cancel_event.is_set():
+            return
+        self.add_files(file_paths)
+        self.parent.status_bar.showMessage(f"Scanning for PDFs... {self.model['pdf_files'].rowCount()} listed")
+
+    def on_scan_finished(self, thread):
+        self.scan_threads.remove(thread)
+        if thread.cancel_event.is_set():
+            return
+        self.parent.status_bar.showMessage(f'{thread.count} PDFs found')
+
+    def add_files(self, file_paths):
+        new_files = self.model['pdf_files'].add_files(file_paths)
+        if new_files:
+            self.load_metadata(new_files)
+        return new_files
+
+    def load_metadata(self, file_paths):
+        # page count and encryption status are read (or fetched from the cache) off the GUI thread
+        if self.metadata_threads and self.metadata_threads[-1].enqueue(file_paths):
+            return
+        thread = MetadataThread(file_paths, self.metadata_cache)
+        thread.loaded.connect(self.model['pdf_files'].set_metadata)
+        thread.finished.connect(lambda: self.metadata_threads.remove(thread))
+        self.metadata_threads.append(thread)
+        thread.start()
+
+    def set_list_editable(self, editable: bool):
+        # files of a running batch stay listed until it is done, a worker may already be writing them
+        self.button['remove_pdf'].setEnabled(editable)
+        self.button['clear_list'].setEnabled(editable)
+
     def clear_list(self):
-        self.tablewidget['pdf_files'].setRowCount(0)
-        self.added_files.clear()
+        if self.scheduler.is_busy():
+            self.parent.status_bar.showMessage('Cancel the batch or wait for it to finish first')
+            return
+        for thread in self.scan_threads:
+            thread.cancel()
+        self.model['pdf_files'].clear()
         self.parent.status_bar.showMessage('Cleared')
 
     def remove_selected_pdf(self):
-        selected_items = self.tablewidget['pdf_files'].selectedItems()
-        if not selected_items:
+        if self.scheduler.is_busy():
+            self.parent.status_bar.showMessage('Cancel the batch or wait for it to finish first')
+            return
+        rows = selected_rows(self.tableview['pdf_files'])
+        if not rows:
             self.parent.status_bar.showMessage('No PDF selected to remove')
             return
 
-        rows_to_remove = set()
-        for item in selected_items:
-            row = self.tablewidget['pdf_files'].row(item)
-            rows_to_remove.add(row)
-            file_path = item.text()  # Retrieve file path before removing the item
-            self.added_files.discard(file_path)  # Remove the file path from the added_files set if needed
-
-        for row in sorted(rows_to_remove, reverse=True):
-            self.tablewidget['pdf_files'].removeRow(row)
-
+        self.model['pdf_files'].remove_rows(rows)
         self.parent.status_bar.showMessage('Selected PDFs removed')
 
     def dragEnterEvent(self, event):
@@ -394,21 +1067,8 @@ class EncryptPDFWidget(QWidget):
 
     def dropEvent(self, event):
         if event.mimeData().hasUrls():
-            for url in event.mimeData().urls():
-                file_path = url.toLocalFile()
-                if file_path.endswith('.pdf'):
-                    if file_path not in self.added_files:
-                        row_position = self.tablewidget['pdf_files'].rowCount()
-
-                        self.tablewidget['pdf_files'].insertRow(row_position)
-                        self.tablewidget['pdf_files'].setItem(row_position, 0, QTableWidgetItem(file_path))
-                        self.added_files.add(file_path)
-
-                        # status column
-                        item = QTableWidgetItem('N/A')
-                        item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-                        item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                        self.tablewidget['pdf_files'].setItem(row_position, 1, item)
+            # dropped folders are walked in the background, files are checked by content rather than extension
+            self.scan_paths([url.toLocalFile() for url in event.mimeData().urls() if url.isLocalFile()])
         else:
             event.ignore()
 
@@ -416,7 +1076,7 @@ class SplitPDFWidget(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.parent = parent
-        self.pdf_utility = PDFUtility()
+        self.pdf_utility = PDFUtility(metadata_cache=default_metadata_cache())
 
         self.setAcceptDrops(True)
         self.layout = {'main': QVBoxLayout()}
@@ -454,7 +1114,7 @@ class SplitPDFWidget(QWidget):
 
         self.combobox['page'] = QComboBox()
         # self.combobox['page'].setFixedWidth(100)
-        self.combobox['page'].addItems(['All', 'Odd', 'Even', 'Custom'])
+        self.combobox['page'].addItems(['All', 'Odd', 'Even', 'Custom', 'Chunks'])
         self.layout['pdf_config'].addWidget(self.combobox['page'])
 
         self.lineedit['custom_pages'] = QLineEdit()
@@ -462,6 +1122,29 @@ class SplitPDFWidget(QWidget):
         self.lineedit['custom_pages'].hide()  # Initially hide the custom pages line edit
         self.layout['pdf_config'].addWidget(self.lineedit['custom_pages'])
 
+        # chunk budgets, 0 leaves a budget out
+        self.layout['chunks'] = QHBoxLayout()
+        self.layout['pdf_config'].addLayout(self.layout['chunks'])
+
+        self.label['max_size'] = QLabel('Max size (MB):')
+        self.layout['chunks'].addWidget(self.label['max_size'])
+
+        self.spinbox['max_size'] = QSpinBox()
+        self.spinbox['max_size'].setRange(0, 100000)
+        self.spinbox['max_size'].setValue(10)
+        self.layout['chunks'].addWidget(self.spinbox['max_size'])
+
+        self.label['max_pages'] = QLabel('Max pages:')
+        self.layout['chunks'].addWidget(self.label['max_pages'])
+
+        self.spinbox['max_pages'] = QSpinBox()
+        self.spinbox['max_pages'].setRange(0, 1000000)
+        self.layout['chunks'].addWidget(self.spinbox['max_pages'])
+
+        for widget in (self.label['max_size'], self.spinbox['max_size'], self.label['max_pages'],
+                       self.spinbox['max_pages']):
+            widget.hide()
+
         # self.layout['pdf_config'].addStretch()
         self.layout['pdf_config'].addStretch()
         
@@ -478,20 +1161,43 @@ class SplitPDFWidget(QWidget):
         self.layout['output_dir'].addWidget(self.button['browse_output_dir'])
 
 
+        self.progressbar['split'] = QProgressBar()
+        self.layout['pdf_config'].addWidget(self.progressbar['split'])
+
+        self.layout['split_buttons'] = QHBoxLayout()
+        self.layout['pdf_config'].addLayout(self.layout['split_buttons'])
+
+        self.label['workers'] = QLabel('Workers:')
+        self.layout['split_buttons'].addWidget(self.label['workers'])
+
+        self.spinbox['workers'] = QSpinBox()
+        self.spinbox['workers'].setRange(1, 64)
+        self.spinbox['workers'].setValue(os.cpu_count() or 1)
+        self.layout['split_buttons'].addWidget(self.spinbox['workers'])
+
         self.button['split_pdf'] = QPushButton('&Split PDF')
-        self.layout['pdf_config'].addWidget(self.button['split_pdf'])
+        self.layout['split_buttons'].addWidget(self.button['split_pdf'])
+
+        self.button['cancel'] = QPushButton('Ca&ncel')
+        self.button['cancel'].setEnabled(False)
+        self.layout['split_buttons'].addWidget(self.button['cancel'])
 
     def _init_container(self):
         self.label = {}
         self.lineedit = {}
         self.combobox = {}
         self.button = {}
+        self.progressbar = {}
+        self.spinbox = {}
+        self.thread = None
+        self.scan_threads = []
 
     def config_signals(self):
         self.button['browse_file'].clicked.connect(self.browse_file)
         self.combobox['page'].currentIndexChanged.connect(self.on_combobox_page_changed)
         self.button['browse_output_dir'].clicked.connect(self.browser_dir)
         self.button['split_pdf'].clicked.connect(self.split_pdf)
+        self.button['cancel'].clicked.connect(self.cancel_split)
 
     def on_combobox_page_changed(self, index):
         if self.combobox['page'].currentText() == 'Custom':
@@ -499,6 +1205,11 @@ class SplitPDFWidget(QWidget):
         else:
             self.lineedit['custom_pages'].hide()            
 
+        chunks = self.combobox['page'].currentText() == 'Chunks'
+        for widget in (self.label['max_size'], self.spinbox['max_size'], self.label['max_pages'],
+                       self.spinbox['max_pages']):
+            widget.setVisible(chunks)
+
     def browse_file(self):
         file_path, _ = QFileDialog.getOpenFileName(self, 'PDF File Path', '', 'PDF Files (*.pdf)')
         if file_path:
@@ -509,6 +1220,30 @@ class SplitPDFWidget(QWidget):
         if dir_path:
             self.lineedit['pdf_output_dir'].setText(dir_path)
 
+    def dragEnterEvent(self, event):
+        if event.mimeData().hasUrls():
+            event.acceptProposedAction()
+        else:
+            event.ignore()
+
+    def dropEvent(self, event):
+        if event.mimeData().hasUrls():
+            # the first PDF found becomes the source, a dropped folder is only walked until then
+            for thread in self.scan_threads:
+                thread.cancel()
+            thread = FileScanThread([url.toLocalFile() for url in event.mimeData().urls() if url.isLocalFile()],
+                                    limit=1)
+            thread.found.connect(lambda file_paths: self.on_file_found(thread, file_paths))
+            thread.finished.connect(lambda: self.scan_threads.remove(thread))
+            self.scan_threads.append(thread)
+            thread.start()
+        else:
+            event.ignore()
+
+    def on_file_found(self, thread, file_paths):
+        if not thread.cancel_event.is_set():
+            self.lineedit['pdf_input'].setText(file_paths[0])
+
     def split_pdf(self):
         if self.lineedit['pdf_input'].text() == '':
             self.parent.status_bar.showMessage('Enter output file path')
@@ -516,7 +1251,7 @@ class SplitPDFWidget(QWidget):
         elif not check_if_file_exists(self.lineedit['pdf_input'].text()):
             self.parent.status_bar.showMessage('File not found')
             return
-        elif not self.lineedit['pdf_input'].text().endswith('.pdf'):
+        elif not is_pdf(self.lineedit['pdf_input'].text()):
             self.parent.status_bar.showMessage('Invalid PDF file')
             return
 
@@ -532,6 +1267,12 @@ class SplitPDFWidget(QWidget):
         output_dir = self.lineedit['pdf_output_dir'].text()
         
         split_type = self.combobox['page'].currentText()
+        custom_pages = None
+        max_bytes = self.spinbox['max_size'].value() * 1024 * 1024 or None
+        max_pages = self.spinbox['max_pages'].value() or None
+        if split_type == 'Chunks' and not (max_bytes or max_pages):
+            self.parent.status_bar.showMessage('Set a max size or max pages')
+            return
 
         try:
             if split_type == 'Custom':
@@ -541,28 +1282,234 @@ class SplitPDFWidget(QWidget):
                     return
                 
                 # check invalid custom pages
-                pages = custom_pages.split(',')
-                for page_range in pages:
-                    if '-' in page_range:
-                        start, end = map(int, page_range.split('-'))
-                        if start > end:
-                            self.parent.status_bar.showMessage(f'Invalid range: {start}-{end}. Start page must be smaller than end page.')
-                            return
-
-                self.pdf_utility.split_pdf(input_file, output_dir, split_type, custom_pages)
-            else:
-                self.pdf_utility.split_pdf(input_file, output_dir, split_type)
+                parse_page_ranges(custom_pages)
 
-            self.parent.status_bar.showMessage(f'PDF splitted at {output_dir}')
         except Exception as e:
             self.parent.status_bar.showMessage(str(e))
             return
+
+        self.thread = SplitPDFThread(input_file, output_dir, split_type, custom_pages, self.pdf_utility, max_bytes,
+                                     max_pages, self.spinbox['workers'].value())
+        self.thread.page_progress.connect(self.on_split_progress)
+        self.thread.event.connect(lambda event: self.parent.status_bar.showMessage(describe_event(event)))
+        self.thread.finished.connect(lambda result: self.on_split_pdf_finished(result, output_dir))
+        self.progressbar['split'].setValue(0)
+        self.button['split_pdf'].setEnabled(False)
+        self.button['cancel'].setEnabled(True)
+        self.thread.start()
+        self.parent.status_bar.showMessage('Splitting PDF...')
+
+    def cancel_split(self):
+        if self.thread is not None:
+            self.thread.cancel()
+            self.parent.status_bar.showMessage('Cancelling...')
+
+    def on_split_progress(self, done, total):
+        self.progressbar['split'].setMaximum(total)
+        self.progressbar['split'].setValue(done)
+
+    def on_split_pdf_finished(self, result, output_dir):
+        self.button['split_pdf'].setEnabled(True)
+        self.button['cancel'].setEnabled(False)
+        if result == 'Success':
+            self.parent.status_bar.showMessage(f'PDF splitted at {output_dir}')
+        elif result == 'Cancelled':
+            self.progressbar['split'].setValue(0)
+            self.parent.status_bar.showMessage('Split cancelled')
+        else:
+            self.parent.status_bar.showMessage(result)
  
+class CompressPDFWidget(QWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.parent = parent
+        self.pdf_utility = PDFUtility(metadata_cache=default_metadata_cache())
+
+        self.layout = {'main': QVBoxLayout()}
+        self.setLayout(self.layout['main'])
+
+        self.init_ui()
+        self.config_signals()
+
+    def init_ui(self):
+        self._init_container()
+
+        self.layout['input'] = QHBoxLayout()
+        self.layout['main'].addLayout(self.layout['input'])
+
+        self.label['pdf_input'] = QLabel('Source PDF:')
+        self.layout['input'].addWidget(self.label['pdf_input'])
+
+        self.lineedit['pdf_input'] = QLineEdit()
+        self.layout['input'].addWidget(self.lineedit['pdf_input'])
+
+        self.button['browse_file'] = QPushButton('Br&owse')
+        self.layout['input'].addWidget(self.button['browse_file'])
+
+        self.layout['pdf_config'] = QVBoxLayout()
+        self.layout['main'].addLayout(self.layout['pdf_config'])
+
+        self.layout['options'] = QHBoxLayout()
+        self.layout['pdf_config'].addLayout(self.layout['options'])
+
+        self.label['level'] = QLabel('Compression level:')
+        self.layout['options'].addWidget(self.label['level'])
+
+        self.spinbox['level'] = QSpinBox()
+        self.spinbox['level'].setRange(1, 9)
+        self.spinbox['level'].setValue(9)
+        self.layout['options'].addWidget(self.spinbox['level'])
+
+        self.label['image_dpi'] = QLabel('Image DPI:')
+        self.layout['options'].addWidget(self.label['image_dpi'])
+
+        self.spinbox['image_dpi'] = QSpinBox()
+        self.spinbox['image_dpi'].setRange(0, 1200)
+        self.spinbox['image_dpi'].setValue(150)
+        self.spinbox['image_dpi'].setSpecialValueText('Keep')
+        self.layout['options'].addWidget(self.spinbox['image_dpi'])
+
+        self.label['image_quality'] = QLabel('JPEG quality:')
+        self.layout['options'].addWidget(self.label['image_quality'])
+
+        self.spinbox['image_quality'] = QSpinBox()
+        self.spinbox['image_quality'].setRange(1, 100)
+        self.spinbox['image_quality'].setValue(75)
+        self.layout['options'].addWidget(self.spinbox['image_quality'])
+
+        self.label['workers'] = QLabel('Workers:')
+        self.layout['options'].addWidget(self.label['workers'])
+
+        self.spinbox['workers'] = QSpinBox()
+        self.spinbox['workers'].setRange(1, 64)
+        self.spinbox['workers'].setValue(os.cpu_count() or 1)
+        self.layout['options'].addWidget(self.spinbox['workers'])
+        self.layout['options'].addStretch()
+
+        self.label['summary'] = QLabel()
+        self.layout['pdf_config'].addWidget(self.label['summary'])
+
+        self.layout['pdf_config'].addStretch()
+
+        self.layout['output'] = QHBoxLayout()
+        self.layout['pdf_config'].addLayout(self.layout['output'])
+
+        self.label['pdf_output'] = QLabel('Output PDF:')
+        self.layout['output'].addWidget(self.label['pdf_output'])
+
+        self.lineedit['pdf_output'] = QLineEdit()
+        self.layout['output'].addWidget(self.lineedit['pdf_output'])
+
+        self.button['browse_output'] = QPushButton('&Browse')
+        self.layout['output'].addWidget(self.button['browse_output'])
+
+        self.progressbar['compress'] = QProgressBar()
+        self.layout['pdf_config'].addWidget(self.progressbar['compress'])
+
+        self.layout['compress_buttons'] = QHBoxLayout()
+        self.layout['pdf_config'].addLayout(self.layout['compress_buttons'])
+
+        self.button['compress_pdf'] = QPushButton('&Compress PDF')
+        self.layout['compress_buttons'].addWidget(self.button['compress_pdf'])
+
+        self.button['cancel'] = QPushButton('Ca&ncel')
+        self.button['cancel'].setEnabled(False)
+        self.layout['compress_buttons'].addWidget(self.button['cancel'])
+
+    def _init_container(self):
+        self.label = {}
+        self.lineedit = {}
+        self.spinbox = {}
+        self.button = {}
+        self.progressbar = {}
+        self.thread = None
+
+    def config_signals(self):
+        self.button['browse_file'].clicked.connect(self.browse_file)
+        self.button['browse_output'].clicked.connect(self.browse_output)
+        self.button['compress_pdf'].clicked.connect(self.compress_pdf)
+        self.button['cancel'].clicked.connect(self.cancel_compress)
+
+    def browse_file(self):
+        file_path, _ = QFileDialog.getOpenFileName(self, 'PDF File Path', '', 'PDF Files (*.pdf)')
+        if file_path:
+            self.lineedit['pdf_input'].setText(file_path)
+            if self.lineedit['pdf_output'].text() == '':
+                self.lineedit['pdf_output'].setText(os.path.splitext(file_path)[0] + '_compressed.pdf')
+
+    def browse_output(self):
+        file_path, _ = QFileDialog.getSaveFileName(self, 'Save Compressed PDF', '', 'PDF Files (*.pdf)')
+        if file_path:
+            self.lineedit['pdf_output'].setText(file_path)
+
+    def compress_pdf(self):
+        input_file = self.lineedit['pdf_input'].text()
+        if input_file == '':
+            self.parent.status_bar.showMessage('Enter source PDF path')
+            return
+        elif not check_if_file_exists(input_file):
+            self.parent.status_bar.showMessage('File not found')
+            return
+        elif not input_file.endswith('.pdf'):
+            self.parent.status_bar.showMessage('Invalid PDF file')
+            return
+
+        output_file = self.lineedit['pdf_output'].text() or os.path.splitext(input_file)[0] + '_compressed.pdf'
+
+        self.thread = CompressPDFThread(input_file, output_file, self.spinbox['level'].value(),
+                                        self.spinbox['image_dpi'].value(), self.spinbox['image_quality'].value(),
+                                        self.pdf_utility, self.spinbox['workers'].value())
+        self.thread.page_progress.connect(self.on_compress_progress)
+        self.thread.finished.connect(lambda result: self.on_compress_pdf_finished(result, output_file))
+        self.progressbar['compress'].setValue(0)
+        self.label['summary'].clear()
+        self.button['compress_pdf'].setEnabled(False)
+        self.button['cancel'].setEnabled(True)
+        self.thread.start()
+        self.parent.status_bar.showMessage('Compressing PDF...')
+
+    def cancel_compress(self):
+        if self.thread is not None:
+            self.thread.cancel()
+            self.parent.status_bar.showMessage('Cancelling...')
+
+    def on_compress_progress(self, done, total):
+        self.progressbar['compress'].setMaximum(total)
+        self.progressbar['compress'].setValue(done)
+
+    def on_compress_pdf_finished(self, result, output_file):
+        self.button['compress_pdf'].setEnabled(True)
+        self.button['cancel'].setEnabled(False)
+        if result == 'Success':
+            sizes = self.thread.result
+            self.label['summary'].setText('\n'.join(
+                f"{stream_class.capitalize()}: {stats['streams']} streams, "
+                f"{stats['before'] / 1024:.1f} KB -> {stats['after'] / 1024:.1f} KB"
+                for stream_class, stats in sizes['streams'].items() if stats['streams']))
+            if sizes['kept_original']:
+                self.parent.status_bar.showMessage(f'PDF could not be made smaller, copied it unchanged to {output_file}')
+            else:
+                self.parent.status_bar.showMessage(
+                    f"PDF compressed from {sizes['input_size'] / 1024:.1f} KB to {sizes['output_size'] / 1024:.1f} KB "
+                    f"at {output_file}")
+        elif result == 'Cancelled':
+            self.progressbar['compress'].setValue(0)
+            self.parent.status_bar.showMessage('Compress cancelled')
+        else:
+            self.parent.status_bar.showMessage(result)
+
 class MergePDFWidget(QWidget):
+    THUMBNAIL_WIDTH = 48
+    PREVIEW_WIDTH = 240
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.parent = parent
-        self.pdf_utility = PDFUtility()
+        self.metadata_cache = default_metadata_cache()
+        self.pdf_utility = PDFUtility(metadata_cache=self.metadata_cache)
+        self.thumbnail_renderer = ThumbnailRenderer(default_thumbnail_cache(), parent=self)
+        self.metadata_threads = []
+        self.scan_threads = []
 
         self.setAcceptDrops(True)
         self.layout = {'main': QVBoxLayout()}
@@ -584,9 +1531,12 @@ class MergePDFWidget(QWidget):
     def _init_container(self):
         self.label = {}
         self.button = {}
-        self.listwidget = {}
+        self.listview = {}
+        self.model = {}
         self.lineedit = {}
-        self.added_files = set()
+        self.progressbar = {}
+        self.spinbox = {}
+        self.thread = None
 
     def _init_menu_bar(self):
         self.menu_bar = QMenuBar()
@@ -611,17 +1561,22 @@ class MergePDFWidget(QWidget):
         self.lineedit['pdf_output'] = QLineEdit()
         self.layout['input'].addWidget(self.lineedit['pdf_output'])
 
-        # PDF list listwidget configuration
-        self.listwidget['pdf_files'] = QListWidget()
-        self.listwidget['pdf_files'].setAcceptDrops(True)
-        self.listwidget['pdf_files'].setDragEnabled(True)
-        self.listwidget['pdf_files'].setDragDropMode(QListWidget.DragDropMode.InternalMove)
-        self.listwidget['pdf_files'].setDefaultDropAction(Qt.DropAction.MoveAction)       
-        self.listwidget['pdf_files'].setSelectionMode(QAbstractItemView.SelectionMode.MultiSelection)
+        # PDF list view configuration, dragging rows reorders the model
+        self.model['pdf_files'] = PDFFileListModel(movable=True, parent=self)
+        self.model['pdf_files'].set_thumbnails(self.thumbnail_renderer, self.THUMBNAIL_WIDTH)
+        self.listview['pdf_files'] = QListView()
+        self.listview['pdf_files'].setModel(self.model['pdf_files'])
+        self.listview['pdf_files'].setUniformItemSizes(True)
+        self.listview['pdf_files'].setIconSize(QSize(self.THUMBNAIL_WIDTH, self.THUMBNAIL_WIDTH))
+        self.listview['pdf_files'].setAcceptDrops(True)
+        self.listview['pdf_files'].setDragEnabled(True)
+        self.listview['pdf_files'].setDragDropMode(QAbstractItemView.DragDropMode.InternalMove)
+        self.listview['pdf_files'].setDefaultDropAction(Qt.DropAction.MoveAction)
+        self.listview['pdf_files'].setSelectionMode(QAbstractItemView.SelectionMode.MultiSelection)
 
         # Set custom delegate for gridlines
-        self.listwidget['pdf_files'].setItemDelegate(GridLineDelegate())
-        self.layout['submain'].addWidget(self.listwidget['pdf_files'])
+        self.listview['pdf_files'].setItemDelegate(GridLineDelegate())
+        self.layout['submain'].addWidget(self.listview['pdf_files'])
 
         self.layout['buttons'] = QVBoxLayout()
         self.layout['submain'].addLayout(self.layout['buttons'])
@@ -629,12 +1584,22 @@ class MergePDFWidget(QWidget):
         self.button['add_pdf'] = QPushButton('&Add PDF')
         self.layout['buttons'].addWidget(self.button['add_pdf'])
 
+        self.button['add_folder'] = QPushButton('Add &Folder')
+        self.layout['buttons'].addWidget(self.button['add_folder'])
+
         self.button['merge_pdf'] = QPushButton('&Merge PDFs')
         self.layout['buttons'].addWidget(self.button['merge_pdf'])
 
+        self.button['cancel'] = QPushButton('Ca&ncel')
+        self.button['cancel'].setEnabled(False)
+        self.layout['buttons'].addWidget(self.button['cancel'])
+
         self.button['remove_pdf'] = QPushButton('&Remove PDF')
         self.layout['buttons'].addWidget(self.button['remove_pdf'])
 
+        self.button['select_pages'] = QPushButton('Select Pa&ges')
+        self.layout['buttons'].addWidget(self.button['select_pages'])
+
         self.button['sort_pdf_asc'] = QPushButton('Sort PDF (ASC)')
         self.layout['buttons'].addWidget(self.button['sort_pdf_asc'])
 
@@ -646,13 +1611,44 @@ class MergePDFWidget(QWidget):
 
         self.layout['buttons'].addStretch()
 
+        # larger rendering of any page of the current entry
+        self.layout['preview'] = QVBoxLayout()
+        self.layout['submain'].addLayout(self.layout['preview'])
+
+        self.label['preview'] = QLabel()
+        self.label['preview'].setFixedSize(self.PREVIEW_WIDTH, self.PREVIEW_WIDTH)
+        self.label['preview'].setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.layout['preview'].addWidget(self.label['preview'])
+
+        self.layout['preview_page'] = QHBoxLayout()
+        self.layout['preview'].addLayout(self.layout['preview_page'])
+
+        self.label['preview_page'] = QLabel('Page:')
+        self.layout['preview_page'].addWidget(self.label['preview_page'])
+
+        self.spinbox['preview_page'] = QSpinBox()
+        self.spinbox['preview_page'].setRange(1, 1)
+        self.layout['preview_page'].addWidget(self.spinbox['preview_page'])
+
+        self.layout['preview'].addStretch()
+
+        self.progressbar['merge'] = QProgressBar()
+        self.layout['main'].addWidget(self.progressbar['merge'])
+
     def config_signals(self):
         self.button['add_pdf'].clicked.connect(self.add_pdf)
+        self.button['add_folder'].clicked.connect(self.add_folder)
         self.button['merge_pdf'].clicked.connect(self.merge_pdf)
+        self.button['cancel'].clicked.connect(self.cancel_merge)
         self.button['remove_pdf'].clicked.connect(self.remove_selected_pdf)
+        self.button['select_pages'].clicked.connect(self.select_pages)
+        self.listview['pdf_files'].doubleClicked.connect(lambda index: self.select_pages([index.row()]))
         self.button['sort_pdf_asc'].clicked.connect(lambda: self.sort_list(True))
         self.button['sort_pdf_desc'].clicked.connect(lambda: self.sort_list(False))
         self.button['clear_list'].clicked.connect(self.clear_list)
+        self.listview['pdf_files'].selectionModel().currentChanged.connect(lambda: self.show_preview(reset_page=True))
+        self.spinbox['preview_page'].valueChanged.connect(lambda: self.show_preview())
+        self.thumbnail_renderer.rendered.connect(self.on_thumbnail_rendered)
 
         shortcut = QShortcut(QKeySequence('Alt+P'), self)
         shortcut.activated.connect(self.lineedit['pdf_output'].setFocus)
@@ -660,14 +1656,88 @@ class MergePDFWidget(QWidget):
     def add_pdf(self):
         file_paths, _ = QFileDialog.getOpenFileNames(self, 'Add PDFs', '', 'PDF Files (*.pdf)')
         if file_paths:
-            for file_path in file_paths:
-                if file_path not in self.added_files:
-                    self.listwidget['pdf_files'].addItem(file_path)
-                    self.added_files.add(file_path)
+            # folder scans add real paths, so a file picked through a link is not listed twice
+            self.add_files([os.path.realpath(file_path) for file_path in file_paths])
             self.parent.status_bar.showMessage('PDFs added')
 
+    def add_folder(self):
+        directory = QFileDialog.getExistingDirectory(self, 'Add Folder')
+        if directory:
+            self.scan_paths([directory])
+
+    def scan_paths(self, paths):
+        thread = FileScanThread(paths)
+        thread.found.connect(lambda file_paths: self.on_files_found(thread, file_paths))
+        thread.finished.connect(lambda: self.on_scan_finished(thread))
+        self.scan_threads.append(thread)
+        thread.start()
+        self.parent.status_bar.showMessage('Scanning for PDFs...')
+
+    def on_files_found(self, thread, file_paths):
+        # a batch already queued when the list was cleared is dropped
+        if thread.cancel_event.is_set():
+            return
+        self.add_files(file_paths)
+        self.parent.status_bar.showMessage(f"Scanning for PDFs... {self.model['pdf_files'].rowCount()} listed")
+
+    def on_scan_finished(self, thread):
+        self.scan_threads.remove(thread)
+        if thread.cancel_event.is_set():
+            return
+        self.parent.status_bar.showMessage(f'{thread.count} PDFs found')
+
+    def add_files(self, file_paths):
+        new_files = self.model['pdf_files'].add_files(file_paths)
+        if new_files:
+            self.load_metadata(new_files)
+        return new_files
+
+    def load_metadata(self, file_paths):
+        # page count and encryption status are read (or fetched from the cache) off the GUI thread
+        if self.metadata_threads and self.metadata_threads[-1].enqueue(file_paths):
+            return
+        thread = MetadataThread(file_paths, self.metadata_cache)
+        # the model shows the metadata as the row's tooltip
+        thread.loaded.connect(self.model['pdf_files'].set_metadata)
+        thread.loaded.connect(self.on_metadata_loaded)
+        thread.finished.connect(lambda: self.metadata_threads.remove(thread))
+        self.metadata_threads.append(thread)
+        thread.start()
+
+    def preview_path(self):
+        index = self.listview['pdf_files'].currentIndex()
+        return self.model['pdf_files'].path(index.row()) if index.isValid() else None
+
+    def show_preview(self, reset_page: bool = False):
+        path = self.preview_path()
+        if path is None:
+            self.label['preview'].clear()
+            return
+
+        metadata = self.model['pdf_files'].metadata.get(path)
+        page_count = metadata['page_count'] if metadata and metadata['page_count'] else 1
+        self.spinbox['preview_page'].blockSignals(True)
+        self.spinbox['preview_page'].setMaximum(page_count)
+        if reset_page:
+            self.spinbox['preview_page'].setValue(self.model['pdf_files'].first_page(
+                self.listview['pdf_files'].currentIndex().row()) + 1)
+        self.spinbox['preview_page'].blockSignals(False)
+
+        image = self.thumbnail_renderer.thumbnail(path, self.spinbox['preview_page'].value() - 1, self.PREVIEW_WIDTH)
+        self.label['preview'].setPixmap(QPixmap.fromImage(image))
+
+    def on_metadata_loaded(self, path, metadata):
+        # the page count bounds the preview's page
+        if path == self.preview_path():
+            self.show_preview()
+
+    def on_thumbnail_rendered(self, path, page, width):
+        if (width == self.PREVIEW_WIDTH and path == self.preview_path()
+                and page == self.spinbox['preview_page'].value() - 1):
+            self.show_preview()
+
     def merge_pdf(self):
-        if self.listwidget['pdf_files'].count() == 0:
+        if self.model['pdf_files'].rowCount() == 0:
             self.parent.status_bar.showMessage('No PDFs to merge')
             return
         
@@ -679,31 +1749,88 @@ class MergePDFWidget(QWidget):
         if not output_file.endswith('.pdf'):
             output_file += '.pdf'
         
-        try:
-            pdfs = [self.listwidget['pdf_files'].item(i).text() for i in range(self.listwidget['pdf_files'].count())]
-            self.pdf_utility.merge_pdfs(pdfs, output_file)
+        pdfs = list(self.model['pdf_files'].paths)
+        page_ranges = [self.model['pdf_files'].page_spec(row) for row in range(len(pdfs))]
+        self.thread = MergePDFThread(pdfs, output_file, self.pdf_utility, page_ranges)
+        self.thread.input_progress.connect(self.on_merge_input_progress)
+        self.thread.page_progress.connect(self.on_merge_page_progress)
+        self.thread.event.connect(lambda event: self.parent.status_bar.showMessage(describe_event(event)))
+        self.thread.finished.connect(lambda result: self.on_merge_pdf_finished(result, output_file))
+
+        # each input is worth 100 steps so page progress can fill in between inputs
+        self.merged_inputs = 0
+        self.progressbar['merge'].setMaximum(len(pdfs) * 100)
+        self.progressbar['merge'].setValue(0)
+        self.button['merge_pdf'].setEnabled(False)
+        self.button['cancel'].setEnabled(True)
+        self.thread.start()
+        self.parent.status_bar.showMessage('Merging PDFs...')
+
+    def cancel_merge(self):
+        if self.thread is not None:
+            self.thread.cancel()
+            self.parent.status_bar.showMessage('Cancelling...')
+
+    def on_merge_input_progress(self, done, total):
+        self.merged_inputs = done
+        self.progressbar['merge'].setValue(done * 100)
+
+    def on_merge_page_progress(self, done, total):
+        self.progressbar['merge'].setValue(self.merged_inputs * 100 + done * 100 // total)
+
+    def on_merge_pdf_finished(self, result, output_file):
+        self.button['merge_pdf'].setEnabled(True)
+        self.button['cancel'].setEnabled(False)
+        if result == 'Success':
             self.parent.status_bar.showMessage(f'PDF saved at {output_file}')
-        except Exception as e:
-            self.parent.status_bar.showMessage(f'Error: {e}')       
+        elif result == 'Cancelled':
+            self.progressbar['merge'].setValue(0)
+            self.parent.status_bar.showMessage('Merge cancelled')
+        else:
+            self.parent.status_bar.showMessage(f'Error: {result}')
+
+    def select_pages(self, rows=None):
+        rows = rows or selected_rows(self.listview['pdf_files'])
+        if not rows:
+            self.parent.status_bar.showMessage('No PDF selected')
+            return
+
+        model = self.model['pdf_files']
+        page_spec, ok = QInputDialog.getText(self, 'Select Pages', 'Pages to merge, e.g. 1-2, 5 (empty for all):',
+                                             text=model.page_spec(rows[0]))
+        if not ok:
+            return
+        page_spec = page_spec.strip()
+        if page_spec:
+            # checked against the page counts already loaded, files still loading are checked by the merge
+            for row in rows:
+                metadata = model.metadata.get(model.path(row))
+                try:
+                    parse_page_ranges(page_spec, metadata['page_count'] if metadata else None)
+                except ValueError as e:
+                    self.parent.status_bar.showMessage(f'{os.path.basename(model.path(row))}: {e}')
+                    return
+        model.set_page_spec(rows, page_spec)
+        self.parent.status_bar.showMessage(f'Pages {page_spec or "all"} selected for {len(rows)} PDFs')
 
     def remove_selected_pdf(self):
-        if len(self.listwidget['pdf_files'].selectedItems()) > 0:
-            for item in self.listwidget['pdf_files'].selectedItems():
-                self.listwidget['pdf_files'].takeItem(self.listwidget['pdf_files'].row(item))
-                self.added_files.remove(item.text())
+        rows = selected_rows(self.listview['pdf_files'])
+        if rows:
+            self.model['pdf_files'].remove_rows(rows)
             self.parent.status_bar.showMessage('PDF removed')
 
     def clear_list(self):
-        self.listwidget['pdf_files'].clear()
-        self.added_files.clear()
+        for thread in self.scan_threads:
+            thread.cancel()
+        self.model['pdf_files'].clear()
         self.parent.status_bar.showMessage('Cleared')
 
     def sort_list(self, ascending=True):
         if ascending:
-            self.listwidget['pdf_files'].sortItems(Qt.SortOrder.AscendingOrder)
+            self.model['pdf_files'].sort(0, Qt.SortOrder.AscendingOrder)
             self.parent.status_bar.showMessage('Sorted in ascending order')
         else:
-            self.listwidget['pdf_files'].sortItems(Qt.SortOrder.DescendingOrder)
+            self.model['pdf_files'].sort(0, Qt.SortOrder.DescendingOrder)
             self.parent.status_bar.showMessage('Sorted in descending order')
 
     def dragEnterEvent(self, event):
@@ -714,11 +1841,7 @@ class MergePDFWidget(QWidget):
 
     def dropEvent(self, event):
         if event.mimeData().hasUrls():
-            for url in event.mimeData().urls():
-                file_path = url.toLocalFile()
-                if file_path.endswith('.pdf'):
-                    if file_path not in self.added_files:
-                        self.listwidget['pdf_files'].addItem(file_path)
-                        self.added_files.add(file_path)
+            # dropped folders are walked in the background, files are checked by content rather than extension
+            self.scan_paths([url.toLocalFile() for url in event.mimeData().urls() if url.isLocalFile()])
         else:
             event.ignore()
\ No newline at end of file
@@ -0,0 +1,54 @@
+import zlib
+from PyPDF2 import PdfReader, PdfWriter
+from PyPDF2.generic import ArrayObject, DecodedStreamObject, DictionaryObject, EncodedStreamObject, NameObject, NumberObject
+from pdf_utility import PDFUtility
+
+
+def flate_stream(data: bytes):
+    stream = EncodedStreamObject()
+    stream._data = zlib.compress(data)
+    stream[NameObject('/Filter')] = NameObject('/FlateDecode')
+    return stream
+
+
+def write_input(pdf_file: str, filler: int):
+    # the same image in every input, its /ColorSpace and /DecodeParms are indirect objects whose numbers
+    # differ between inputs by the filler objects written first
+    pdf_writer = PdfWriter()
+    for index in range(filler):
+        pdf_writer._add_object(DictionaryObject({NameObject('/Filler'): NumberObject(index)}))
+    pdf_writer.add_blank_page(612, 792)
+    page = pdf_writer.pages[0]
+    image = flate_stream(bytes(range(256)) * 48)
+    image.update({
+        NameObject('/Type'): NameObject('/XObject'),
+        NameObject('/Subtype'): NameObject('/Image'),
+        NameObject('/Width'): NumberObject(64),
+        NameObject('/Height'): NumberObject(64),
+        NameObject('/BitsPerComponent'): NumberObject(8),
+        NameObject('/ColorSpace'): pdf_writer._add_object(ArrayObject([
+            NameObject('/ICCBased'), pdf_writer._add_object(flate_stream(b'icc profile' * 100))])),
+        NameObject('/DecodeParms'): pdf_writer._add_object(DictionaryObject({NameObject('/Columns'): NumberObject(64)})),
+    })
+    page[NameObject('/Resources')] = DictionaryObject({
+        NameObject('/XObject'): DictionaryObject({NameObject('/Im0'): pdf_writer._add_object(image)})})
+    content = DecodedStreamObject()
+    content.set_data(b'q 64 0 0 64 0 0 cm /Im0 Do Q')
+    page[NameObject('/Contents')] = pdf_writer._add_object(content)
+    with open(pdf_file, 'wb') as output:
+        pdf_writer.write(output)
+
+
+def test_identical_images_are_shared_across_inputs(tmp_path):
+    pdf_files = [str(tmp_path / 'first.pdf'), str(tmp_path / 'second.pdf')]
+    write_input(pdf_files[0], 0)
+    write_input(pdf_files[1], 7)
+    output_file = str(tmp_path / 'merged.pdf')
+    PDFUtility().merge_pdfs(pdf_files, output_file, deduplicate=True)
+
+    pdf_reader = PdfReader(output_file)
+    images = {page['/Resources']['/XObject'].raw_get('/Im0').idnum for page in pdf_reader.pages}
+    assert len(images) == 1
+    # catalog, page tree, 2 pages, 1 content stream, image, color space, ICC profile, decode parameters:
+    # nothing of the second image is written
+    assert sum(len(numbers) for numbers in pdf_reader.xref.values()) - 1 == 9
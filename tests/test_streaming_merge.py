@@ -0,0 +1,52 @@
+import os
+import random
+import tracemalloc
+from PyPDF2 import PdfReader, PdfWriter
+from PyPDF2.generic import DecodedStreamObject, NameObject
+from pdf_utility import PDFUtility
+
+PAGES_PER_INPUT = 20
+CONTENT_BYTES = 20 * 1024
+# an input has about 400 KB of content, the merge holds one page at a time
+PEAK_LIMIT = 1024 * 1024
+# what may stay per input: its xref offsets and page numbers (PdfMerger keeps about 100 KB)
+GROWTH_PER_INPUT = 16 * 1024
+
+
+def write_input(pdf_file: str, seed: int):
+    rng = random.Random(seed)
+    pdf_writer = PdfWriter()
+    for _ in range(PAGES_PER_INPUT):
+        page = pdf_writer.add_blank_page(612, 792)
+        content = DecodedStreamObject()
+        # incompressible comment lines, so the content is really held when a page is loaded
+        content.set_data(b''.join(b'% ' + rng.randbytes(30).hex().encode() + b'\n'
+                                  for _ in range(CONTENT_BYTES // 63)))
+        page[NameObject('/Contents')] = pdf_writer._add_object(content)
+    with open(pdf_file, 'wb') as output:
+        pdf_writer.write(output)
+
+
+def merge_peak(tmp_path, count: int):
+    pdf_files = [str(tmp_path / f'input_{index}.pdf') for index in range(count)]
+    for index, pdf_file in enumerate(pdf_files):
+        if not os.path.exists(pdf_file):
+            write_input(pdf_file, index)
+    output_file = str(tmp_path / f'merged_{count}.pdf')
+
+    tracemalloc.start()
+    try:
+        PDFUtility().merge_pdfs(pdf_files, output_file, streaming=True)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert len(PdfReader(output_file).pages) == count * PAGES_PER_INPUT
+    return peak
+
+
+def test_streaming_merge_memory_does_not_grow_with_inputs(tmp_path):
+    small = merge_peak(tmp_path, 5)
+    large = merge_peak(tmp_path, 20)
+    assert small < PEAK_LIMIT
+    assert large < PEAK_LIMIT
+    assert (large - small) / 15 < GROWTH_PER_INPUT
@@ -0,0 +1,37 @@
+from PyPDF2 import PdfReader, PdfWriter
+from PyPDF2.generic import ArrayObject, DictionaryObject, NameObject, RectangleObject, TextStringObject
+from pdf_utility import PDFUtility
+
+
+def write_input(pdf_file: str):
+    pdf_writer = PdfWriter()
+    for _ in range(3):
+        pdf_writer.add_blank_page(612, 792)
+    pdf_writer.add_outline_item('Second page', 1)
+    field = pdf_writer._add_object(DictionaryObject({
+        NameObject('/Type'): NameObject('/Annot'),
+        NameObject('/Subtype'): NameObject('/Widget'),
+        NameObject('/FT'): NameObject('/Tx'),
+        NameObject('/T'): TextStringObject('name'),
+        NameObject('/Rect'): RectangleObject([72, 72, 288, 96]),
+        NameObject('/P'): pdf_writer.pages[0].indirect_reference,
+    }))
+    pdf_writer.pages[0][NameObject('/Annots')] = ArrayObject([field])
+    pdf_writer._root_object[NameObject('/AcroForm')] = DictionaryObject({NameObject('/Fields'): ArrayObject([field])})
+    with open(pdf_file, 'wb') as output:
+        pdf_writer.write(output)
+
+
+def test_watermark_keeps_outlines_and_form(tmp_path):
+    pdf_file = str(tmp_path / 'input.pdf')
+    write_input(pdf_file)
+    output_file = PDFUtility().watermark_pdf(pdf_file, str(tmp_path / 'output.pdf'), text='DRAFT')
+
+    pdf_reader = PdfReader(output_file)
+    assert [(item.title, pdf_reader.get_destination_page_number(item)) for item in pdf_reader.outline] == \
+        [('Second page', 1)]
+    fields = pdf_reader.trailer['/Root']['/AcroForm']['/Fields']
+    assert [field.get_object()['/T'] for field in fields] == ['name']
+    # the form field is still the widget on the first page, not a copy of it
+    assert fields[0].idnum == pdf_reader.pages[0]['/Annots'][0].idnum
+    assert fields[0].get_object().raw_get('/P').idnum == pdf_reader.pages[0].indirect_reference.idnum